@@ -0,0 +1,178 @@
+import argparse
+import os
+import sys
+import time
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+import imutils
+import numpy as np
+
+# Ensure project root is on sys.path for "utils" imports when run directly
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from utils import vision  # noqa: E402
+from utils.constants import SUPPORT_CARD_ICON_REGION_PHONE  # noqa: E402
+from utils.frame import Frame  # noqa: E402
+from utils.templates import BEST_SCALES, load_template  # noqa: E402
+
+TRAINING_ICONS = [
+    f"assets/icons/train_{stat}_phone.png" for stat in ("spd", "sta", "pwr", "guts", "wit")
+]
+SUPPORT_ICONS = [
+    f"assets/icons/support_card_type_{stat}.png" for stat in ("spd", "sta", "pwr", "wit")
+]
+BUTTONS = [
+    f"assets/buttons/{name}.png" for name in ("next_btn", "cancel_btn", "inspiration_btn")
+]
+
+
+def time_call(fn: Callable, iterations: int) -> float:
+    """Return the average seconds per call of fn over the given iterations"""
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def synthetic_frame(templates: List[np.ndarray], width: int = 720, height: int = 1280):
+    """Game-like BGR phone frame with every template pasted at device scale"""
+    rng = np.random.default_rng(0)
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    for top in range(0, height, 80):
+        frame[top : top + 80] = rng.integers(0, 255, size=3, dtype=np.uint8)
+    frame += rng.integers(0, 8, size=(height, width, 3), dtype=np.uint8)
+
+    x, y = 10, 200
+    for template in templates:
+        scaled = cv2.resize(template, None, fx=1 / BEST_SCALES, fy=1 / BEST_SCALES)
+        h, w = scaled.shape[:2]
+        if x + w > width:
+            x, y = 10, y + 160
+        frame[y : y + h, x : x + w] = scaled
+        x += w + 10
+    return frame
+
+
+def match_before(
+    image: np.ndarray, templates: List[np.ndarray], region: Optional[Tuple]
+) -> None:
+    """Previous matcher: crop and resize the screen again for every template"""
+    for template in templates:
+        screen = image
+        if region:
+            x, y, w, h = region
+            screen = image[y : y + h, x : x + w]
+        resized = imutils.resize(screen, width=int(screen.shape[1] * BEST_SCALES))
+        r = screen.shape[1] / float(resized.shape[1])
+        result = cv2.matchTemplate(resized, template, cv2.TM_CCOEFF_NORMED)
+        _, _, _, max_loc = cv2.minMaxLoc(result)
+        _ = (int(max_loc[0] * r), int(max_loc[1] * r))
+
+
+def match_best(screen: Frame, template: np.ndarray, scale: float = BEST_SCALES):
+    """Best match of a template in a screen Frame shrunk by scale
+
+    Matches the way the vision engine does on a cache miss: the shrunk screen
+    is computed once per capture, and the pyramid matcher is tried first when
+    vision.PYRAMID_MATCHING is set.
+    """
+    (tH, tW) = template.shape[:2]
+    resized = screen.scaled(scale)
+    if resized.shape[0] < tH or resized.shape[1] < tW:
+        return 0, None
+
+    if vision.PYRAMID_MATCHING:
+        match = vision._match_pyramid(screen, template, scale)
+        if match is not None:
+            return match
+
+    result = cv2.matchTemplate(resized, template, cv2.TM_CCOEFF_NORMED)
+    (_, maxVal, _, maxLoc) = cv2.minMaxLoc(result)
+    return maxVal, vision._screen_box(screen, scale, maxLoc, (tW, tH))
+
+
+def match_after(
+    image: np.ndarray, templates: List[np.ndarray], region: Optional[Tuple]
+) -> None:
+    """Current matcher: one resize per capture, shared by every template"""
+    # A new Frame per call, like a new capture generation
+    frame = Frame(image, "BGR")
+    for template in templates:
+        match_best(frame.roi(region), template)
+
+
+def match_pyramid(
+    image: np.ndarray, templates: List[np.ndarray], region: Optional[Tuple]
+) -> None:
+    """Same as match_after with the coarse-to-fine pyramid matcher enabled"""
+    previous = vision.PYRAMID_MATCHING
+    vision.PYRAMID_MATCHING = True
+    try:
+        match_after(image, templates, region)
+    finally:
+        vision.PYRAMID_MATCHING = previous
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Per-match cost of phone template matching before and after "
+        "sharing one resized screen per capture, and with the pyramid matcher"
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=50, help="Number of captures per case"
+    )
+    parser.add_argument(
+        "--screenshot",
+        type=str,
+        default=None,
+        help="720x1280 phone screenshot to match against (default: synthetic)",
+    )
+    args = parser.parse_args()
+
+    cases = [
+        ("training icons, full frame", TRAINING_ICONS, None),
+        ("support icons, support region", SUPPORT_ICONS, SUPPORT_CARD_ICON_REGION_PHONE),
+    ]
+    all_templates = [
+        load_template(path) for path in TRAINING_ICONS + SUPPORT_ICONS + BUTTONS
+    ]
+    if any(template is None for template in all_templates):
+        print("[ERROR] Run from the project root so assets/ can be found")
+        sys.exit(1)
+
+    if args.screenshot:
+        image = cv2.imread(args.screenshot, cv2.IMREAD_COLOR)
+        if image is None:
+            print(f"[ERROR] Could not read {args.screenshot}")
+            sys.exit(1)
+    else:
+        image = synthetic_frame(all_templates)
+
+    for label, paths, region in cases:
+        templates = [load_template(path) for path in paths]
+        before = time_call(lambda: match_before(image, templates, region), args.iterations)
+        after = time_call(lambda: match_after(image, templates, region), args.iterations)
+        print(f"\n{label} ({len(templates)} templates per capture):")
+        print(f"  Resize per match:   {before / len(templates) * 1000:.2f} ms per match")
+        print(
+            f"  Resize per capture: {after / len(templates) * 1000:.2f} ms per match "
+            f"({before / after:.1f}x)"
+        )
+
+    templates = [load_template(path) for path in BUTTONS]
+    full = time_call(lambda: match_after(image, templates, None), args.iterations)
+    pyramid = time_call(lambda: match_pyramid(image, templates, None), args.iterations)
+    print(f"\nbuttons, full frame ({len(templates)} templates per capture):")
+    print(f"  Full resolution: {full / len(templates) * 1000:.2f} ms per match")
+    print(
+        f"  Pyramid:         {pyramid / len(templates) * 1000:.2f} ms per match "
+        f"({full / pyramid:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import argparse
+import os
+import sys
+import time
+from typing import Callable, List, Tuple
+
+import cv2
+import numpy as np
+
+# Ensure project root is on sys.path for "utils" imports when run directly
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from core.recognizer import deduplicate_boxes  # noqa: E402
+from utils.boxes import find_peaks  # noqa: E402
+from utils.image_recognition import non_maximum_suppression  # noqa: E402
+
+
+def time_call(fn: Callable, iterations: int) -> float:
+    """Return the average seconds per call of fn over the given iterations"""
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def synthetic_scores(
+    width: int, height: int, peaks: int, seed: int = 0
+) -> np.ndarray:
+    """Smooth TM_CCOEFF_NORMED-like score map with broad peaks near 1.0"""
+    rng = np.random.default_rng(seed)
+    scores = rng.normal(0.3, 0.1, size=(height, width)).astype(np.float32)
+    scores = cv2.GaussianBlur(scores, (0, 0), 3)
+    for _ in range(peaks):
+        x, y = rng.integers(0, width), rng.integers(0, height)
+        cv2.circle(scores, (int(x), int(y)), 12, float(rng.uniform(0.7, 1.0)), -1)
+    return cv2.GaussianBlur(scores, (0, 0), 4)
+
+
+def nms_before(matches: List[dict], overlap_threshold: float = 0.3) -> List[dict]:
+    """Previous pure-Python non_maximum_suppression"""
+    matches = sorted(matches, key=lambda x: x["confidence"], reverse=True)
+
+    def calculate_iou(box1, box2):
+        x1, y1, w1, h1 = box1
+        x2, y2, w2, h2 = box2
+        x_left = max(x1, x2)
+        y_top = max(y1, y2)
+        x_right = min(x1 + w1, x2 + w2)
+        y_bottom = min(y1 + h1, y2 + h2)
+        if x_right < x_left or y_bottom < y_top:
+            return 0.0
+        intersection = (x_right - x_left) * (y_bottom - y_top)
+        union = w1 * h1 + w2 * h2 - intersection
+        return intersection / union if union > 0 else 0.0
+
+    kept_matches = []
+    for match in matches:
+        if all(
+            calculate_iou(match["location"], kept["location"]) <= overlap_threshold
+            for kept in kept_matches
+        ):
+            kept_matches.append(match)
+    return kept_matches
+
+
+def dedupe_before(boxes: List[Tuple], min_dist: int = 5) -> List[Tuple]:
+    """Previous pure-Python deduplicate_boxes"""
+    filtered = []
+    for x, y, w, h in boxes:
+        cx, cy = x + w // 2, y + h // 2
+        if all(
+            abs(cx - (fx + fw // 2)) > min_dist or abs(cy - (fy + fh // 2)) > min_dist
+            for fx, fy, fw, fh in filtered
+        ):
+            filtered.append((x, y, w, h))
+    return filtered
+
+
+def threshold_candidates(scores: np.ndarray, threshold: float, size: Tuple) -> List:
+    """Previous match_template: one box per pixel above threshold, deduplicated"""
+    w, h = size
+    ys, xs = np.where(scores >= threshold)
+    return dedupe_before([(x, y, w, h) for x, y in zip(xs, ys)])
+
+
+def peak_candidates(scores: np.ndarray, threshold: float, size: Tuple) -> List:
+    """Current match_template: one box per score peak, deduplicated"""
+    w, h = size
+    xs, ys, _ = find_peaks(scores, threshold, size)
+    return deduplicate_boxes(
+        np.column_stack((xs, ys, np.full_like(xs, w), np.full_like(xs, h)))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pure-Python against vectorized NMS and box deduplication, "
+        "and thresholding against peak finding, on dense synthetic score maps"
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=5, help="Number of runs per case"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.65, help="Score threshold (default: 0.65)"
+    )
+    args = parser.parse_args()
+
+    template_size = (40, 40)
+    for label, shape, peaks in [
+        ("support region", (380, 600), 6),
+        ("full phone screen", (460, 820), 40),
+    ]:
+        scores = synthetic_scores(shape[1], shape[0], peaks)
+        ys, xs = np.nonzero(scores >= args.threshold)
+        w, h = template_size
+        boxes = [(int(x), int(y), w, h) for x, y in zip(xs, ys)]
+        matches = [
+            {
+                "confidence": float(scores[y, x]),
+                "center": (x + w // 2, y + h // 2),
+                "location": (x, y, w, h),
+            }
+            for x, y, w, h in boxes
+        ]
+
+        if dedupe_before(boxes) != deduplicate_boxes(boxes):
+            print(f"[ERROR] deduplicate_boxes differs on {label}")
+            sys.exit(1)
+        if nms_before(matches) != non_maximum_suppression(matches):
+            print(f"[ERROR] non_maximum_suppression differs on {label}")
+            sys.exit(1)
+
+        print(f"\n{label}: {len(boxes)} candidates above {args.threshold}")
+        for name, before, after, data in [
+            ("deduplicate_boxes", dedupe_before, deduplicate_boxes, boxes),
+            ("non_maximum_suppression", nms_before, non_maximum_suppression, matches),
+        ]:
+            old = time_call(lambda: before(data), args.iterations)
+            new = time_call(lambda: after(data), args.iterations)
+            print(
+                f"  {name:<24} {old * 1000:9.2f} ms -> {new * 1000:7.2f} ms "
+                f"({old / new:.0f}x), {len(after(data))} kept"
+            )
+
+        old = time_call(
+            lambda: threshold_candidates(scores, args.threshold, template_size),
+            args.iterations,
+        )
+        new = time_call(
+            lambda: peak_candidates(scores, args.threshold, template_size),
+            args.iterations,
+        )
+        count = len(find_peaks(scores, args.threshold, template_size)[0])
+        print(
+            f"  {'peaks instead of pixels':<24} {old * 1000:9.2f} ms -> "
+            f"{new * 1000:7.2f} ms ({old / new:.0f}x), {count} candidates, "
+            f"{len(peak_candidates(scores, args.threshold, template_size))} kept"
+        )
+
+
+if __name__ == "__main__":
+    main()
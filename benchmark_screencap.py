@@ -0,0 +1,141 @@
+import argparse
+import os
+import sys
+import time
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Ensure project root is on sys.path for "utils" imports when run directly
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from utils.adb_utils import (  # noqa: E402
+    ADBController,
+    RAW_PIXEL_FORMATS,
+    parse_raw_screencap,
+)
+from utils.buffer_pool import allocation_stats  # noqa: E402
+from utils.frame import Frame  # noqa: E402
+
+# Stat strip used by stat_state on phone (x, y, w, h)
+STAT_REGION = (73, 858, 65, 22)
+
+
+def parse_region(region_str: Optional[str]) -> Optional[Tuple[int, int, int, int]]:
+    if not region_str:
+        return None
+    parts = [p.strip() for p in region_str.split(",")]
+    if len(parts) != 4:
+        raise ValueError("Region must be in the form 'x,y,w,h'")
+    x, y, w, h = map(int, parts)
+    return x, y, w, h
+
+
+def time_call(fn: Callable, iterations: int) -> float:
+    """Return the average seconds per call of fn over the given iterations"""
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def synthetic_payloads(width: int = 720, height: int = 1280) -> Tuple[bytes, bytes]:
+    """Build a PNG and a raw screencap payload of the same game-like frame"""
+    rng = np.random.default_rng(0)
+    # Flat UI panels with some noise so PNG compression is realistic
+    frame = np.zeros((height, width, 4), dtype=np.uint8)
+    for top in range(0, height, 80):
+        frame[top : top + 80] = rng.integers(0, 255, size=4, dtype=np.uint8)
+    frame[..., :3] += rng.integers(0, 8, size=(height, width, 3), dtype=np.uint8)
+    frame[..., 3] = 255
+
+    ok, png = cv2.imencode(".png", cv2.cvtColor(frame, cv2.COLOR_RGBA2BGR))
+    if not ok:
+        raise RuntimeError("Could not encode synthetic PNG")
+
+    header = np.array([width, height, 1, 0], dtype="<u4").tobytes()
+    return png.tobytes(), header + frame.tobytes()
+
+
+def decode_png(data: bytes, region=None) -> np.ndarray:
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if region:
+        x, y, w, h = region
+        img = img[y : y + h, x : x + w]
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+
+def decode_raw(data: bytes, region=None) -> np.ndarray:
+    pixels, pixel_format = parse_raw_screencap(data)
+    return Frame(pixels, RAW_PIXEL_FORMATS[pixel_format]).roi(region).rgb
+
+
+def run_offline(iterations: int, region) -> None:
+    """Compare decode cost only, without a device"""
+    png, raw = synthetic_payloads()
+    print(f"Payload size: PNG {len(png) / 1024:.0f} KiB, raw {len(raw) / 1024:.0f} KiB")
+
+    for label, crop in (("full frame", None), (f"region {region}", region)):
+        png_time = time_call(lambda: decode_png(png, crop), iterations)
+        raw_time = time_call(lambda: decode_raw(raw, crop), iterations)
+        print(f"\n{label}:")
+        print(f"  PNG decode: {png_time * 1000:.2f} ms")
+        print(f"  Raw parse:  {raw_time * 1000:.2f} ms ({png_time / raw_time:.0f}x)")
+
+
+def run_device(iterations: int, region, host: str, port: int) -> None:
+    """Compare full capture round trips against a connected device"""
+    controller = ADBController(host, port)
+    if not controller.is_connected():
+        print("[ERROR] No ADB device connected")
+        sys.exit(1)
+
+    for label, crop in (("full frame", None), (f"region {region}", region)):
+        print(f"\n{label}:")
+        for mode in ("png", "raw"):
+            controller.screencap_mode = mode
+            allocation_stats.take_turn()
+            elapsed = time_call(lambda: controller.take_screenshot(crop), iterations)
+            allocated = allocation_stats.take_turn()["allocated_bytes"]
+            print(
+                f"  {mode:>3}: {elapsed * 1000:.1f} ms per screenshot, "
+                f"{allocated / (iterations + 1) / 1024:.0f} KiB allocated"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare PNG screencap against the raw framebuffer path"
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=20, help="Number of captures per case"
+    )
+    parser.add_argument(
+        "--region",
+        type=str,
+        default=",".join(map(str, STAT_REGION)),
+        help="Region to crop as 'x,y,w,h'",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Only benchmark decoding on a synthetic frame (no device needed)",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=16384)
+
+    args = parser.parse_args()
+    region = parse_region(args.region)
+
+    if args.offline:
+        run_offline(args.iterations, region)
+    else:
+        run_device(args.iterations, region, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,7 @@ if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
 from utils.image_recognition import locate_center_on_phone, BEST_SCALES  # noqa: E402
+from utils.templates import load_template  # noqa: E402
 
 
 def parse_region(region_str: Optional[str]) -> Optional[Tuple[int, int, int, int]]:
@@ -40,11 +41,10 @@ def get_screenshot_rgb() -> np.ndarray:
 
         controller = get_adb_controller()
         if controller and controller.is_connected():
-            shot = controller.take_screenshot()  # expected RGB numpy array
-            shot = cv2.cvtColor(shot, cv2.COLOR_RGB2BGR)
-            cv2.imwrite("shot.png", shot)
-
-            if shot is not None:
+            frame = controller.take_frame()
+            if frame is not None:
+                shot = frame.bgr
+                cv2.imwrite("shot.png", shot)
                 return shot
     except Exception:
         # Fall through to desktop screenshot
@@ -68,7 +68,7 @@ def compute_opencv_max_confidence(
     - Optionally rescales haystack by `scale` (like phone method)
     """
     try:
-        template_bgr = cv2.imread(template_path, cv2.IMREAD_COLOR)
+        template_bgr = load_template(template_path)
         if template_bgr is None:
             return None
 
@@ -1,11 +1,9 @@
 import os
-import time
 import json
 from datetime import datetime
 
 import pyautogui
 import cv2
-import numpy as np
 
 from core.state import (
     check_support_card,
@@ -24,7 +22,9 @@ from core.logic import (
     MAX_FAILURE,
 )
 from core.recognizer import is_infirmary_active, match_template
-from utils.constants import MOOD_LIST
+from utils.constants import MOOD_LIST, get_regions_for_mode
+from utils import clock
+from utils.buffer_pool import allocation_stats
 from utils.adb_utils import (
     adb_click,
     adb_move_to,
@@ -35,8 +35,21 @@ from utils.adb_utils import (
     check_mumu_resolution,
     get_adb_controller,
 )
-from utils.image_recognition import locate_center_on_screen, locate_on_screen
+from utils.image_recognition import (
+    locate_center_on_screen,
+    locate_many,
+    locate_on_screen,
+)
+from utils.pipeline import get_pipeline
+from utils.screenshot import (
+    frame_snapshot,
+    grab_frame,
+    wait_for_transition,
+)
 from utils.scenario import ura
+from utils.templates import get_template_registry, load_template
+from utils.timing import get_transition_timings
+from utils.vision import location_cache, match_cache
 
 pyautogui.useImageNotFoundException(False)
 
@@ -60,45 +73,85 @@ with open("events.json", "r", encoding="utf-8") as file:
 MINIMUM_MOOD = config["minimum_mood"]
 PRIORITIZE_G1_RACE = config["prioritize_g1_race"]
 USE_PHONE = config.get("usePhone", False)
+LOG_ALLOCATIONS = config.get("logAllocations", False)
+LOG_MATCH_CACHE = config.get("logMatchCache", False)
+LOG_TIMINGS = config.get("logTimings", False)
+USE_PIPELINE = config.get("visionPipeline", False)
 NEW_YEAR_EVENT_DONE = False
 FIRST_TURN_DONE = False
 
 
+# Training icons by stat, logical names from assets/manifest.json
 training_types = {
-    "spd": (
-        "assets/icons/train_spd.png"
-        if not USE_PHONE
-        else "assets/icons/train_spd_phone.png"
-    ),
-    "sta": (
-        "assets/icons/train_sta.png"
-        if not USE_PHONE
-        else "assets/icons/train_sta_phone.png"
-    ),
-    "pwr": (
-        "assets/icons/train_pwr.png"
-        if not USE_PHONE
-        else "assets/icons/train_pwr_phone.png"
-    ),
-    "guts": (
-        "assets/icons/train_guts.png"
-        if not USE_PHONE
-        else "assets/icons/train_guts_phone.png"
-    ),
-    "wit": (
-        "assets/icons/train_wit.png"
-        if not USE_PHONE
-        else "assets/icons/train_wit_phone.png"
-    ),
+    "spd": "train_spd",
+    "sta": "train_sta",
+    "pwr": "train_pwr",
+    "guts": "train_guts",
+    "wit": "train_wit",
 }
 
 
+# Popups probed on the lobby frame while its year and event name are read
+LOBBY_POPUPS = {
+    "inspiration": "inspiration_btn",
+    "next": "next_btn",
+    "cancel": "cancel_btn",
+}
+
+# Seconds to wait for a pipeline frame or result before reading the lobby
+# directly, so a stuck worker process cannot stall the career loop
+PIPELINE_TIMEOUT = 10
+
+# Lobby turns between saves of the learned search timings
+TIMINGS_SAVE_TURNS = 10
+
+
 def get_config():
     return config
 
 
-def click(img, confidence=0.8, minSearch=2, click=1, text=""):
-    btn = locate_center_on_screen(img, confidence=confidence, min_search_time=minSearch)
+def read_lobby():
+    """Read the year and event name, and probe the lobby popups
+
+    With visionPipeline enabled the OCR and the popup probes run at the same
+    time in separate processes, on one frame.
+
+    Returns:
+        (year, event_name, seen) where seen maps each LOBBY_POPUPS name to
+        whether that popup may be on screen
+    """
+    if USE_PIPELINE:
+        try:
+            pipeline = get_pipeline()
+            generation = pipeline.wait_for_fresh_frame(timeout=PIPELINE_TIMEOUT)
+            year = pipeline.read_state("check_current_year", generation)
+            event_name = pipeline.read_state("check_event_name", generation)
+            probes = {
+                name: pipeline.locate_center(template, generation=generation)
+                for name, template in LOBBY_POPUPS.items()
+            }
+            seen = {
+                name: probe.result(timeout=PIPELINE_TIMEOUT) is not None
+                for name, probe in probes.items()
+            }
+            return (
+                year.result(timeout=PIPELINE_TIMEOUT),
+                event_name.result(timeout=PIPELINE_TIMEOUT),
+                seen,
+            )
+        except Exception as e:
+            print(f"[PIPELINE] {type(e).__name__}: {e}, reading the lobby directly")
+
+    with frame_snapshot():
+        year = check_current_year()
+        event_name = check_event_name()
+    return year, event_name, dict.fromkeys(LOBBY_POPUPS, True)
+
+
+def click(img, confidence=None, minSearch=2, click=1, text="", site=None):
+    btn = locate_center_on_screen(
+        img, confidence=confidence, min_search_time=minSearch, site=site
+    )
     if btn:
         if text:
             print(text)
@@ -125,7 +178,7 @@ def click(img, confidence=0.8, minSearch=2, click=1, text=""):
                 adb_move_to(btn.x, btn.y, duration=0.175)
                 adb_click(btn.x, btn.y)
                 if i < click - 1:  # Add interval between multiple clicks
-                    time.sleep(0.1)
+                    clock.sleep(0.1)
         else:
             # Use regular pyautogui
             pyautogui.moveTo(btn, duration=0.175)
@@ -136,12 +189,14 @@ def click(img, confidence=0.8, minSearch=2, click=1, text=""):
     return False
 
 
-def click_event_choice(choice_number, minSearch=0.2, confidence=0.8):
+def click_event_choice(
+    choice_number, minSearch=0.2, confidence=None, site="event.choice"
+):
     """Special function for clicking event choices with higher confidence to avoid confusion"""
-    img_path = f"assets/icons/event_choice_1.png"
-    # Use higher confidence for event choices to avoid confusion between similar images
+    # The manifest sets a higher confidence for event choices to avoid
+    # confusion between similar images
     btn = locate_center_on_screen(
-        img_path, confidence=confidence, min_search_time=minSearch
+        "event_choice", confidence=confidence, min_search_time=minSearch, site=site
     )
     if btn:
         print(
@@ -169,32 +224,25 @@ def click_event_choice(choice_number, minSearch=0.2, confidence=0.8):
 
 
 def go_to_training():
-    return click(
-        "assets/buttons/training_btn.png", confidence=0.8 if not USE_PHONE else 0.7
-    )
+    return click("training_btn")
 
 
-def click_guts_button():
-    """Dedicated function to click the guts training button with fallback templates"""
-    btn = locate_center_on_screen(
-        training_types["guts"], confidence=0.8 if not USE_PHONE else 0.65
-    )
+def click_guts_button(btn=None):
+    """Dedicated function to click the guts training button with fallback templates
 
-    # Try alternative templates if not found
-    if not btn:
-        alt_2 = training_types["guts"].replace(".png", "_2.png")
-        alt_3 = training_types["guts"].replace(".png", "_3.png")
-        btn = locate_center_on_screen(
-            alt_2, confidence=0.8 if not USE_PHONE else 0.65
-        ) or locate_center_on_screen(alt_3, confidence=0.8 if not USE_PHONE else 0.65)
+    `btn` is the button position when the caller already located it.
+    """
+    if btn is None:
+        # Fallback templates come from the manifest variants
+        btn = locate_center_on_screen(training_types["guts"])
 
     if btn:
         if USE_PHONE:
             adb_move_to(btn.x, btn.y, duration=0.175)
-            time.sleep(0.2)
+            clock.sleep(0.2)
         else:
             pyautogui.moveTo(btn, duration=0.175)
-            time.sleep(0.2)
+            clock.sleep(0.2)
         return True
     else:
         print("[INFO] Guts training icon not found; continuing without pre-move.")
@@ -205,27 +253,15 @@ def check_training():
     results = {}
     last_mouse_pos = None
 
-    ### move to guts training first
-    click_guts_button()
-
-    for key, icon_path in training_types.items():
-        pos = locate_center_on_screen(
-            icon_path, confidence=0.8 if not USE_PHONE else 0.65
-        )
+    # Every training icon, with its second and third options (the manifest
+    # variants), is searched in the same screenshot
+    positions = locate_many(training_types.values(), min_search_time=0.2)
 
-        # Check for second icon option if first one is not found
-        if not pos:
-            pos = locate_center_on_screen(
-                icon_path.replace(".png", "_2.png"),
-                confidence=0.8 if not USE_PHONE else 0.65,
-            )
+    ### move to guts training first
+    click_guts_button(positions[training_types["guts"]])
 
-        # Check for third icon option if second one is not found
-        if not pos:
-            pos = locate_center_on_screen(
-                icon_path.replace(".png", "_3.png"),
-                confidence=0.8 if not USE_PHONE else 0.65,
-            )
+    for key, icon in training_types.items():
+        pos = positions[icon]
 
         if pos:
             if USE_PHONE:
@@ -235,16 +271,20 @@ def check_training():
                 pyautogui.moveTo(pos, duration=0.1)
                 pyautogui.mouseDown()
 
-            support_counts = check_support_card()
+            # Let the pressed training's panel settle, then read its support
+            # icons and failure chance from the same frame
+            clock.sleep(0.2)
+            with frame_snapshot():
+                support_counts = check_support_card()
+                failure_chance = check_failure()
             total_support = sum(support_counts.values())
-            failure_chance = check_failure()
             results[key] = {
                 "support": support_counts,
                 "total_support": total_support,
                 "failure": failure_chance,
             }
             print(f"[{key.upper()}] → {support_counts}, Fail: {failure_chance}%")
-            time.sleep(0.1)
+            clock.sleep(0.1)
 
     if USE_PHONE:
         # For ADB, release the mouse at the last position where it was pressed
@@ -256,24 +296,15 @@ def check_training():
     else:
         pyautogui.mouseUp()
 
-    click(img="assets/buttons/back_btn.png")
+    click(img="back_btn")
     return results
 
 
 def do_train(train):
-    if USE_PHONE:
-        train_btn = locate_center_on_screen(
-            f"assets/icons/train_{train}_phone.png", confidence=0.7
-        )
-
-        if not train_btn:
-            train_btn = locate_center_on_screen(
-                f"assets/icons/train_{train}_phone_2.png", confidence=0.7
-            )
-    else:
-        train_btn = locate_center_on_screen(
-            f"assets/icons/train_{train}.png", confidence=0.8
-        )
+    # Stricter than check_training, a wrong match here trains the wrong stat
+    train_btn = locate_center_on_screen(
+        training_types[train], confidence=0.8 if not USE_PHONE else 0.7
+    )
 
     print(f"[INFO] Training button found: {train_btn}")
     if train_btn:
@@ -281,7 +312,7 @@ def do_train(train):
             print(f"[INFO] Moving to {train} found at {train_btn}")
             adb_move_to(train_btn.x, train_btn.y, duration=0.15)
             adb_click(train_btn.x, train_btn.y)
-            time.sleep(0.1)
+            clock.sleep(0.1)
             adb_click(train_btn.x, train_btn.y)
         else:
             pyautogui.moveTo(train_btn, duration=0.15)
@@ -289,10 +320,8 @@ def do_train(train):
 
 
 def do_rest():
-    rest_btn = locate_center_on_screen("assets/buttons/rest_btn.png", confidence=0.8)
-    rest_summber_btn = locate_center_on_screen(
-        "assets/buttons/rest_summer_btn.png", confidence=0.6
-    )
+    rest_btn = locate_center_on_screen("rest_btn")
+    rest_summber_btn = locate_center_on_screen("rest_summer_btn")
 
     if rest_btn:
         if USE_PHONE:
@@ -311,12 +340,8 @@ def do_rest():
 
 
 def do_recreation():
-    recreation_btn = locate_center_on_screen(
-        "assets/buttons/recreation_btn.png", confidence=0.8 if not USE_PHONE else 0.7
-    )
-    recreation_summer_btn = locate_center_on_screen(
-        "assets/buttons/rest_summer_btn.png", confidence=0.8 if not USE_PHONE else 0.7
-    )
+    recreation_btn = locate_center_on_screen("recreation_btn")
+    recreation_summer_btn = locate_center_on_screen("recreation_summer_btn")
 
     if recreation_btn:
         if USE_PHONE:
@@ -336,23 +361,25 @@ def do_recreation():
 
 def do_race(prioritize_g1=False):
     click(
-        img="assets/buttons/races_btn.png",
+        img="races_btn",
         minSearch=10,
-        confidence=0.8 if not USE_PHONE else 0.7,
+        site="race.races_btn",
     )
     click(
-        img="assets/buttons/ok_btn.png",
+        img="ok_btn",
         minSearch=0.7,
-        confidence=0.8 if not USE_PHONE else 0.7,
+        site="race.ok",
     )
 
-    found = race_select(prioritize_g1=prioritize_g1)
-    if not found:
+    before = race_select(prioritize_g1=prioritize_g1)
+    if before is None:
         print("[INFO] No race found.")
         return False
 
-    race_prep()
-    time.sleep(1)
+    before = race_prep(before)
+    wait_for_transition(
+        before, get_regions_for_mode()["RACE_BUTTONS_REGION"], timeout=1
+    )
     after_race()
     return True
 
@@ -368,20 +395,25 @@ def race_day():
         check_skill_points_cap()
 
     click(
-        img="assets/buttons/race_day_btn.png",
+        img="race_day_btn",
         minSearch=10,
-        confidence=0.8 if not USE_PHONE else 0.65,
+        site="race_day.race_day_btn",
     )
 
-    click(img="assets/buttons/ok_btn.png", minSearch=0.7)
-    time.sleep(0.5)
+    click(img="ok_btn", confidence=0.8, minSearch=0.7, site="race_day.ok")
+    clock.sleep(0.5)
 
+    before = grab_frame(None)
     for i in range(2):
-        click(img="assets/buttons/race_btn.png", minSearch=2)
-        time.sleep(0.5)
-
-    race_prep()
-    time.sleep(1)
+        frame = grab_frame(None)
+        if click(img="race_btn", minSearch=2, site="race_day.race_btn"):
+            before = frame
+        clock.sleep(0.5)
+
+    before = race_prep(before)
+    wait_for_transition(
+        before, get_regions_for_mode()["RACE_BUTTONS_REGION"], timeout=1
+    )
     after_race()
 
 
@@ -404,7 +436,7 @@ def save_debug_region_image(
         cv2.imwrite(region_path, region_screenshot)
 
         # Save the template
-        template = cv2.imread(template_path, cv2.IMREAD_COLOR)
+        template = load_template(template_path)
         if template is not None:
             template_path_debug = os.path.join(
                 debug_dir, f"debug_template_{timestamp}.png"
@@ -456,26 +488,30 @@ def get_screenshot_for_debug():
 
             controller = get_adb_controller()
             if controller and controller.is_connected():
-                screenshot = controller.take_screenshot()
-                if screenshot is not None:
-                    return cv2.cvtColor(screenshot, cv2.COLOR_RGB2BGR)
+                frame = controller.take_frame()
+                if frame is not None:
+                    return frame.bgr
         else:
-            # For desktop, we'll need to take a screenshot
-            screenshot = pyautogui.screenshot()
-            return cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+            # For desktop, grab through the shared mss session
+            return grab_frame().bgr
     except Exception as e:
         print(f"[DEBUG] Failed to get screenshot: {e}")
         return None
 
 
 def race_select(prioritize_g1=False):
+    """Pick a race from the list and press the race buttons
 
-    time.sleep(0.2)
+    Returns:
+        The capture taken before the last race button press, for race_prep
+        to wait on, or None if no race was found
+    """
+    clock.sleep(0.2)
 
     if prioritize_g1:
         print("[INFO] Looking for G1 race.")
         for i in range(2):
-            race_card = match_template("assets/ui/g1_race.png", threshold=0.85)
+            race_card = match_template("g1_race")
             print(f"[INFO] Race card found: {race_card}")
             if race_card:
                 for x, y, w, h in race_card:
@@ -485,10 +521,11 @@ def race_select(prioritize_g1=False):
                     # debug_screenshot = get_screenshot_for_debug()
 
                     match_aptitude = locate_center_on_screen(
-                        "assets/ui/match_track.png",
+                        "match_track",
                         confidence=0.7,
                         min_search_time=0.7,
                         region=region,
+                        site="race_select.match_track_g1",
                     )
 
                     # Debug: Save images with region information
@@ -505,21 +542,23 @@ def race_select(prioritize_g1=False):
                         else:
                             pyautogui.moveTo(match_aptitude, duration=0.2)
                             pyautogui.click()
+                        before = grab_frame(None)
                         for i in range(2):
                             race_btn = locate_center_on_screen(
-                                "assets/buttons/race_btn.png",
-                                confidence=0.8,
+                                "race_btn",
                                 min_search_time=2,
+                                site="race_select.race_btn",
                             )
                             if race_btn:
+                                before = grab_frame(None)
                                 if USE_PHONE:
                                     adb_move_to(race_btn.x, race_btn.y, duration=0.2)
                                     adb_click(race_btn.x, race_btn.y)
                                 else:
                                     pyautogui.moveTo(race_btn, duration=0.2)
                                     pyautogui.click(race_btn)
-                                time.sleep(0.5)
-                        return True
+                                clock.sleep(0.5)
+                        return before
 
             for i in range(4):
                 if USE_PHONE:
@@ -527,7 +566,7 @@ def race_select(prioritize_g1=False):
                 else:
                     pyautogui.scroll(-300)
 
-        return False
+        return None
     else:
         print("[INFO] Looking for race.")
         for i in range(4):
@@ -535,7 +574,9 @@ def race_select(prioritize_g1=False):
             # debug_screenshot = get_screenshot_for_debug()
 
             match_aptitude = locate_center_on_screen(
-                "assets/ui/match_track.png", confidence=0.8, min_search_time=0.7
+                "match_track",
+                min_search_time=0.7,
+                site="race_select.match_track",
             )
 
             # Debug: Save images without region (full screen search)
@@ -554,19 +595,23 @@ def race_select(prioritize_g1=False):
                     pyautogui.moveTo(match_aptitude, duration=0.2)
                     pyautogui.click(match_aptitude)
 
+                before = grab_frame(None)
                 for i in range(2):
                     race_btn = locate_center_on_screen(
-                        "assets/buttons/race_btn.png", confidence=0.8, min_search_time=2
+                        "race_btn",
+                        min_search_time=2,
+                        site="race_select.race_btn",
                     )
                     if race_btn:
+                        before = grab_frame(None)
                         if USE_PHONE:
                             adb_move_to(race_btn.x, race_btn.y, duration=0.2)
                             adb_click(race_btn.x, race_btn.y)
                         else:
                             pyautogui.moveTo(race_btn, duration=0.2)
                             pyautogui.click(race_btn)
-                        time.sleep(0.5)
-                return True
+                        clock.sleep(0.5)
+                return before
 
             for i in range(4):
                 if USE_PHONE:
@@ -574,58 +619,93 @@ def race_select(prioritize_g1=False):
                 else:
                     pyautogui.scroll(-300)
 
-        return False
+        return None
 
 
-def race_prep():
-    time.sleep(3.5)
-    print(f"[INFO] Finding view results button at time: {time.time()}")
+def race_prep(before):
+    """View the race results and skip through them
+
+    Args:
+        before: Capture taken before the tap that opened the race start screen
+
+    Returns:
+        The capture taken before the last skip tap, for waiting on the
+        result screen
+    """
+    region = get_regions_for_mode()["RACE_BUTTONS_REGION"]
+    # Wait for the view results button area to change and settle, at most as
+    # long as the old fixed delay
+    wait_for_transition(before, region, timeout=3.5)
+    print(f"[INFO] Finding view results button at time: {clock.now()}")
     view_result_btn = locate_center_on_screen(
-        "assets/buttons/view_results.png",
-        confidence=0.8 if not USE_PHONE else 0.6,
+        "view_results",
         min_search_time=12,
+        site="race.view_results",
     )
-    print(f"[INFO] View result button found at time: {time.time()}")
+    print(f"[INFO] View result button found at time: {clock.now()}")
 
     if view_result_btn:
+        before = grab_frame(None)
         if USE_PHONE:
             adb_click(view_result_btn.x, view_result_btn.y)
         else:
             pyautogui.click(view_result_btn)
 
-        time.sleep(1.5)
+        wait_for_transition(before, region, timeout=1.5)
 
         for i in range(2):
+            before = grab_frame(None)
             if USE_PHONE:
                 # For ADB, we'll do 3 separate clicks instead of tripleClick
                 for j in range(3):
                     adb_click(360, 640)  # Click center of screen
-                    time.sleep(0.1)
+                    clock.sleep(0.1)
             else:
                 pyautogui.tripleClick(interval=0.3)
-            time.sleep(1.5)
+            wait_for_transition(before, region, timeout=1.5)
+    return before
 
 
 def after_race():
-    print(f"[INFO] Finding after race first next button at time: {time.time()}")
-    click(img="assets/buttons/next_btn.png", minSearch=2)
-    print(f"[INFO] Finding after race first next button at time: {time.time()}")
-    time.sleep(2)  # Raise a bit
+    print(f"[INFO] Finding after race first next button at time: {clock.now()}")
+    before = grab_frame(None)
+    click(img="next_btn", confidence=0.8, minSearch=2, site="after_race.next")
+    print(f"[INFO] Finding after race first next button at time: {clock.now()}")
+    wait_for_transition(before, timeout=2)  # Raise a bit
     # pyautogui.click()
-    print(f"[INFO] Finding after race second next button at time: {time.time()}")
-    click(img="assets/buttons/next2_btn.png", minSearch=3)
-    print(f"[INFO] Finding after race second next button at time: {time.time()}")
+    print(f"[INFO] Finding after race second next button at time: {clock.now()}")
+    click(img="next2_btn", minSearch=3, site="after_race.next2")
+    print(f"[INFO] Finding after race second next button at time: {clock.now()}")
 
 
 def career_lobby():
     global FIRST_TURN_DONE
     global NEW_YEAR_EVENT_DONE
 
+    # Decode every template once before the first turn
+    templates = get_template_registry()
+    turns = 0
+
     # Program start
     while True:
-
-        year = check_current_year()
-        event_name = check_event_name()
+        # Pick up template images edited while the bot runs
+        templates.reload_changed()
+        if LOG_ALLOCATIONS:
+            # Image buffers allocated while handling the previous turn
+            print(allocation_stats.turn_summary())
+        if LOG_MATCH_CACHE:
+            print(match_cache.summary())
+            print(location_cache.summary())
+        # Keep learned search timings even if the bot is killed mid-career
+        timings = get_transition_timings()
+        if turns % TIMINGS_SAVE_TURNS == 0:
+            timings.save()
+        turns += 1
+        if LOG_TIMINGS:
+            print(timings.waste_report())
+            print(clock.get_clock().sleep_report())
+
+        year, event_name, seen = read_lobby()
 
         print(f"[INFO] Event Name: {event_name}")
 
@@ -634,12 +714,12 @@ def career_lobby():
             year == "Classic Year Early Jan" and not NEW_YEAR_EVENT_DONE
         ):  # 2nd New Year Event for energy
             print("[ACTION] Checking for 2nd New Year Event for energy")
-            if click_event_choice(2, minSearch=1, confidence=0.9):
+            if click_event_choice(2, minSearch=1):
                 print("[ACTION] Clicking choice 2 for 2nd New Year Event for energy")
                 NEW_YEAR_EVENT_DONE = True
                 continue
             else:
-                if click_event_choice(1, minSearch=0.2, confidence=0.9):
+                if click_event_choice(1, minSearch=0.2):
                     print(
                         "[ACTION] Cannot find 2nd New Year Event for energy, clicking choice 1"
                     )
@@ -651,15 +731,13 @@ def career_lobby():
                     print(
                         f"[ACTION] {predefine_event_name} event found, clicking choice {predefine_event_data['choice']}"
                     )
-                    if click_event_choice(
-                        predefine_event_data["choice"], minSearch=0.1, confidence=0.9
-                    ):
+                    if click_event_choice(predefine_event_data["choice"], minSearch=0.1):
                         print(
                             f"[ACTION] Clicked choice {predefine_event_data['choice']}"
                         )
                         continue
 
-            if click_event_choice(1, minSearch=0.1, confidence=0.9):
+            if click_event_choice(1, minSearch=0.1):
                 print("[ACTION] Clicked choice 1")
                 continue
 
@@ -714,7 +792,7 @@ def career_lobby():
             #     if click_event_choice(4, minSearch=0.1, confidence=0.9):
             #         print("[ACTION] Clicked choice 4")
 
-            #     time.sleep(0.5)
+            #     clock.sleep(0.5)
             #     if click_event_choice(1, minSearch=0.1, confidence=0.9):
             #         print("[ACTION] Clicked choice 1")
             #         continue
@@ -724,46 +802,48 @@ def career_lobby():
             #         continue
 
         ### Second check, inspiration
-        if click(
-            img="assets/buttons/inspiration_btn.png",
+        if seen["inspiration"] and click(
+            img="inspiration_btn",
             minSearch=0.2,
             text="[INFO] Inspiration found.",
-            confidence=0.65,
+            site="lobby.inspiration",
         ):
             continue
 
         ### Third check, next button
-        if click(
-            img="assets/buttons/next_btn.png",
+        if seen["next"] and click(
+            img="next_btn",
             minSearch=0.2,
-            confidence=0.8 if not USE_PHONE else 0.7,
+            site="lobby.next",
         ):
             continue
 
         ### Fourth check, cancel button
-        if click(
-            img="assets/buttons/cancel_btn.png",
+        if seen["cancel"] and click(
+            img="cancel_btn",
             minSearch=0.2,
-            confidence=0.8 if not USE_PHONE else 0.7,
+            site="lobby.cancel",
         ):
             continue
 
         ### Check if current menu is in career lobby
         tazuna_hint = locate_center_on_screen(
-            "assets/ui/tazuna_hint.png", confidence=0.8, min_search_time=0.2
+            "tazuna_hint",
+            min_search_time=0.2,
+            site="lobby.tazuna_hint",
         )
 
         if tazuna_hint is None:
             print("[INFO] Should be in career lobby.")
             continue
 
-        time.sleep(0.5)
+        clock.sleep(0.5)
 
         ### Check if there is debuff status
         debuffed = locate_on_screen(
-            "assets/buttons/infirmary_btn2.png",
-            confidence=0.8 if not USE_PHONE else 0.7,
+            "infirmary_btn",
             min_search_time=1,
+            site="lobby.infirmary",
         )
         if debuffed:
             if is_infirmary_active(
@@ -776,11 +856,12 @@ def career_lobby():
                 print("[INFO] Character has debuff, go to infirmary instead.")
                 continue
 
-        mood = check_mood()
+        with frame_snapshot():
+            mood = check_mood()
+            criteria = check_criteria()
+            turn = check_turn()
         mood_index = MOOD_LIST.index(mood)
         minimum_mood = MOOD_LIST.index(MINIMUM_MOOD)
-        criteria = check_criteria()
-        turn = check_turn()
 
         print(
             "\n=======================================================================================\n"
@@ -794,12 +875,19 @@ def career_lobby():
         if year == "Finale Season" and turn == "Race Day":
             print("[INFO] URA Finale")
             ura()
+            before = grab_frame(None)
             for i in range(2):
-                if click(img="assets/buttons/race_btn.png", minSearch=2):
-                    time.sleep(0.5)
-
-            race_prep()
-            time.sleep(1)
+                frame = grab_frame(None)
+                if click(
+                    img="race_btn", minSearch=2, site="lobby.race_btn"
+                ):
+                    before = frame
+                    clock.sleep(0.5)
+
+            before = race_prep(before)
+            wait_for_transition(
+                before, get_regions_for_mode()["RACE_BUTTONS_REGION"], timeout=1
+            )
             after_race()
             continue
 
@@ -836,10 +924,10 @@ def career_lobby():
                 else:
                     # If there is no race matching to aptitude, go back and do training instead
                     click(
-                        img="assets/buttons/back_btn.png",
+                        img="back_btn",
                         text="[INFO] Race not found. Proceeding to training.",
                     )
-                    time.sleep(0.5)
+                    clock.sleep(0.5)
 
         year_parts = year.split(" ")
         # If Prioritize G1 Race is true, check G1 race every turn
@@ -855,10 +943,10 @@ def career_lobby():
             else:
                 # If there is no G1 race, go back and do training
                 click(
-                    img="assets/buttons/back_btn.png",
+                    img="back_btn",
                     text="[INFO] G1 race not found. Proceeding to training.",
                 )
-                time.sleep(0.5)
+                clock.sleep(0.5)
 
         # Check training button
         if not go_to_training():
@@ -866,10 +954,14 @@ def career_lobby():
             continue
 
         # Last, do training
-        time.sleep(1)
+        clock.sleep(1)
         results_training = check_training()
 
         best_training = do_something(results_training)
+
+        # Screen before this turn's action, to wait for its transition at the
+        # end; the game window, like the captures wait_for_transition takes
+        before_action = grab_frame(None)
         if best_training == "PRIORITIZE_RACE":
             print("[INFO] Prioritizing race due to insufficient support cards.")
 
@@ -896,15 +988,15 @@ def career_lobby():
                 # If no race found, go back to training logic
                 print("[INFO] No race found. Returning to training logic.")
                 click(
-                    img="assets/buttons/back_btn.png",
+                    img="back_btn",
                     text="[INFO] Race not found. Proceeding to training.",
                 )
-                time.sleep(0.5)
+                clock.sleep(0.5)
                 # Re-evaluate training without race prioritization
                 best_training = do_something_fallback(results_training)
                 if best_training:
                     go_to_training()
-                    time.sleep(0.5)
+                    clock.sleep(0.5)
 
                     ### move to guts first if it is wits training
                     if best_training == "wit":
@@ -919,7 +1011,7 @@ def career_lobby():
             continue
         elif best_training:
             go_to_training()
-            time.sleep(0.5)
+            clock.sleep(0.5)
 
             ### move to guts first if it is wits training
             if best_training == "wit":
@@ -929,4 +1021,4 @@ def career_lobby():
             do_train(best_training)
         else:
             do_rest()
-        time.sleep(1)
+        wait_for_transition(before_action, timeout=1)
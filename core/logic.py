@@ -1,7 +1,8 @@
 import json
-import time
 
 from core.state import check_current_year, stat_state
+from utils.screenshot import frame_snapshot
+from utils import clock
 
 with open("config.json", "r", encoding="utf-8") as file:
     config = json.load(file)
@@ -144,8 +145,9 @@ def filter_by_stat_caps(results, current_stats):
 
 # Decide training (with race prioritization)
 def do_something(results):
-    year = check_current_year()
-    current_stats = stat_state()
+    with frame_snapshot():
+        year = check_current_year()
+        current_stats = stat_state()
     print(f"Current stats: {current_stats}")
 
     if results:
@@ -153,7 +155,7 @@ def do_something(results):
     else:
         # If results is empty, check training again and retry
         print("[INFO] No training results found. Checking training again...")
-        time.sleep(1)
+        clock.sleep(1)
         from core.execute import check_training, go_to_training
 
         # Check training button
@@ -193,8 +195,9 @@ def do_something(results):
 
 # Decide training (without race prioritization - fallback)
 def do_something_fallback(results):
-    year = check_current_year()
-    current_stats = stat_state()
+    with frame_snapshot():
+        year = check_current_year()
+        current_stats = stat_state()
     print(f"Current stats: {current_stats}")
 
     if results:
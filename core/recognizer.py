@@ -1,134 +1,153 @@
 import json
 
-import cv2
 import numpy as np
-from PIL import ImageGrab, ImageStat
-
-from utils.screenshot import capture_region
-from utils.adb_utils import get_adb_controller
-
-
-def match_template(template_path, region=None, threshold=0.85, debug=False):
-    # Check if usePhone is enabled
-    try:
-        with open("config.json", "r", encoding="utf-8") as file:
-            config = json.load(file)
-    except FileNotFoundError:
-        config = {"usePhone": False}
-
-    USE_PHONE = config.get("usePhone", False)
-
-    # if USE_PHONE:
-    #     # Use ADB screenshot for phone mode
-    #     try:
-    #         controller = get_adb_controller()
-    #         if controller and controller.is_connected():
-    #             # Take full screenshot from phone
-    #             screen = controller.take_screenshot()
-
-    #             if screen is not None:
-    #                 # Convert RGB to BGR for OpenCV
-    #                 screen = cv2.cvtColor(screen, cv2.COLOR_RGB2BGR)
-
-    #                 # Extract region if specified
-    #                 if region:
-    #                     x, y, w, h = region
-    #                     screen = screen[y : y + h, x : x + w]
-    #                     # Load template
-    #                 template = cv2.imread(
-    #                     template_path, cv2.IMREAD_COLOR
-    #                 )  # safe default
-
-    #                 if template.shape[2] == 4:
-    #                     template = cv2.cvtColor(template, cv2.COLOR_BGRA2BGR)
-
-    #                 if debug:
-    #                     print(f"[DEBUG] Template loaded: {template_path}")
-    #                     print(f"[DEBUG] Template size: {template.shape}")
-    #                     print(f"[DEBUG] Screen size: {screen.shape}")
-
-    #                 result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
-
-    #                 # Get confidence levels for debugging
-    #                 if debug:
-    #                     min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-    #                     print(f"[DEBUG] Max confidence: {max_val:.4f}")
-    #                     print(f"[DEBUG] Min confidence: {min_val:.4f}")
-    #                     print(f"[DEBUG] Threshold: {threshold}")
-
-    #                 loc = np.where(result >= threshold)
-    #                 h, w = template.shape[:2]
-    #                 boxes = [(x, y, w, h) for (x, y) in zip(*loc[::-1])]
-
-    #                 if debug:
-    #                     print(f"[DEBUG] Found {len(boxes)} matches above threshold")
-    #                     for i, (x, y, w, h) in enumerate(boxes):
-    #                         print(
-    #                             f"[DEBUG] Match {i+1}: ({x}, {y}) with size ({w}, {h})"
-    #                         )
-
-    #                 return deduplicate_boxes(boxes)
-    #             else:
-    #                 print(
-    #                     "[WARNING] Could not take ADB screenshot, falling back to desktop"
-    #                 )
-    #         else:
-    #             print("[WARNING] ADB not connected, falling back to desktop screenshot")
-    #     except Exception as e:
-    #         print(f"[WARNING] ADB screenshot failed: {e}, falling back to desktop")
-
-    # Fallback to desktop screenshot
-    # Get screenshot
+from PIL import ImageStat
+
+from utils.screenshot import capture_region, grab_frame
+from utils.boxes import as_box_array, dedupe_indices, find_peaks, nms_indices
+from utils.templates import template_spec
+from utils.vision import get_vision_engine
+
+# Load config
+try:
+    with open("config.json", "r", encoding="utf-8") as file:
+        config = json.load(file)
+except FileNotFoundError:
+    config = {"usePhone": False}
+
+USE_PHONE = config.get("usePhone", False)
+
+
+def match_template(
+    template_path, region=None, threshold=None, debug=False, frame=None
+):
+    """Boxes of every match of a template, as (x, y, w, h) within the region
+
+    `template_path` is an image file or a logical name from
+    assets/manifest.json, whose region and confidence are used when
+    `region` or `threshold` is None. Plain files default to a threshold of
+    0.85.
+    """
+    spec = template_spec(template_path)
+    if spec is not None:
+        template_path = spec.path
+        region = region if region is not None else spec.region
+        threshold = threshold if threshold is not None else spec.confidence
+    elif threshold is None:
+        threshold = 0.85
+
+    screen = _region_screen(region, frame)
+
+    # Matched at full size, one score map per template and screen shared
+    # with the locate functions
+    vision = get_vision_engine()
+    if debug:
+        score_map = vision.score_map(screen, template_path, scale=1.0)
+        best = score_map.best(screen) if score_map is not None else None
+        if best is not None:
+            print(f"[DEBUG] Max confidence: {best.confidence:.4f}")
+
+    matches = vision.find_all(screen, template_path, threshold, scale=1.0)
+
+    # Top to bottom, then left to right, relative to the region
+    left, top = screen.origin
+    boxes = [
+        (match.left - left, match.top - top, match.width, match.height)
+        for match in matches
+    ]
+    return sorted(boxes, key=lambda box: (box[1], box[0]))
+
+
+def _region_screen(region, frame=None):
+    """Frame of a match_template region, None meaning the whole screen
+
+    Regions are (x, y, w, h) on desktop and phone alike. Taken from the
+    given frame, or shared with other readers inside a frame_snapshot() block.
+    """
+    if frame is not None:
+        return frame.roi(region)
     if region:
-        if USE_PHONE:
-            controller = get_adb_controller()
-            if controller and controller.is_connected():
-                # Take full screenshot from phone
-                screen = controller.take_screenshot()
-                x, y, w, h = region
-                screen = screen[y : y + h, x : x + w]
-        else:
-            screen = np.array(ImageGrab.grab(bbox=region))  # (left, top, right, bottom)
-    else:
-        if USE_PHONE:
-            controller = get_adb_controller()
-            if controller and controller.is_connected():
-                # Take full screenshot from phone
-                screen = controller.take_screenshot()
+        return grab_frame(region)
+    return grab_frame()
+
+
+def classify_icons(icons, region=None, threshold=None, frame=None):
+    """Find every slot showing one of several icons and tell which one, in one pass
+
+    All icons are matched against the same capture of the region. Their
+    score maps are stacked, each location is given the icon scoring highest
+    there, and one slot is kept per peak of that best score. A slot is
+    counted for one icon only, even when several pass their threshold.
+
+    Args:
+        icons: Dict of a key to an image file or logical name from
+            assets/manifest.json
+        region: Defaults to the region of the first manifest icon
+        threshold: Overrides every icon's threshold (manifest confidence,
+            0.85 for plain files)
+
+    Returns:
+        Dict of each key to the boxes classified as that icon, as (x, y, w, h)
+        within the region, top to bottom
+    """
+    keys = list(icons)
+    paths, thresholds = [], []
+    for key in keys:
+        spec = template_spec(icons[key])
+        if spec is not None:
+            paths.append(spec.path)
+            thresholds.append(threshold if threshold is not None else spec.confidence)
+            region = region if region is not None else spec.region
         else:
-            screen = np.array(ImageGrab.grab())
+            paths.append(icons[key])
+            thresholds.append(threshold if threshold is not None else 0.85)
+
+    screen = _region_screen(region, frame)
+    vision = get_vision_engine()
+    result = {key: [] for key in keys}
+
+    score_maps = [vision.score_map(screen, path, scale=1.0) for path in paths]
+    if any(score_map is None for score_map in score_maps):
+        return result
+    scores = [score_map.scores(screen) for score_map in score_maps]
+    if any(score is None for score in scores):
+        return result
+
+    # Icons differ by a pixel or two, compare their maps over the shared part
+    height = min(score.shape[0] for score in scores)
+    width = min(score.shape[1] for score in scores)
+    stacked = np.stack([score[:height, :width] for score in scores])
+    best_icon = stacked.argmax(axis=0)
+    best_score = np.take_along_axis(stacked, best_icon[None], axis=0)[0]
+
+    # Slots are the peaks of the best score that pass their icon's threshold
+    sizes = [score_map.template.shape[:2] for score_map in score_maps]
+    icon_h = min(size[0] for size in sizes)
+    icon_w = min(size[1] for size in sizes)
+    xs, ys, values = find_peaks(best_score, min(thresholds), (icon_w, icon_h))
+    icon_of = best_icon[ys, xs]
+    passed = values >= np.asarray(thresholds, dtype=np.float32)[icon_of]
+    xs, ys, values, icon_of = xs[passed], ys[passed], values[passed], icon_of[passed]
+
+    boxes = np.column_stack(
+        (xs, ys, np.full_like(xs, icon_w), np.full_like(xs, icon_h))
+    )
+    keep = nms_indices(boxes, values)
+    for i in sorted(keep.tolist(), key=lambda i: (ys[i], xs[i])):
+        result[keys[icon_of[i]]].append(tuple(boxes[i].tolist()))
+    return result
 
-    screen = cv2.cvtColor(screen, cv2.COLOR_RGB2BGR)
-
-    # Load template
-    template = cv2.imread(template_path, cv2.IMREAD_COLOR)  # safe default
-    if template.shape[2] == 4:
-        template = cv2.cvtColor(template, cv2.COLOR_BGRA2BGR)
-    result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
-    # Use cv2.minMaxLoc to get max confidence safely from the result matrix
-    if debug:
-        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-        print(f"[DEBUG] Max confidence: {max_val:.4f}")
-        print(f"[DEBUG] Min confidence: {min_val:.4f}")
-        
-    loc = np.where(result >= threshold)
 
-    h, w = template.shape[:2]
-    boxes = [(x, y, w, h) for (x, y) in zip(*loc[::-1])]
-
-    return deduplicate_boxes(boxes)
+def deduplicate_boxes(boxes, min_dist=5):
+    """Drop boxes whose center is within min_dist of an earlier kept box
 
+    `boxes` is a list of (x, y, w, h) tuples or an (n, 4) array.
 
-def deduplicate_boxes(boxes, min_dist=5):
-    filtered = []
-    for x, y, w, h in boxes:
-        cx, cy = x + w // 2, y + h // 2
-        if all(
-            abs(cx - (fx + fw // 2)) > min_dist or abs(cy - (fy + fh // 2)) > min_dist
-            for fx, fy, fw, fh in filtered
-        ):
-            filtered.append((x, y, w, h))
-    return filtered
+    Returns:
+        List of the kept (x, y, w, h) tuples, in input order
+    """
+    boxes = as_box_array(boxes)
+    return [tuple(box) for box in boxes[dedupe_indices(boxes, min_dist)].tolist()]
 
 
 def is_infirmary_active(REGION):
@@ -1,9 +1,8 @@
 import re
-import time
 
-from utils.screenshot import capture_region, enhanced_screenshot
+from utils.screenshot import capture_region, enhanced_screenshot, frame_snapshot
 from core.ocr import extract_text, extract_number
-from core.recognizer import match_template
+from core.recognizer import classify_icons
 import json
 from utils.constants import get_regions_for_mode, MOOD_LIST
 
@@ -28,8 +27,12 @@ def stat_state():
     }
 
     result = {}
-    for stat, region in stat_regions.items():
-        img = enhanced_screenshot(region)
+    with frame_snapshot():
+        images = {
+            stat: enhanced_screenshot(region) for stat, region in stat_regions.items()
+        }
+
+    for stat, img in images.items():
         val = extract_number(img)
         digits = "".join(filter(str.isdigit, val))
         result[stat] = int(digits) if digits.isdigit() else 0
@@ -37,30 +40,21 @@ def stat_state():
 
 
 # Check support card in each training
-def check_support_card(threshold=0.8, isPhone=False):
+def check_support_card(threshold=None, isPhone=False):
+    # Logical names from assets/manifest.json, which also holds the icon
+    # region and the desktop and phone thresholds
     SUPPORT_ICONS = {
-        "spd": "assets/icons/support_card_type_spd.png",
-        "sta": "assets/icons/support_card_type_sta.png",
-        "pwr": "assets/icons/support_card_type_pwr.png",
-        # "guts": "assets/icons/support_card_type_guts.png",
-        "wit": "assets/icons/support_card_type_wit.png",
-        # "friend": "assets/icons/support_card_type_friend.png",
+        "spd": "support_spd",
+        "sta": "support_sta",
+        "pwr": "support_pwr",
+        # "guts": "support_guts",
+        "wit": "support_wit",
+        # "friend": "support_friend",
     }
 
-    regions = get_regions_for_mode()
-    count_result = {}
-
-    for key, icon_path in SUPPORT_ICONS.items():
-        time.sleep(0.2)
-        matches = match_template(
-            icon_path,
-            regions["SUPPORT_CARD_ICON_REGION"],
-            threshold if not USE_PHONE else 0.65,
-            debug=False,
-        )
-        count_result[key] = len(matches)
-
-    return count_result
+    # One capture of the icon region, every card slot classified at once
+    slots = classify_icons(SUPPORT_ICONS, threshold=threshold)
+    return {key: len(boxes) for key, boxes in slots.items()}
 
 
 # Get failure chance (idk how to get energy value)
@@ -0,0 +1,88 @@
+import queue
+
+import numpy as np
+import pytest
+
+av = pytest.importorskip("av")
+
+from utils.screen_stream import H264Decoder, ScreenRecordStream  # noqa: E402
+
+WIDTH, HEIGHT = 64, 48
+FRAME_COUNT = 8
+
+
+def encode_frames():
+    """Encode solid gray frames, one Annex-B packet per frame like screenrecord"""
+    encoder = av.CodecContext.create("libx264", "w")
+    encoder.width, encoder.height, encoder.pix_fmt = WIDTH, HEIGHT, "yuv420p"
+    encoder.framerate = 30
+    encoder.options = {"preset": "ultrafast", "tune": "zerolatency"}
+
+    packets = []
+    for i in range(FRAME_COUNT):
+        image = np.full((HEIGHT, WIDTH, 3), i * 30, np.uint8)
+        frame = av.VideoFrame.from_ndarray(image, format="rgb24")
+        packets.extend(bytes(packet) for packet in encoder.encode(frame))
+    packets.extend(bytes(packet) for packet in encoder.encode(None))
+    assert len(packets) == FRAME_COUNT
+    return packets
+
+
+class PausingSource:
+    """Stream source that hands out the given chunks, then blocks like a
+    device recording a static screen until closed"""
+
+    def __init__(self, chunks):
+        self.chunks = queue.Queue()
+        for chunk in chunks:
+            self.chunks.put(chunk)
+
+    def read1(self, size):
+        return self.chunks.get()
+
+    def close(self):
+        self.chunks.put(b"")
+
+
+def test_complete_packets_decode_without_flush():
+    decoder = H264Decoder()
+    for i, packet in enumerate(encode_frames()):
+        frames = decoder.decode(packet, complete=True)
+        assert len(frames) == 1
+        assert abs(int(frames[0].mean()) - i * 30) <= 2
+    assert decoder.flush() == []
+
+
+def test_frame_is_decoded_when_next_one_starts():
+    packets = encode_frames()
+    decoder = H264Decoder()
+    assert decoder.decode(packets[0]) == []
+    for packet in packets[1:]:
+        assert len(decoder.decode(packet)) == 1
+    assert len(decoder.flush()) == 1
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+def test_arbitrary_chunks(chunk_size):
+    data = b"".join(encode_frames())
+    decoder = H264Decoder()
+    count = 0
+    for start in range(0, len(data), chunk_size):
+        count += len(decoder.decode(data[start : start + chunk_size]))
+    count += len(decoder.flush())
+    assert count == FRAME_COUNT
+
+
+def test_stream_publishes_last_frame_while_source_is_paused():
+    source = PausingSource(encode_frames())
+    stream = ScreenRecordStream(lambda: source, restart=False)
+    stream.start()
+    try:
+        with stream._condition:
+            assert stream._condition.wait_for(
+                lambda: stream.frame_count == FRAME_COUNT, timeout=5
+            )
+        assert abs(int(stream.latest().mean()) - (FRAME_COUNT - 1) * 30) <= 2
+    finally:
+        stream.stop()
+    assert stream.latest() is None
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from utils import clock, screenshot
+from utils.frame import Frame
+
+# A 1920x1080 desktop with the game window somewhere inside it
+GAME_RECT = (220, 40, 730, 1000)
+
+
+@pytest.fixture
+def virtual_clock():
+    previous = clock.set_clock(clock.VirtualClock())
+    yield
+    clock.set_clock(previous)
+
+
+def desktop(value=100):
+    pixels = np.zeros((1080, 1920, 3), np.uint8)
+    x, y, w, h = GAME_RECT
+    pixels[y : y + h, x : x + w] = value
+    return Frame(pixels, "BGR")
+
+
+def game_window(screen):
+    """Capture of the game window only, like _capture(None) on PC"""
+    return screen.roi(GAME_RECT)
+
+
+def test_full_screen_since_frame_is_compared_on_the_captured_area(
+    monkeypatch, virtual_clock
+):
+    before = desktop()
+    monkeypatch.setattr(screenshot, "_capture", lambda region: game_window(desktop()))
+    assert screenshot.wait_until_changed(None, before, timeout=1) is None
+
+
+def test_change_inside_the_captured_area_is_seen(monkeypatch, virtual_clock):
+    before = desktop()
+    monkeypatch.setattr(
+        screenshot, "_capture", lambda region: game_window(desktop(200))
+    )
+    changed = screenshot.wait_until_changed(None, before, timeout=1)
+    assert changed is not None
+    assert changed.origin == GAME_RECT[:2]
+
+
+def test_crop_frame_clips_phone_regions(monkeypatch):
+    monkeypatch.setattr(screenshot, "USE_PHONE", True)
+    monkeypatch.setattr(screenshot, "_grab_desktop", pytest.fail)
+    phone = Frame(np.zeros((1280, 720, 3), np.uint8), "BGR")
+    crop = screenshot.crop_frame(phone, (600, 1200, 370, 100))
+    assert crop.origin == (600, 1200)
+    assert crop.shape == (80, 120)
+
+
+def test_crop_frame_grabs_desktop_regions_outside_the_window(monkeypatch):
+    monkeypatch.setattr(screenshot, "USE_PHONE", False)
+    monkeypatch.setattr(screenshot, "_grab_desktop", lambda monitor: monitor)
+    window = game_window(desktop())
+    assert screenshot.crop_frame(window, (100, 50, 200, 100)) == {
+        "left": 100,
+        "top": 50,
+        "width": 200,
+        "height": 100,
+    }
+    assert screenshot.crop_frame(window, (300, 50, 200, 100)).origin == (300, 50)
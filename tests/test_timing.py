@@ -0,0 +1,19 @@
+import os
+
+from utils.timing import TransitionTimings
+
+
+def test_save_writes_only_after_new_records(tmp_path):
+    path = tmp_path / "timings.json"
+    timings = TransitionTimings(str(path))
+
+    timings.save()
+    assert not path.exists()
+
+    timings.record("race.view_results", 0.4, True)
+    timings.save()
+    assert TransitionTimings(str(path)).sites["race.view_results"].hits == 1
+
+    os.remove(path)
+    timings.save()
+    assert not path.exists()
@@ -0,0 +1,37 @@
+import numpy as np
+
+from utils import vision
+from utils.frame import Frame
+
+TEMPLATE = np.random.default_rng(0).integers(0, 256, (30, 30, 3), np.uint8)
+
+
+def screen_with_template(x, y):
+    pixels = np.zeros((400, 400, 3), np.uint8)
+    pixels[y : y + 30, x : x + 30] = TEMPLATE
+    return Frame(pixels, "BGR")
+
+
+def test_window_miss_found_by_full_search_counts_once(monkeypatch):
+    monkeypatch.setattr(vision, "load_template", lambda path: TEMPLATE)
+    engine = vision.VisionEngine()
+
+    first = engine.find(screen_with_template(50, 50), "icon.png", 0.9, scale=1.0)
+    moved = engine.find(screen_with_template(300, 300), "icon.png", 0.9, scale=1.0)
+    again = engine.find(screen_with_template(300, 300), "icon.png", 0.9, scale=1.0)
+
+    assert first.box[:2] == (50, 50)
+    assert moved.box[:2] == (300, 300)
+    assert again is not None
+    assert engine.locations.stats()["icon.png"]["misses"] == 2
+
+
+def test_window_and_full_search_miss_counts_once(monkeypatch):
+    monkeypatch.setattr(vision, "load_template", lambda path: TEMPLATE)
+    engine = vision.VisionEngine()
+
+    engine.find(screen_with_template(50, 50), "icon.png", 0.9, scale=1.0)
+    blank = Frame(np.zeros((400, 400, 3), np.uint8), "BGR")
+    assert engine.find(blank, "icon.png", 0.9, scale=1.0) is None
+
+    assert engine.locations.stats()["icon.png"]["misses"] == 2
@@ -0,0 +1,204 @@
+import socket
+import threading
+from typing import Dict, List, Tuple
+
+
+class ADBError(Exception):
+    """Raised when the ADB server rejects a request or the connection breaks"""
+
+
+class ADBClient:
+    """Minimal client for the ADB server smart-socket protocol
+
+    Talks to the server that `adb start-server` runs on 127.0.0.1:5037, so no
+    adb process is spawned per command. Every request is a 4-digit hex length
+    followed by the payload, and the server answers OKAY or FAIL.
+
+    A connection becomes bound to a device after `host:transport:<serial>` and
+    is consumed by the one service it runs afterwards. The client keeps a small
+    pool of connections per device that have already done the transport
+    handshake, and refills it in the background as they are used up.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 5037,
+        pool_size: int = 2,
+        timeout: float = 10.0,
+    ):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._pool: Dict[str, List[socket.socket]] = {}
+        self._refilling = set()
+        self._lock = threading.Lock()
+
+    def _open(self) -> socket.socket:
+        try:
+            sock = socket.create_connection((self.host, self.port), self.timeout)
+        except OSError as e:
+            raise ADBError(f"Cannot reach ADB server at {self.host}:{self.port}: {e}")
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    @staticmethod
+    def _recv_exact(sock: socket.socket, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ADBError("Connection closed by ADB server")
+            data += chunk
+        return bytes(data)
+
+    @classmethod
+    def _read_length_prefixed(cls, sock: socket.socket) -> bytes:
+        length = int(cls._recv_exact(sock, 4), 16)
+        return cls._recv_exact(sock, length)
+
+    @classmethod
+    def _send_request(cls, sock: socket.socket, request: str):
+        """Send one request and check the OKAY/FAIL status"""
+        payload = request.encode("utf-8")
+        sock.sendall(b"%04x" % len(payload) + payload)
+
+        status = cls._recv_exact(sock, 4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            message = cls._read_length_prefixed(sock).decode("utf-8", "replace")
+            raise ADBError(f"{request}: {message}")
+        raise ADBError(f"{request}: unexpected status {status!r}")
+
+    @staticmethod
+    def _read_all(sock: socket.socket) -> bytes:
+        chunks = []
+        while True:
+            chunk = sock.recv(1 << 20)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+    def _host_query(self, request: str) -> str:
+        """Run a host: request that answers with a length-prefixed string"""
+        sock = self._open()
+        try:
+            self._send_request(sock, request)
+            return self._read_length_prefixed(sock).decode("utf-8", "replace")
+        except OSError as e:
+            raise ADBError(f"{request}: {e}")
+        finally:
+            sock.close()
+
+    def _transport(self, serial: str) -> socket.socket:
+        """Open a new connection bound to the given device"""
+        sock = self._open()
+        try:
+            self._send_request(sock, f"host:transport:{serial}")
+        except (ADBError, OSError):
+            sock.close()
+            raise
+        return sock
+
+    def _refill(self, serial: str):
+        """Top up the pool of transport-bound connections for a device"""
+        try:
+            while True:
+                with self._lock:
+                    if len(self._pool.setdefault(serial, [])) >= self.pool_size:
+                        return
+                try:
+                    sock = self._transport(serial)
+                except (ADBError, OSError):
+                    return
+                with self._lock:
+                    self._pool[serial].append(sock)
+        finally:
+            with self._lock:
+                self._refilling.discard(serial)
+
+    def _acquire(self, serial: str) -> socket.socket:
+        with self._lock:
+            idle = self._pool.get(serial)
+            sock = idle.pop() if idle else None
+            refill = self.pool_size > 0 and serial not in self._refilling
+            if refill:
+                self._refilling.add(serial)
+
+        if refill:
+            threading.Thread(target=self._refill, args=(serial,), daemon=True).start()
+
+        return sock if sock is not None else self._transport(serial)
+
+    def open_stream(self, serial: str, service: str) -> socket.socket:
+        """Start a device service and return its socket for streaming I/O
+
+        A pooled connection may have gone stale if the device reconnected,
+        in which case a fresh one is tried once.
+        """
+        sock = self._acquire(serial)
+        try:
+            self._send_request(sock, service)
+            return sock
+        except (ADBError, OSError):
+            sock.close()
+
+        sock = self._transport(serial)
+        try:
+            self._send_request(sock, service)
+            return sock
+        except (ADBError, OSError) as e:
+            sock.close()
+            raise ADBError(f"{service}: {e}")
+
+    def _run_service(self, serial: str, service: str) -> bytes:
+        sock = self.open_stream(serial, service)
+        try:
+            return self._read_all(sock)
+        except OSError as e:
+            raise ADBError(f"{service}: {e}")
+        finally:
+            sock.close()
+
+    def devices(self) -> List[Tuple[str, str]]:
+        """List devices known to the server as (serial, state) pairs"""
+        devices = []
+        for line in self._host_query("host:devices").splitlines():
+            parts = line.strip().split("\t")
+            if len(parts) == 2:
+                devices.append((parts[0], parts[1]))
+        return devices
+
+    def connect(self, address: str) -> str:
+        """Equivalent of `adb connect <address>`, returns the server's message"""
+        return self._host_query(f"host:connect:{address}")
+
+    def shell(self, serial: str, command: str) -> bytes:
+        """Run a command through the shell: service and return its output"""
+        return self._run_service(serial, f"shell:{command}")
+
+    def exec_out(self, serial: str, command: str) -> bytes:
+        """Run a command through the exec: service and return raw stdout"""
+        return self._run_service(serial, f"exec:{command}")
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._lock:
+            pools, self._pool = self._pool, {}
+        for sockets in pools.values():
+            for sock in sockets:
+                sock.close()
+
+
+# Global ADB client instance
+_adb_client = None
+
+
+def get_adb_client() -> ADBClient:
+    """Get or create ADB client instance"""
+    global _adb_client
+    if _adb_client is None:
+        _adb_client = ADBClient()
+    return _adb_client
@@ -1,24 +1,255 @@
 import subprocess
+import importlib.util
 import json
 import time
 import re
-import socket
+import queue
+import threading
 import cv2
 import numpy as np
 from typing import Optional, Tuple, List
 
+from utils.adb_client import ADBClient, ADBError, get_adb_client
+from utils.buffer_pool import allocation_stats, frame_pool
+from utils.frame import Frame
+from utils.frame_grabber import FrameGrabber
+
+# Load config
+try:
+    with open("config.json", "r", encoding="utf-8") as file:
+        config = json.load(file)
+except FileNotFoundError:
+    config = {}
+
+# "raw" reads the framebuffer as-is, "png" lets the device encode a PNG first,
+# "h264" decodes a continuous screenrecord stream and keeps the newest frame
+SCREENCAP_MODE = config.get("screencapMode", "raw")
+
+# "subprocess" runs the adb binary, "socket" talks to the ADB server directly
+ADB_TRANSPORT = config.get("adbTransport", "subprocess")
+
+# Capture frames on a background thread so vision calls never wait for ADB
+BACKGROUND_CAPTURE = config.get("backgroundCapture", False)
+
+# Android PixelFormat values reported in the raw screencap header, mapped to
+# the Frame layout of their pixels
+RAW_PIXEL_FORMATS = {
+    1: "RGBA",  # RGBA_8888
+    2: "RGBA",  # RGBX_8888
+    5: "BGRA",  # BGRA_8888
+}
+
+# Raw screencap size of a 720x1280 device, used until the real size is known
+RAW_SCREENCAP_SIZE_HINT = 16 + 720 * 1280 * 4
+
+
+def parse_raw_screencap(data) -> Optional[Tuple[np.ndarray, int]]:
+    """Parse the output of `screencap` without -p
+
+    The payload is prefixed by width, height and pixel format as little-endian
+    uint32 values, followed by a colour space field on Android 9+. The pixels
+    are returned as a (height, width, 4) view over `data` (bytes or a uint8
+    array), no copy is made.
+
+    Returns:
+        (pixels, pixel_format) or None if the data is not a 4-byte-per-pixel
+        framebuffer dump
+    """
+    if len(data) < 12:
+        return None
+
+    data = np.frombuffer(data, np.uint8) if isinstance(data, bytes) else data
+    width, height, pixel_format = data[:12].view("<u4")
+    width, height, pixel_format = int(width), int(height), int(pixel_format)
+    if pixel_format not in RAW_PIXEL_FORMATS:
+        return None
+
+    header_size = len(data) - width * height * 4
+    if header_size not in (12, 16):
+        return None
+
+    pixels = data[header_size : header_size + width * height * 4]
+    return pixels.reshape(height, width, 4), pixel_format
+
+
+class ShellSessionError(Exception):
+    """Raised when a shell session broke after a command was sent to it
+
+    The command may already have run on the device, so it must not be sent
+    again (a repeated tap would press two buttons).
+    """
+
+
+class ADBShellSession:
+    """Long-lived `adb shell` that runs commands over stdin
+
+    Spawning `adb -s <device> shell input ...` costs a process start plus the
+    shell handshake on every tap. The session keeps one shell open per device,
+    writes each command followed by an echo of a unique marker and the exit
+    code, and waits for that marker to know the command has finished.
+
+    With an ADBClient the shell runs over an `exec:sh` socket to the ADB
+    server instead of an `adb shell` process.
+    """
+
+    def __init__(
+        self,
+        device_id: str,
+        adb_binary: str = "adb",
+        client: Optional[ADBClient] = None,
+    ):
+        self.device_id = device_id
+        self.adb_binary = adb_binary
+        self.client = client
+        self._proc = None
+        self._sock = None
+        self._lines = None
+        self._lock = threading.Lock()
+        self._counter = 0
+
+    def _start(self):
+        """Start the shell and a reader thread for its output"""
+        if self.client is not None:
+            self._sock = self.client.open_stream(self.device_id, "exec:sh")
+            # The reader thread blocks between commands, never time it out
+            self._sock.settimeout(None)
+            stream = self._sock.makefile("rb")
+        else:
+            self._proc = subprocess.Popen(
+                [self.adb_binary, "-s", self.device_id, "shell"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=0,
+            )
+            stream = self._proc.stdout
+
+        self._lines = queue.Queue()
+        threading.Thread(
+            target=self._read_output,
+            args=(stream, self._lines),
+            daemon=True,
+        ).start()
+
+    def _write(self, data: bytes):
+        if self._sock is not None:
+            self._sock.sendall(data)
+        else:
+            self._proc.stdin.write(data)
+            self._proc.stdin.flush()
+
+    @staticmethod
+    def _read_output(stream, lines: queue.Queue):
+        """Forward shell output line by line; None marks the end of the stream"""
+        for line in iter(stream.readline, b""):
+            lines.put(line.decode("utf-8", errors="replace").rstrip("\r\n"))
+        lines.put(None)
+
+    def is_alive(self) -> bool:
+        if self._sock is not None:
+            # A closed socket shows up as None in the output queue
+            return True
+        return self._proc is not None and self._proc.poll() is None
+
+    def run(self, command: str, timeout: float = 10.0) -> Optional[Tuple[int, str]]:
+        """Run a shell command and wait for it to complete
+
+        Returns:
+            (exit_code, output) or None if the command could not be sent
+
+        Raises:
+            ShellSessionError: The session broke or timed out after the
+                command was sent
+        """
+        with self._lock:
+            try:
+                if not self.is_alive():
+                    self._start()
+
+                self._counter += 1
+                marker = f"__UMA_DONE_{self._counter}__"
+                self._write(f"{command}; echo {marker} $?\n".encode())
+            except (OSError, ADBError) as e:
+                print(f"[ADB] Shell session error: {e}")
+                self._close()
+                return None
+
+            try:
+                output = []
+                deadline = time.time() + timeout
+                while True:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise TimeoutError(f"'{command}' timed out after {timeout}s")
+                    line = self._lines.get(timeout=remaining)
+                    if line is None:
+                        raise EOFError("shell session closed")
+                    if marker in line:
+                        # Output without a trailing newline shares the marker line
+                        head, _, code = line.partition(marker)
+                        if head:
+                            output.append(head)
+                        code = code.strip()
+                        return (int(code) if code.isdigit() else 0, "\n".join(output))
+                    output.append(line)
+
+            except queue.Empty:
+                self._close()
+                raise ShellSessionError(f"'{command}' timed out after {timeout}s")
+            except (OSError, EOFError, TimeoutError, ADBError) as e:
+                self._close()
+                raise ShellSessionError(str(e)) from e
+
+    def _close(self):
+        if self._sock is not None:
+            self._sock.close()
+        if self._proc is not None:
+            try:
+                self._proc.kill()
+            except OSError:
+                pass
+        self._proc = None
+        self._sock = None
+        self._lines = None
+
+    def close(self):
+        """Terminate the shell process"""
+        with self._lock:
+            self._close()
+
 
 class ADBController:
     """ADB controller for phone emulation via Mumu instance"""
 
-    def __init__(self, host: str = "127.0.0.1", port: int = 16384):
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 16384,
+        screencap_mode: str = SCREENCAP_MODE,
+        transport: str = ADB_TRANSPORT,
+        background_capture: bool = BACKGROUND_CAPTURE,
+    ):
         self.host = host
         self.port = port
         self.device_id = None
+        self.screencap_mode = screencap_mode
+        self._raw_supported = True
+        self._raw_size = RAW_SCREENCAP_SIZE_HINT
+        self.client = get_adb_client() if transport == "socket" else None
+        self._shell_session = None
+        self._screen_stream = None
+        self._grabber = None
+        self._input_generation = 0
         self._connect()
 
+        if background_capture and self.device_id:
+            self.start_background_capture()
+
     def _connect(self):
         """Connect to ADB device"""
+        if self.client is not None:
+            return self._connect_socket()
+
         try:
             # Connect to the ADB server
             subprocess.run(
@@ -51,85 +282,198 @@ class ADBController:
             )
             return False
 
-    def click(self, x: int, y: int, duration: float = 0.175):
-        """Perform click at coordinates using ADB"""
+    def _connect_socket(self):
+        """Connect to ADB device through the ADB server socket"""
+        address = f"{self.host}:{self.port}"
+        try:
+            self.client.connect(address)
+
+            for serial, status in self.client.devices():
+                if serial == address and status == "device":
+                    self.device_id = address
+                    print(f"[ADB] Connected to device: {self.device_id}")
+                    return True
+
+            print("[ADB] Failed to connect to device")
+            return False
+
+        except ADBError as e:
+            print(f"[ADB] Connection error: {e}")
+            return False
+
+    def _exec_out(self, command: str) -> Optional[bytes]:
+        """Run a command with binary-safe stdout (adb exec-out)"""
+        try:
+            if self.client is not None:
+                return self.client.exec_out(self.device_id, command)
+
+            cmd = ["adb", "-s", self.device_id, "exec-out", command]
+            result = subprocess.run(cmd, check=True, capture_output=True)
+            return result.stdout
+
+        except (subprocess.CalledProcessError, ADBError) as e:
+            print(f"[ADB] exec-out error: {e}")
+            return None
+
+    def _exec_out_pooled(self, command: str) -> Optional[np.ndarray]:
+        """Run a command through exec-out, reading stdout into a pooled buffer
+
+        The buffer is sized from the previous output, so after the first
+        screenshot no memory is allocated for the transfer. Returns a uint8
+        view of the output, or None on failure.
+        """
+        proc = None
+        try:
+            if self.client is not None:
+                sock = self.client.open_stream(self.device_id, f"exec:{command}")
+                stream = sock.makefile("rb", buffering=0)
+                sock.close()
+            else:
+                proc = subprocess.Popen(
+                    ["adb", "-s", self.device_id, "exec-out", command],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                )
+                stream = proc.stdout
+
+            with stream:
+                # One spare byte, so a full buffer means the output grew
+                buffer = frame_pool.acquire((self._raw_size + 1,))
+                length = 0
+                while True:
+                    if length == len(buffer):
+                        # Output is larger than expected, grow and keep reading.
+                        # The next call gets a pooled buffer of the right size.
+                        grown = np.empty(len(buffer) * 2, np.uint8)
+                        allocation_stats.record_allocation(grown.nbytes)
+                        grown[:length] = buffer
+                        buffer = grown
+                    with memoryview(buffer[length:]) as view:
+                        count = stream.readinto(view)
+                    if not count:
+                        break
+                    length += count
+
+            if proc is not None and proc.wait() != 0:
+                print(f"[ADB] exec-out error: exit code {proc.returncode}")
+                return None
+
+        except (OSError, ADBError) as e:
+            print(f"[ADB] exec-out error: {e}")
+            if proc is not None:
+                proc.kill()
+            return None
+
+        self._raw_size = max(length, 16)
+        return buffer[:length]
+
+    def shell(self, command: str) -> Optional[str]:
+        """Run a shell command on the device through the persistent session
+
+        Falls back to a one-off `adb shell` process if the command could not
+        be sent to the session. A command that was sent is never repeated,
+        even if its result got lost.
+        Returns the command output, or None if the command failed.
+        """
         if not self.device_id:
             print("[ADB] No device connected")
-            return False
+            return None
+
+        if self._shell_session is None:
+            self._shell_session = ADBShellSession(self.device_id, client=self.client)
 
         try:
-            # Move to position with duration simulation
-            if duration > 0:
-                # ADB doesn't support duration, so we'll just click directly
-                pass
+            result = self._shell_session.run(command)
+        except ShellSessionError as e:
+            print(f"[ADB] Shell session error: {e}")
+            return None
+        if result is not None:
+            code, output = result
+            if code != 0:
+                print(f"[ADB] Shell command failed ({code}): {command}")
+                return None
+            return output
+
+        try:
+            if self.client is not None:
+                output = self.client.shell(self.device_id, command)
+                return output.decode("utf-8", errors="replace")
 
-            # Execute click command
-            cmd = ["adb", "-s", self.device_id, "shell", "input", "tap", str(x), str(y)]
+            cmd = ["adb", "-s", self.device_id, "shell", command]
             result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+            return result.stdout
+        except (subprocess.CalledProcessError, ADBError) as e:
+            print(f"[ADB] Shell error: {e}")
+            return None
 
-            # print(f"[ADB] Clicked at ({x}, {y})")
-            return True
+    def close(self):
+        """Close the persistent shell session, screen stream and capture thread"""
+        self.stop_background_capture()
+        if self._shell_session is not None:
+            self._shell_session.close()
+            self._shell_session = None
+        if self._screen_stream is not None:
+            self._screen_stream.stop()
+            self._screen_stream = None
 
-        except subprocess.CalledProcessError as e:
-            print(f"[ADB] Click error: {e}")
+    def click(self, x: int, y: int, duration: float = 0.175):
+        """Perform click at coordinates using ADB"""
+        if not self.device_id:
+            print("[ADB] No device connected")
             return False
 
+        # ADB doesn't support duration, so we'll just click directly
+        if self.shell(f"input tap {x} {y}") is None:
+            print(f"[ADB] Click error at ({x}, {y})")
+            return False
+
+        self._mark_input()
+        # print(f"[ADB] Clicked at ({x}, {y})")
+        return True
+
     def mouse_down(self, x: int, y: int):
         """Simulate mouse down at coordinates using ADB"""
         if not self.device_id:
             print("[ADB] No device connected")
             return False
 
-        try:
-            # Use ADB shell input motionevent DOWN command
-            cmd = [
-                "adb",
-                "-s",
-                self.device_id,
-                "shell",
-                "input",
-                "motionevent",
-                "DOWN",
-                str(x),
-                str(y),
-            ]
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-
-            # print(f"[ADB] Mouse down at ({x}, {y})")
-            return True
-
-        except subprocess.CalledProcessError as e:
-            print(f"[ADB] Mouse down error: {e}")
+        # Use ADB shell input motionevent DOWN command
+        if self.shell(f"input motionevent DOWN {x} {y}") is None:
+            print(f"[ADB] Mouse down error at ({x}, {y})")
             return False
 
+        self._mark_input()
+        # print(f"[ADB] Mouse down at ({x}, {y})")
+        return True
+
     def mouse_up(self, x: int, y: int):
         """Simulate mouse up at coordinates using ADB"""
         if not self.device_id:
             print("[ADB] No device connected")
             return False
 
-        try:
-            # Use ADB shell input motionevent UP command
-            cmd = [
-                "adb",
-                "-s",
-                self.device_id,
-                "shell",
-                "input",
-                "motionevent",
-                "UP",
-                str(x),
-                str(y),
-            ]
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        # Use ADB shell input motionevent UP command
+        if self.shell(f"input motionevent UP {x} {y}") is None:
+            print(f"[ADB] Mouse up error at ({x}, {y})")
+            return False
 
-            # print(f"[ADB] Mouse up at ({x}, {y})")
-            return True
+        self._mark_input()
+        # print(f"[ADB] Mouse up at ({x}, {y})")
+        return True
 
-        except subprocess.CalledProcessError as e:
-            print(f"[ADB] Mouse up error: {e}")
+    def swipe(self, x1: int, y1: int, x2: int, y2: int):
+        """Perform swipe between two points using ADB"""
+        if not self.device_id:
+            print("[ADB] No device connected")
+            return False
+
+        if self.shell(f"input swipe {x1} {y1} {x2} {y2}") is None:
+            print(f"[ADB] Swipe error from ({x1}, {y1}) to ({x2}, {y2})")
             return False
 
+        self._mark_input()
+        return True
+
     def move_to(self, x: int, y: int, duration: float = 0.175):
         """Move to coordinates (ADB doesn't support duration, so we simulate it)"""
         if not self.device_id:
@@ -154,55 +498,188 @@ class ADBController:
         if not self.device_id:
             return (0, 0)
 
-        try:
-            # Get screen size using wm size command
-            cmd = ["adb", "-s", self.device_id, "shell", "wm", "size"]
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-
-            # Parse output like "Physical size: 720x1280"
-            output = result.stdout.strip()
-            match = re.search(r"(\d+)x(\d+)", output)
-            if match:
-                width = int(match.group(1))
-                height = int(match.group(2))
-                return (width, height)
-            else:
-                print(f"[ADB] Could not parse screen size from: {output}")
-                return (0, 0)
+        # Get screen size using wm size command
+        output = self.shell("wm size")
+        if output is None:
+            print("[ADB] Screen size error")
+            return (0, 0)
 
-        except subprocess.CalledProcessError as e:
-            print(f"[ADB] Screen size error: {e}")
+        # Parse output like "Physical size: 720x1280"
+        output = output.strip()
+        match = re.search(r"(\d+)x(\d+)", output)
+        if match:
+            width = int(match.group(1))
+            height = int(match.group(2))
+            return (width, height)
+        else:
+            print(f"[ADB] Could not parse screen size from: {output}")
             return (0, 0)
 
-    def take_screenshot(self) -> Optional[np.ndarray]:
-        """Take screenshot using ADB"""
+    def take_screenshot_raw(self) -> Optional[Tuple[np.ndarray, int]]:
+        """Take screenshot as an uncompressed framebuffer dump
+
+        Returns:
+            (pixels, pixel_format) where pixels is a (height, width, 4) view of
+            a pooled buffer, or None on failure
+        """
         if not self.device_id:
             return None
 
-        try:
-            # Take screenshot using ADB
-            cmd = ["adb", "-s", self.device_id, "exec-out", "screencap -p"]
-            result = subprocess.run(cmd, check=True, capture_output=True)
+        data = self._exec_out_pooled("screencap")
+        if data is None:
+            print("[ADB] Screenshot error")
+            return None
 
-            # Convert bytes to numpy array
-            nparr = np.frombuffer(result.stdout, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        raw = parse_raw_screencap(data)
+        if raw is None:
+            print("[ADB] Unsupported raw screencap format")
+        return raw
+
+    def take_stream_frame(self) -> Optional[np.ndarray]:
+        """Return the newest frame of the screenrecord stream
+
+        The stream is started on first use and restarted when it stopped.
+        screenrecord sends nothing while the screen is static, so the last
+        decoded frame is reused for as long as the stream runs. Returns None
+        if PyAV is missing or no frame arrived yet, in which case callers
+        should use screencap.
+        """
+        if self._screen_stream is None:
+            if importlib.util.find_spec("av") is None:
+                print("[ADB] PyAV is not installed, h264 capture disabled")
+                self.screencap_mode = "raw"
+                return None
 
-            if img is not None:
-                # Convert BGR to RGB
-                img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            from utils.screen_stream import ScreenRecordStream
 
-                # Screenshot is already in correct portrait orientation (720x1280)
-                # height, width = img.shape[:2]
-                # print(f"[ADB] Screenshot dimensions: {width}x{height}")
+            self._screen_stream = ScreenRecordStream.for_device(
+                self.device_id, self.client
+            )
 
-                return img
-            else:
-                print("[ADB] Failed to decode screenshot")
-                return None
+        if not self._screen_stream.is_running():
+            self._screen_stream.start()
+            return self._screen_stream.wait_for_frame(timeout=3)
+        return self._screen_stream.latest()
+
+    def start_background_capture(self, interval: float = 0.0):
+        """Capture continuously on a producer thread
+
+        take_screenshot then returns the newest captured frame instead of
+        capturing on the caller's thread.
+        """
+        if self._grabber is None:
+            self._grabber = FrameGrabber(self._capture_frame, interval)
+        self._grabber.start()
+
+    def stop_background_capture(self):
+        """Stop the producer thread, take_screenshot captures directly again"""
+        if self._grabber is not None:
+            self._grabber.stop()
+            self._grabber = None
+
+    @property
+    def frame_generation(self) -> int:
+        """Generation of the newest background frame (0 without background capture)"""
+        if self._grabber is None:
+            return 0
+        return self._grabber.generation
+
+    def wait_for_new_frame(
+        self, generation: int, timeout: float = 2.0
+    ) -> Optional[Frame]:
+        """Wait for a background frame newer than the given generation
+
+        Without background capture this simply takes a new screenshot.
+        """
+        if self._grabber is None or not self._grabber.is_running():
+            return self._capture_frame()
+        generation, frame = self._grabber.wait_for_newer(generation, timeout)
+        if frame is not None:
+            frame.generation = generation
+        return frame
+
+    def _mark_input(self):
+        """Remember that frames captured so far may predate this input
+
+        A capture that was already running when the input was sent gets the
+        next generation, so only the one after that is guaranteed fresh.
+        """
+        if self._grabber is not None:
+            self._input_generation = self._grabber.generation + 1
+
+    def take_frame(self) -> Optional[Frame]:
+        """Take a full-screen Frame using ADB
+
+        The Frame keeps the pixels in the layout the capture produced and
+        converts them on demand, see utils.frame.Frame.
+        """
+        if not self.device_id:
+            return None
 
-        except subprocess.CalledProcessError as e:
-            print(f"[ADB] Screenshot error: {e}")
+        if self._grabber is not None and self._grabber.is_running():
+            generation, frame = self._grabber.latest()
+            if generation <= self._input_generation:
+                # Newest frame may show the screen from before the last tap
+                generation, frame = self._grabber.wait_for_newer(
+                    self._input_generation
+                )
+            if frame is not None:
+                frame.generation = generation
+                return frame
+
+        return self._capture_frame()
+
+    def take_screenshot(self, region=None) -> Optional[np.ndarray]:
+        """Take screenshot using ADB
+
+        Args:
+            region: Optional (x, y, w, h) crop. In raw mode only the cropped
+                pixels are converted to RGB.
+        """
+        frame = self.take_frame()
+        if frame is None:
+            return None
+        return frame.roi(region).rgb
+
+    def _capture_frame(self) -> Optional[Frame]:
+        """Capture a new frame with the configured screencap mode"""
+        if self.screencap_mode == "h264":
+            image = self.take_stream_frame()
+            if image is not None:
+                return Frame(image, "RGB")
+
+        # The h264 stream uses raw screencap until its first frame arrives
+        if self.screencap_mode in ("raw", "h264") and self._raw_supported:
+            raw = self.take_screenshot_raw()
+            if raw is not None:
+                pixels, pixel_format = raw
+                return Frame(pixels, RAW_PIXEL_FORMATS[pixel_format])
+
+            # Device does not give us a usable framebuffer, stick to PNG
+            print("[ADB] Falling back to PNG screencap")
+            self._raw_supported = False
+
+        # Take screenshot using ADB
+        data = self._exec_out("screencap -p")
+        if data is None:
+            print("[ADB] Screenshot error")
+            return None
+
+        # Convert bytes to numpy array
+        nparr = np.frombuffer(data, np.uint8)
+        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+        if img is not None:
+            # imdecode cannot decode into an existing buffer
+            allocation_stats.record_allocation(len(data) + img.nbytes)
+
+            # Screenshot is already in correct portrait orientation (720x1280)
+            # height, width = img.shape[:2]
+            # print(f"[ADB] Screenshot dimensions: {width}x{height}")
+
+            return Frame(img, "BGR")
+        else:
+            print("[ADB] Failed to decode screenshot")
             return None
 
     def check_screen_resolution(
@@ -254,35 +731,59 @@ class ADBController:
 class MumuAutoDetector:
     """Auto-detect and connect to Mumu Player instances"""
 
-    def __init__(self):
+    def __init__(self, transport: str = ADB_TRANSPORT):
         self.adb_binary = "adb"
         self.mumu_ports = list(range(16384, 17409))  # Mumu12 port range
         self.connected_device = None
+        self.transport = transport
+        self.client = get_adb_client() if transport == "socket" else None
 
     def list_devices(self) -> List[dict]:
         """List all available ADB devices"""
         try:
+            if self.client is not None:
+                pairs = self.client.devices()
+            else:
+                result = subprocess.run(
+                    [self.adb_binary, "devices"],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                )
+                pairs = []
+                lines = result.stdout.strip().split("\n")[1:]  # Skip header
+                for line in lines:
+                    if line.strip():
+                        parts = line.strip().split("\t")
+                        if len(parts) == 2:
+                            pairs.append((parts[0], parts[1]))
+
+            return [
+                {
+                    "serial": serial,
+                    "status": status,
+                    "port": self._extract_port(serial),
+                }
+                for serial, status in pairs
+            ]
+        except (subprocess.CalledProcessError, FileNotFoundError, ADBError):
+            return []
+
+    def _adb_connect(self, serial: str) -> Optional[str]:
+        """Run `adb connect` and return its message, or None on failure"""
+        try:
+            if self.client is not None:
+                return self.client.connect(serial)
+
             result = subprocess.run(
-                [self.adb_binary, "devices"], check=True, capture_output=True, text=True
+                [self.adb_binary, "connect", serial],
+                check=True,
+                capture_output=True,
+                text=True,
             )
-
-            devices = []
-            lines = result.stdout.strip().split("\n")[1:]  # Skip header
-            for line in lines:
-                if line.strip():
-                    parts = line.strip().split("\t")
-                    if len(parts) == 2:
-                        serial, status = parts
-                        devices.append(
-                            {
-                                "serial": serial,
-                                "status": status,
-                                "port": self._extract_port(serial),
-                            }
-                        )
-            return devices
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return []
+            return result.stdout
+        except (subprocess.CalledProcessError, ADBError):
+            return None
 
     def _extract_port(self, serial: str) -> int:
         """Extract port number from serial"""
@@ -311,18 +812,10 @@ class MumuAutoDetector:
 
         # Try connecting to known Mumu ports
         for port in [16384, 16385, 16386, 16387, 16388]:  # Common Mumu ports
-            try:
-                result = subprocess.run(
-                    [self.adb_binary, "connect", f"127.0.0.1:{port}"],
-                    check=True,
-                    capture_output=True,
-                    text=True,
-                )
-                print(
-                    f"[MUMU] Tried connecting to 127.0.0.1:{port}: {result.stdout.strip()}"
-                )
-            except subprocess.CalledProcessError:
+            message = self._adb_connect(f"127.0.0.1:{port}")
+            if message is None:
                 continue
+            print(f"[MUMU] Tried connecting to 127.0.0.1:{port}: {message.strip()}")
 
         # Get list of all devices
         devices = self.list_devices()
@@ -354,7 +847,9 @@ class MumuAutoDetector:
 
         # Create ADB controller for the selected device
         host, port = selected_device["serial"].split(":")
-        self.connected_device = ADBController(host, int(port))
+        self.connected_device = ADBController(
+            host, int(port), transport=self.transport
+        )
 
         if self.connected_device.is_connected():
             print(f"[MUMU] Successfully connected to {selected_device['serial']}")
@@ -369,16 +864,8 @@ class MumuAutoDetector:
 
     def test_connection(self, serial: str) -> bool:
         """Test if a specific serial is accessible"""
-        try:
-            result = subprocess.run(
-                [self.adb_binary, "connect", serial],
-                check=True,
-                capture_output=True,
-                text=True,
-            )
-            return "connected" in result.stdout.lower()
-        except subprocess.CalledProcessError:
-            return False
+        message = self._adb_connect(serial)
+        return message is not None and "connected" in message.lower()
 
     def check_mumu_resolution(
         self, expected_width: int = 720, expected_height: int = 1280
@@ -482,49 +969,33 @@ def adb_scroll(distance: int, start_x: int = None, start_y: int = None) -> bool:
     """
     controller = get_adb_controller()
     if controller and controller.is_connected():
-        # Use ADB shell input swipe for scrolling
-        try:
-            # Get screen size to calculate center
-            width, height = controller.get_screen_size()
-            if width == 0 or height == 0:
-                # Fallback to default phone size
-                width, height = 720, 1280
-
-            # Use custom coordinates if provided, otherwise use screen center
-            if start_x is None:
-                start_x = width // 2
-            if start_y is None:
-                start_y = height // 2
-
-            # Calculate swipe distance (positive for up, negative for down)
-            if distance > 0:
-                # Scroll up: swipe from bottom to top
-                swipe_start_y = start_y + abs(distance) // 2
-                swipe_end_y = start_y - abs(distance) // 2
-            else:
-                # Scroll down: swipe from top to bottom
-                swipe_start_y = start_y - abs(distance) // 2
-                swipe_end_y = start_y + abs(distance) // 2
-
-            # Execute swipe command
-            cmd = [
-                "adb",
-                "-s",
-                controller.device_id,
-                "shell",
-                "input",
-                "swipe",
-                str(start_x),
-                str(swipe_start_y),
-                str(start_x),
-                str(swipe_end_y),
-            ]
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-
-            print(f"[ADB] Scrolled {distance} pixels from ({start_x}, {start_y})")
-            return True
+        # Get screen size to calculate center
+        width, height = controller.get_screen_size()
+        if width == 0 or height == 0:
+            # Fallback to default phone size
+            width, height = 720, 1280
+
+        # Use custom coordinates if provided, otherwise use screen center
+        if start_x is None:
+            start_x = width // 2
+        if start_y is None:
+            start_y = height // 2
+
+        # Calculate swipe distance (positive for up, negative for down)
+        if distance > 0:
+            # Scroll up: swipe from bottom to top
+            swipe_start_y = start_y + abs(distance) // 2
+            swipe_end_y = start_y - abs(distance) // 2
+        else:
+            # Scroll down: swipe from top to bottom
+            swipe_start_y = start_y - abs(distance) // 2
+            swipe_end_y = start_y + abs(distance) // 2
 
-        except subprocess.CalledProcessError as e:
-            print(f"[ADB] Scroll error: {e}")
+        # Execute swipe through the persistent shell session
+        if not controller.swipe(start_x, swipe_start_y, start_x, swipe_end_y):
+            print("[ADB] Scroll error")
             return False
+
+        print(f"[ADB] Scrolled {distance} pixels from ({start_x}, {start_y})")
+        return True
     return False
@@ -0,0 +1,109 @@
+from typing import Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+# (n, 4) array of (x, y, w, h) boxes, or a sequence of such tuples
+Boxes = Union[np.ndarray, Sequence[Sequence[int]]]
+
+
+def as_box_array(boxes: Boxes) -> np.ndarray:
+    """(n, 4) int64 array of (x, y, w, h) boxes"""
+    return np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+
+
+def find_peaks(
+    scores: np.ndarray, threshold: float, size: Tuple[int, int]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Local maxima of a matchTemplate score map at or above threshold
+
+    A location is a peak when no score within half the template size around
+    it is higher, found with one dilation and comparison over the whole map.
+    Every pixel above threshold around a match is one candidate that way
+    instead of dozens. Equal neighbouring maxima (flat tops) are all
+    returned and left to nms_indices or dedupe_indices.
+
+    Args:
+        scores: Score map from cv2.matchTemplate
+        threshold: Minimum score of a peak
+        size: (width, height) of the template
+
+    Returns:
+        (xs, ys, scores) arrays of the peaks, in row-major order
+    """
+    width, height = size
+    kernel = np.ones((max(height // 2, 1) | 1, max(width // 2, 1) | 1), np.uint8)
+    local_max = cv2.dilate(scores, kernel)
+    ys, xs = np.nonzero((scores >= threshold) & (scores >= local_max))
+    return xs, ys, scores[ys, xs]
+
+
+def nms_indices(
+    boxes: Boxes, scores: Sequence[float], overlap_threshold: float = 0.3
+) -> np.ndarray:
+    """Indices of the boxes kept by greedy non-maximum suppression
+
+    Boxes are visited from the highest score down (ties in input order), and
+    a box is dropped when its IoU with a kept box exceeds overlap_threshold.
+    Each kept box suppresses every remaining box it overlaps at once, so the
+    Python loop runs once per kept box rather than once per pair.
+
+    Returns:
+        Indices into boxes, highest score first
+    """
+    boxes = as_box_array(boxes)
+    if not len(boxes):
+        return np.empty(0, dtype=np.intp)
+
+    order = np.argsort(-np.asarray(scores, dtype=np.float64), kind="stable")
+    x1 = boxes[order, 0]
+    y1 = boxes[order, 1]
+    x2 = x1 + boxes[order, 2]
+    y2 = y1 + boxes[order, 3]
+    areas = boxes[order, 2] * boxes[order, 3]
+
+    kept = []
+    remaining = np.arange(len(order))
+    while len(remaining):
+        best, rest = remaining[0], remaining[1:]
+        kept.append(best)
+
+        width = np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest])
+        height = np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest])
+        intersection = np.clip(width, 0, None) * np.clip(height, 0, None)
+        union = areas[best] + areas[rest] - intersection
+        iou = np.divide(
+            intersection,
+            union,
+            out=np.zeros(len(rest), dtype=np.float64),
+            where=union > 0,
+        )
+        remaining = rest[iou <= overlap_threshold]
+
+    return order[np.asarray(kept, dtype=np.intp)]
+
+
+def dedupe_indices(boxes: Boxes, min_dist: int = 5) -> np.ndarray:
+    """Indices of the boxes kept when dropping near-duplicate centers
+
+    Boxes are visited in input order, and a box is dropped when its center
+    is within min_dist pixels of a kept box's center on both axes.
+
+    Returns:
+        Indices into boxes, in input order
+    """
+    boxes = as_box_array(boxes)
+    cx = boxes[:, 0] + boxes[:, 2] // 2
+    cy = boxes[:, 1] + boxes[:, 3] // 2
+
+    kept = []
+    remaining = np.arange(len(boxes))
+    while len(remaining):
+        first, rest = remaining[0], remaining[1:]
+        kept.append(first)
+        near = (np.abs(cx[rest] - cx[first]) <= min_dist) & (
+            np.abs(cy[rest] - cy[first]) <= min_dist
+        )
+        remaining = rest[~near]
+
+    return np.asarray(kept, dtype=np.intp)
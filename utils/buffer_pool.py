@@ -0,0 +1,126 @@
+import sys
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Buffers smaller than this are cheaper to allocate than to look up
+MIN_POOLED_BYTES = 64 * 1024
+
+
+def _refcount(buffers: List[np.ndarray], index: int) -> int:
+    return sys.getrefcount(buffers[index])
+
+
+# Reference count of a pooled buffer that nobody outside the pool holds,
+# measured through the same call so it is right for this interpreter
+_UNUSED_REFCOUNT = _refcount([np.empty(1)], 0)
+
+
+class AllocationStats:
+    """Counts the image buffers allocated and reused by the capture pipeline
+
+    Totals grow for the lifetime of the process. turn_summary() reports what
+    happened since its previous call, so calling it once per turn gives the
+    bytes allocated per turn.
+    """
+
+    def __init__(self):
+        self.allocated_bytes = 0
+        self.allocations = 0
+        self.reused_bytes = 0
+        self.reuses = 0
+        self._mark = (0, 0, 0, 0)
+        self._lock = threading.Lock()
+
+    def record_allocation(self, nbytes: int):
+        with self._lock:
+            self.allocated_bytes += nbytes
+            self.allocations += 1
+
+    def record_reuse(self, nbytes: int):
+        with self._lock:
+            self.reused_bytes += nbytes
+            self.reuses += 1
+
+    def take_turn(self) -> Dict[str, int]:
+        """Return the counters accumulated since the previous call"""
+        with self._lock:
+            current = (
+                self.allocated_bytes,
+                self.allocations,
+                self.reused_bytes,
+                self.reuses,
+            )
+            previous, self._mark = self._mark, current
+        return {
+            "allocated_bytes": current[0] - previous[0],
+            "allocations": current[1] - previous[1],
+            "reused_bytes": current[2] - previous[2],
+            "reuses": current[3] - previous[3],
+        }
+
+    def turn_summary(self) -> str:
+        """One log line for the buffers allocated since the previous call"""
+        turn = self.take_turn()
+        return (
+            f"[ALLOC] {turn['allocated_bytes'] / (1 << 20):.1f} MiB allocated "
+            f"in {turn['allocations']} buffers, "
+            f"{turn['reused_bytes'] / (1 << 20):.1f} MiB reused "
+            f"in {turn['reuses']} buffers"
+        )
+
+
+class BufferPool:
+    """Fixed set of preallocated image buffers, reused across captures
+
+    acquire() hands out a buffer of the requested shape that nothing else
+    references any more, so a Frame (or any view of it) that is still in use
+    is never overwritten. At most `slots_per_shape` buffers are kept per
+    shape; when all of them are busy a one-off buffer is allocated instead.
+
+    Args:
+        slots_per_shape: Buffers kept for each (shape, dtype)
+        stats: AllocationStats receiving allocation and reuse counts
+    """
+
+    def __init__(self, slots_per_shape: int = 4, stats: AllocationStats = None):
+        self.slots_per_shape = slots_per_shape
+        self.stats = stats if stats is not None else AllocationStats()
+        self._buffers: Dict[Tuple, List[np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        """Return an uninitialised buffer of the given shape"""
+        shape = tuple(int(size) for size in shape)
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        if nbytes < MIN_POOLED_BYTES:
+            self.stats.record_allocation(nbytes)
+            return np.empty(shape, dtype)
+
+        with self._lock:
+            buffers = self._buffers.setdefault((shape, dtype.str), [])
+            for index in range(len(buffers)):
+                if _refcount(buffers, index) <= _UNUSED_REFCOUNT:
+                    self.stats.record_reuse(nbytes)
+                    return buffers[index]
+
+            buffer = np.empty(shape, dtype)
+            if len(buffers) < self.slots_per_shape:
+                buffers.append(buffer)
+
+        self.stats.record_allocation(nbytes)
+        return buffer
+
+    def clear(self):
+        """Drop every pooled buffer"""
+        with self._lock:
+            self._buffers = {}
+
+
+# Capture pipeline totals, reported per turn by the career loop
+allocation_stats = AllocationStats()
+
+# Pool shared by screen capture, colour conversion and resizing
+frame_pool = BufferPool(stats=allocation_stats)
@@ -0,0 +1,126 @@
+import abc
+import sys
+import threading
+import time
+from typing import Dict, List
+
+
+def _caller_site(depth: int) -> str:
+    """module.function of the frame `depth` levels above the caller"""
+    caller = sys._getframe(depth + 1)
+    return f"{caller.f_globals.get('__name__', '?')}.{caller.f_code.co_name}"
+
+
+class Clock(abc.ABC):
+    """Source of the current time and of sleeps for the bot's decision loop
+
+    Every sleep is accounted to a call site, given explicitly or taken from
+    the calling function (e.g. "core.execute.race_day"), so sleep_report()
+    shows which waits a career spends its time in.
+    """
+
+    def __init__(self):
+        self.started = self.now()
+        self.sleeps: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def now(self) -> float:
+        """Current time in seconds"""
+
+    @abc.abstractmethod
+    def _wait(self, seconds: float):
+        """Block for `seconds`, or move a virtual clock forward by them"""
+
+    def sleep(self, seconds: float, site: str = None):
+        """Sleep and account the time to `site` (the caller by default)"""
+        if seconds <= 0:
+            return
+        if site is None:
+            site = _caller_site(1)
+        self._wait(seconds)
+        with self._lock:
+            total = self.sleeps.setdefault(site, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+
+    def sleep_report(self, limit: int = 10) -> str:
+        """Share of the elapsed time spent sleeping, by call site"""
+        elapsed = max(self.now() - self.started, 1e-9)
+        with self._lock:
+            rows = sorted(
+                self.sleeps.items(), key=lambda item: item[1][0], reverse=True
+            )
+            slept = sum(seconds for seconds, _ in self.sleeps.values())
+
+        lines = [
+            f"[CLOCK] Slept {slept:.1f}s of {elapsed:.1f}s ({slept / elapsed:.0%})"
+        ]
+        for site, (seconds, calls) in rows[:limit]:
+            lines.append(
+                f"  {site:<40} {seconds:8.1f}s in {calls} sleeps "
+                f"({seconds / elapsed:.1%})"
+            )
+        return "\n".join(lines)
+
+
+class SystemClock(Clock):
+    """Wall-clock time and real sleeps, used in production"""
+
+    def now(self) -> float:
+        return time.time()
+
+    def _wait(self, seconds: float):
+        time.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """Clock that only moves when slept on or advanced
+
+    Sleeps return immediately after moving the clock forward, so replaying
+    recorded frames runs every wait and search timeout at CPU speed.
+
+    Args:
+        start: Initial time in seconds
+    """
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+        self._time_lock = threading.Lock()
+        super().__init__()
+
+    def now(self) -> float:
+        return self._now
+
+    def advance(self, seconds: float):
+        """Move the clock forward, e.g. by the modelled cost of a capture"""
+        with self._time_lock:
+            self._now += seconds
+
+    def _wait(self, seconds: float):
+        self.advance(seconds)
+
+
+# Global clock instance
+_clock: Clock = SystemClock()
+
+
+def get_clock() -> Clock:
+    return _clock
+
+
+def set_clock(clock: Clock) -> Clock:
+    """Make `clock` the clock of every timed module and return the previous one"""
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+
+def now() -> float:
+    """Current time of the active clock"""
+    return _clock.now()
+
+
+def sleep(seconds: float, site: str = None):
+    """Sleep on the active clock, accounted to `site` (the caller by default)"""
+    _clock.sleep(seconds, site if site is not None else _caller_site(1))
@@ -1,5 +1,5 @@
 # Desktop region coordinates (1920x1080)
-SUPPORT_CARD_ICON_REGION_DESKTOP = (845, 155, 945, 700)
+SUPPORT_CARD_ICON_REGION_DESKTOP = (845, 155, 945 - 845, 700 - 155)
 MOOD_REGION_DESKTOP = (705, 125, 805 - 705, 150 - 125)
 TURN_REGION_DESKTOP = (260, 65, 370 - 260, 140 - 65)
 FAILURE_REGION_DESKTOP = (250, 770, 855 - 295, 835 - 770)
@@ -7,6 +7,9 @@ YEAR_REGION_DESKTOP = (255, 35, 420 - 255, 60 - 35)
 CRITERIA_REGION_DESKTOP = (455, 85, 625 - 455, 115 - 85)
 SKILL_PTS_REGION_DESKTOP = (755, 777, 76, 40)
 EVENT_NAME_REGION_DESKTOP = (220, 190, 500 - 220, 230 - 190)
+# Lower part of the game window, where race, view results and next buttons
+# (and the race confirmation dialog) appear
+RACE_BUTTONS_REGION_DESKTOP = (220, 640, 950 - 220, 1080 - 640)
 
 # Phone region coordinates (720x1280)
 SUPPORT_CARD_ICON_REGION_PHONE = (590, 184, 680 - 590, 1014 - 184)
@@ -17,6 +20,7 @@ YEAR_REGION_PHONE = (16, 41, 236 - 16, 66 - 41)
 CRITERIA_REGION_PHONE = (251, 101, 535 - 251, 131 - 101)
 SKILL_PTS_REGION_PHONE = (610, 921, 685 - 610, 968 - 921)
 EVENT_NAME_REGION_PHONE = (100, 230, 400 - 100, 290 - 230)
+RACE_BUTTONS_REGION_PHONE = (0, 800, 720, 1280 - 800)
 
 # Default regions (for backward compatibility - uses desktop by default)
 SUPPORT_CARD_ICON_REGION = SUPPORT_CARD_ICON_REGION_DESKTOP
@@ -27,6 +31,7 @@ YEAR_REGION = YEAR_REGION_DESKTOP
 CRITERIA_REGION = CRITERIA_REGION_DESKTOP
 SKILL_PTS_REGION = SKILL_PTS_REGION_DESKTOP
 EVENT_NAME_REGION = EVENT_NAME_REGION_DESKTOP
+RACE_BUTTONS_REGION = RACE_BUTTONS_REGION_DESKTOP
 
 MOOD_LIST = ["AWFUL", "BAD", "NORMAL", "GOOD", "GREAT", "UNKNOWN"]
 
@@ -52,6 +57,7 @@ def get_regions_for_mode():
                 "CRITERIA_REGION": CRITERIA_REGION_PHONE,
                 "SKILL_PTS_REGION": SKILL_PTS_REGION_PHONE,
                 "EVENT_NAME_REGION": EVENT_NAME_REGION_PHONE,
+                "RACE_BUTTONS_REGION": RACE_BUTTONS_REGION_PHONE,
             }
         else:
             # Return desktop regions
@@ -64,6 +70,7 @@ def get_regions_for_mode():
                 "CRITERIA_REGION": CRITERIA_REGION_DESKTOP,
                 "SKILL_PTS_REGION": SKILL_PTS_REGION_DESKTOP,
                 "EVENT_NAME_REGION": EVENT_NAME_REGION_DESKTOP,
+                "RACE_BUTTONS_REGION": RACE_BUTTONS_REGION_DESKTOP,
             }
     except Exception:
         # Fallback to desktop regions
@@ -76,4 +83,5 @@ def get_regions_for_mode():
             "CRITERIA_REGION": CRITERIA_REGION_DESKTOP,
             "SKILL_PTS_REGION": SKILL_PTS_REGION_DESKTOP,
             "EVENT_NAME_REGION": EVENT_NAME_REGION_DESKTOP,
+            "RACE_BUTTONS_REGION": RACE_BUTTONS_REGION_DESKTOP,
         }
@@ -0,0 +1,277 @@
+import zlib
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from utils.buffer_pool import frame_pool
+
+# cvtColor codes from each storage layout to RGB, BGR and grayscale
+_TO_RGB = {
+    "BGR": cv2.COLOR_BGR2RGB,
+    "RGBA": cv2.COLOR_RGBA2RGB,
+    "BGRA": cv2.COLOR_BGRA2RGB,
+}
+_TO_BGR = {
+    "RGB": cv2.COLOR_RGB2BGR,
+    "RGBA": cv2.COLOR_RGBA2BGR,
+    "BGRA": cv2.COLOR_BGRA2BGR,
+}
+_TO_GRAY = {
+    "RGB": cv2.COLOR_RGB2GRAY,
+    "BGR": cv2.COLOR_BGR2GRAY,
+    "RGBA": cv2.COLOR_RGBA2GRAY,
+    "BGRA": cv2.COLOR_BGRA2GRAY,
+}
+
+
+class Frame:
+    """A captured screen image, decoded once and shared by every reader
+
+    The pixels are kept in whatever layout the capture produced (RGB from the
+    H.264 stream, BGR from PNG decode, RGBA from raw screencap, BGRA from mss).
+    RGB, BGR, grayscale and scaled variants are computed on first use and
+    cached on the frame, so several matchers and OCR reads of the same frame
+    convert it only once. They are written into buffers from the shared
+    frame_pool rather than freshly allocated arrays.
+
+    roi() returns the same view for the same region, so templates matched
+    against one region share its variants. A view takes its scaled variant
+    from the frame it was cut from when that one is already computed, so
+    searches over several regions of one capture share a single resize.
+
+    Args:
+        pixels: (height, width, channels) array in the given layout
+        layout: One of "RGB", "BGR", "RGBA", "BGRA"
+        origin: Screen coordinates of the top-left pixel. Regions passed to
+            roi() are in screen coordinates.
+        generation: Capture generation number, 0 if unknown
+    """
+
+    __slots__ = (
+        "pixels",
+        "layout",
+        "origin",
+        "generation",
+        "_rgb",
+        "_bgr",
+        "_gray",
+        "_scaled",
+        "_scaled_gray",
+        "_digest",
+        "_base",
+        "_views",
+    )
+
+    def __init__(
+        self,
+        pixels: np.ndarray,
+        layout: str = "RGB",
+        origin: Tuple[int, int] = (0, 0),
+        generation: int = 0,
+    ):
+        self.pixels = pixels
+        self.layout = layout
+        self.origin = origin
+        self.generation = generation
+        self._rgb = pixels if layout == "RGB" else None
+        self._bgr = pixels if layout == "BGR" else None
+        self._gray = None
+        self._scaled = {}
+        self._scaled_gray = {}
+        self._digest = None
+        self._base = None
+        self._views = {}
+
+    def _buffer(self, channels: int = 0) -> np.ndarray:
+        """Pooled buffer with this frame's size and the given channel count"""
+        shape = self.shape + (channels,) if channels else self.shape
+        return frame_pool.acquire(shape)
+
+    @property
+    def width(self) -> int:
+        return self.pixels.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.pixels.shape[0]
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.pixels.shape[:2]
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """RGB pixels (computed once)"""
+        if self._rgb is None:
+            self._rgb = cv2.cvtColor(
+                self.pixels, _TO_RGB[self.layout], dst=self._buffer(3)
+            )
+        return self._rgb
+
+    @property
+    def bgr(self) -> np.ndarray:
+        """BGR pixels for OpenCV (computed once)"""
+        if self._bgr is None:
+            if self.layout == "BGRA":
+                # mss layout, dropping alpha needs no conversion
+                self._bgr = self.pixels[:, :, :3]
+            else:
+                self._bgr = cv2.cvtColor(
+                    self.pixels, _TO_BGR[self.layout], dst=self._buffer(3)
+                )
+        return self._bgr
+
+    @property
+    def gray(self) -> np.ndarray:
+        """Grayscale pixels (computed once)"""
+        if self._gray is None:
+            self._gray = cv2.cvtColor(
+                self.pixels, _TO_GRAY[self.layout], dst=self._buffer()
+            )
+        return self._gray
+
+    @property
+    def digest(self) -> int:
+        """CRC32 of the pixels, equal for identical captures of the same area
+
+        Computed once on the stored pixels, before any colour conversion.
+        """
+        if self._digest is None:
+            digest = zlib.crc32(f"{self.layout}{self.pixels.shape}".encode())
+            if self.pixels.flags.c_contiguous:
+                digest = zlib.crc32(self.pixels, digest)
+            else:
+                # Rows of a region view are contiguous, the view as a whole is not
+                for row in self.pixels:
+                    digest = zlib.crc32(row, digest)
+            self._digest = digest
+        return self._digest
+
+    def _scaled_variant(self, factor: float):
+        """(image, left, top, ratio_x, ratio_y) of the factor variant
+
+        left and top are the screen coordinates of the image's top-left
+        pixel, and one image pixel spans ratio_x by ratio_y screen pixels.
+        """
+        variant = self._scaled.get(factor)
+        if variant is not None:
+            return variant
+
+        if factor == 1.0:
+            variant = (self.bgr, self.origin[0], self.origin[1], 1.0, 1.0)
+        elif self._base is None or factor not in self._base._scaled:
+            # Same size rounding as imutils.resize(image, width=...)
+            width = int(self.width * factor)
+            height = int(self.height * (width / float(self.width)))
+            image = cv2.resize(
+                self.bgr,
+                (width, height),
+                dst=frame_pool.acquire((height, width, 3)),
+                interpolation=cv2.INTER_AREA,
+            )
+            variant = (
+                image,
+                self.origin[0],
+                self.origin[1],
+                self.width / float(width),
+                self.height / float(height),
+            )
+        else:
+            # Slice the resize of the whole capture instead of resizing again
+            image, left, top, ratio_x, ratio_y = self._base._scaled_variant(factor)
+            x0 = int(round((self.origin[0] - left) / ratio_x))
+            y0 = int(round((self.origin[1] - top) / ratio_y))
+            x1 = int(round((self.origin[0] + self.width - left) / ratio_x))
+            y1 = int(round((self.origin[1] + self.height - top) / ratio_y))
+            variant = (
+                image[y0:y1, x0:x1],
+                left + x0 * ratio_x,
+                top + y0 * ratio_y,
+                ratio_x,
+                ratio_y,
+            )
+        self._scaled[factor] = variant
+        return variant
+
+    def scaled(self, factor: float) -> np.ndarray:
+        """BGR pixels resized by factor (computed once per factor)"""
+        return self._scaled_variant(factor)[0]
+
+    def scaled_gray(self, factor: float) -> np.ndarray:
+        """Grayscale of scaled(factor) (computed once per factor)"""
+        image = self._scaled_gray.get(factor)
+        if image is None:
+            scaled = self.scaled(factor)
+            image = cv2.cvtColor(
+                scaled,
+                cv2.COLOR_BGR2GRAY,
+                dst=frame_pool.acquire(scaled.shape[:2]),
+            )
+            self._scaled_gray[factor] = image
+        return image
+
+    def scaled_to_screen(
+        self, factor: float, x: float, y: float
+    ) -> Tuple[float, float]:
+        """Screen coordinates of a pixel position in scaled(factor)"""
+        _, left, top, ratio_x, ratio_y = self._scaled_variant(factor)
+        return left + x * ratio_x, top + y * ratio_y
+
+    def screen_to_scaled(
+        self, factor: float, x: float, y: float
+    ) -> Tuple[float, float]:
+        """Pixel position in scaled(factor) of screen coordinates"""
+        _, left, top, ratio_x, ratio_y = self._scaled_variant(factor)
+        return (x - left) / ratio_x, (y - top) / ratio_y
+
+    @property
+    def half(self) -> np.ndarray:
+        """Half-scale BGR pixels (computed once)"""
+        return self.scaled(0.5)
+
+    def roi(self, region: Optional[Tuple[int, int, int, int]]) -> "Frame":
+        """Return a view of a (x, y, w, h) screen region without copying
+
+        Variants already computed on this frame are sliced as well.
+        """
+        if not region:
+            return self
+        region = tuple(region)
+        view = self._views.get(region)
+        if view is not None:
+            return view
+
+        x, y, w, h = region
+        x -= self.origin[0]
+        y -= self.origin[1]
+        rows = slice(max(y, 0), max(y + h, 0))
+        cols = slice(max(x, 0), max(x + w, 0))
+
+        view = Frame(
+            self.pixels[rows, cols],
+            self.layout,
+            (self.origin[0] + cols.start, self.origin[1] + rows.start),
+            self.generation,
+        )
+        view._base = self._base if self._base is not None else self
+        if self._rgb is not None:
+            view._rgb = self._rgb[rows, cols]
+        if self._bgr is not None:
+            view._bgr = self._bgr[rows, cols]
+        if self._gray is not None:
+            view._gray = self._gray[rows, cols]
+        self._views[region] = view
+        return view
+
+    def to_pil(self) -> Image.Image:
+        """Return an RGB PIL image"""
+        return Image.fromarray(self.rgb)
+
+
+def as_rgb_array(image) -> np.ndarray:
+    """Return RGB pixels of a Frame, PIL image or array"""
+    if isinstance(image, Frame):
+        return image.rgb
+    return np.asarray(image)
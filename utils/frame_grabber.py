@@ -0,0 +1,101 @@
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+
+class FrameGrabber:
+    """Captures frames continuously on a producer thread
+
+    The producer fills the back slot of a double buffer and swaps it to the
+    front once the frame is complete, so readers never see a half-written
+    frame and never wait for a capture. Every published frame gets the next
+    generation number, which lets callers ask for a frame that was captured
+    after some event (e.g. a tap).
+
+    Args:
+        capture: Callable returning a new frame, or None on failure
+        interval: Minimum seconds between two captures
+    """
+
+    def __init__(
+        self, capture: Callable[[], Optional[np.ndarray]], interval: float = 0.0
+    ):
+        self.capture = capture
+        self.interval = interval
+        self._slots = [None, None]
+        self._front = 0
+        self._generation = 0
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """Start the producer thread"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the producer thread"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        with self._condition:
+            self._condition.notify_all()
+
+    def is_running(self) -> bool:
+        return self._running
+
+    @property
+    def generation(self) -> int:
+        """Generation number of the newest published frame (0 before the first)"""
+        with self._condition:
+            return self._generation
+
+    def _run(self):
+        while self._running:
+            started = time.time()
+            try:
+                frame = self.capture()
+            except Exception as e:
+                print(f"[CAPTURE] Background capture error: {e}")
+                frame = None
+
+            if frame is not None:
+                back = 1 - self._front
+                self._slots[back] = frame
+                with self._condition:
+                    self._front = back
+                    self._generation += 1
+                    self._condition.notify_all()
+            else:
+                # Do not spin on a broken device connection
+                time.sleep(0.5)
+
+            remaining = self.interval - (time.time() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def latest(self) -> Tuple[int, Optional[np.ndarray]]:
+        """Return (generation, frame) of the newest frame without waiting"""
+        with self._condition:
+            return self._generation, self._slots[self._front]
+
+    def wait_for_newer(
+        self, generation: int, timeout: float = 2.0
+    ) -> Tuple[int, Optional[np.ndarray]]:
+        """Wait for a frame with a generation greater than the given one
+
+        Returns the newest (generation, frame) when one arrives, or the
+        current one if the timeout expires first.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._generation > generation or not self._running, timeout
+            )
+            return self._generation, self._slots[self._front]
@@ -1,12 +1,18 @@
 import cv2
-import numpy as np
-from PIL import Image
 import json
-import pyautogui
 import os
-import time
 from datetime import datetime
 
+from utils import clock
+from utils.boxes import nms_indices
+from utils.templates import (
+    BEST_SCALES,
+    load_template,
+    template_spec,
+)
+from utils.timing import timed_search
+from utils.vision import vision
+
 # Load config
 try:
     with open("config.json", "r", encoding="utf-8") as file:
@@ -15,7 +21,6 @@ except FileNotFoundError:
     config = {"usePhone": False}
 
 USE_PHONE = config.get("usePhone", False)
-BEST_SCALES = 0.8
 
 def save_debug_image(
     screenshot,
@@ -60,497 +65,479 @@ def save_debug_image(
         print(f"[DEBUG] Failed to save debug images: {e}")
 
 
+def _search_spec(spec, confidence, region, search):
+    """Search a manifest template, then its fallback variants in order
+
+    The manifest supplies the confidence and region the caller left as None.
+    """
+    if confidence is None:
+        confidence = spec.confidence
+    if region is None:
+        region = spec.region
+    for path in spec.paths:
+        result = search(path, confidence, region)
+        if result is not None:
+            return result
+    return None
+
+
 def locate_center_on_screen(
-    template_path, confidence=0.8, min_search_time=0.2, region=None
+    template_path,
+    confidence=None,
+    min_search_time=0.2,
+    region=None,
+    frame=None,
+    site=None,
+    scale=None,
 ):
     """
     Locate template image on screen, works with both desktop and phone screenshots
+
+    `template_path` is an image file or a logical name from
+    assets/manifest.json, whose confidence, region, scale and fallback
+    variants are used for whatever is not given here. Plain files default to
+    a confidence of 0.8, and are matched at BEST_SCALES on phone and at full
+    size on desktop.
+
+    A call site name in `site` records how long the template takes to appear
+    there, and lets the search time be derived from those timings.
     """
+    if site is not None and frame is None:
+        # One timed search per call site, across every variant of a template
+        return timed_search(
+            site,
+            min_search_time,
+            lambda timeout: locate_center_on_screen(
+                template_path, confidence, timeout, region, scale=scale
+            ),
+        )
+    spec = template_spec(template_path)
+    if spec is not None:
+        return _search_spec(
+            spec,
+            confidence,
+            region,
+            lambda path, confidence, region: locate_center_on_screen(
+                path,
+                confidence,
+                min_search_time,
+                region,
+                frame,
+                scale=scale or spec.scale,
+            ),
+        )
+    if confidence is None:
+        confidence = 0.8
+
     if USE_PHONE:
         return locate_center_on_phone(
-            template_path, confidence, min_search_time, region
+            template_path,
+            confidence,
+            min_search_time,
+            region,
+            frame,
+            scale or BEST_SCALES,
         )
     else:
         return locate_center_on_desktop(
-            template_path, confidence, min_search_time, region
+            template_path,
+            confidence,
+            min_search_time,
+            region,
+            frame,
+            scale or 1.0,
         )
 
 
-def locate_center_on_phone(
-    template_path, confidence=0.8, min_search_time=1, region=None
-):
-    """Locate template image on phone screenshot using improved OpenCV + imutils"""
-    try:
+def _poll_phone(query, min_search_time, frame, fallback):
+    """Run query on phone captures until it finds something or time runs out
+
+    query takes a full Frame and returns a result, falsy when nothing was
+    found. A given frame is searched once. fallback() is returned instead
+    when no phone capture can be taken.
+    """
+    controller = None
+    if frame is None:
+        # A given frame needs no device (e.g. in the pipeline's vision process)
         from utils.adb_utils import get_adb_controller
-        import imutils
 
         controller = get_adb_controller()
-
         if not controller or not controller.is_connected():
             print("[WARNING] ADB not connected, falling back to desktop")
-            return locate_center_on_desktop(
-                template_path, confidence, min_search_time, region
-            )
+            return fallback()
+
+    start_time = clock.now()
+    while True:
+        # Use the given frame, or take a phone screenshot
+        source = frame if frame is not None else controller.take_frame()
+        if source is None:
+            print("[WARNING] Could not take phone screenshot, falling back to desktop")
+            return fallback()
+
+        result = query(source)
+        if result:
+            return result
+
+        # A given frame does not change, so retrying cannot help
+        if frame is not None or clock.now() - start_time >= min_search_time:
+            return result
+        clock.sleep(0.05)  # Small delay between retries
+
+
+def _find(screen, template_path, confidence, scale=BEST_SCALES):
+    """Best Match of a template in a screen Frame, from the shared vision engine"""
+    match = vision.find(screen, template_path, confidence, scale)
+
+    # Save debug images for manual verification
+    if match is not None and config.get("saveDebugImages", False):
+        save_debug_image(
+            screen.bgr,
+            load_template(template_path),
+            (
+                match.left - screen.origin[0],
+                match.top - screen.origin[1],
+                match.width,
+                match.height,
+            ),
+            match.confidence,
+            template_path,
+        )
+    return match
 
-        start_time = time.time()
-        max_search_time = min_search_time
-
-        while time.time() - start_time < max_search_time:
-            # Take phone screenshot
-            screenshot = controller.take_screenshot()
-
-            # Convert RGB to BGR for cv2.imwrite
-            if screenshot is None:
-                print(
-                    "[WARNING] Could not take phone screenshot, falling back to desktop"
-                )
-                return locate_center_on_desktop(
-                    template_path, confidence, min_search_time, region
-                )
-
-            # Convert to OpenCV format
-            screenshot_cv = cv2.cvtColor(screenshot, cv2.COLOR_RGB2BGR)
-
-            # Load template
-            template = cv2.imread(template_path, cv2.IMREAD_COLOR)
-            if template is None:
-                print(f"[ERROR] Could not load template: {template_path}")
-                return None
-
-            # Crop screenshot to region if specified
-            if region:
-                x, y, w, h = region
-                screenshot_cv = screenshot_cv[y : y + h, x : x + w]
-
-            # Use imutils for better template matching with multiple scales
-            # This improves detection accuracy significantly
-            (tH, tW) = template.shape[:2]
-
-            # Try multiple scales for better detection
-            scales = [BEST_SCALES]
-            best_match = None
-            best_confidence = 0
-            best_scale = 1.0
-
-            for scale in scales:
-                # Resize the image according to the scale
-                resized = imutils.resize(
-                    screenshot_cv, width=int(screenshot_cv.shape[1] * scale)
-                )
-                r = screenshot_cv.shape[1] / float(resized.shape[1])
-
-                # If the resized image is smaller than the template, break
-                if resized.shape[0] < tH or resized.shape[1] < tW:
-                    break
-
-                # Apply template matching
-                result = cv2.matchTemplate(resized, template, cv2.TM_CCOEFF_NORMED)
-                (_, maxVal, _, maxLoc) = cv2.minMaxLoc(result)
-
-                # If we have found a new maximum correlation value, then update
-                if maxVal > best_confidence:
-                    best_confidence = maxVal
-                    best_scale = scale
-                    best_match = maxLoc
-                    best_r = r
-
-            # If we found a match above our confidence threshold
-            if best_confidence >= confidence:
-                # Calculate the center point
-                (startX, startY) = (
-                    int(best_match[0] * best_r),
-                    int(best_match[1] * best_r),
-                )
-                (endX, endY) = (
-                    int((best_match[0] + tW) * best_r),
-                    int((best_match[1] + tH) * best_r),
-                )
-
-                center_x = startX + (endX - startX) // 2
-                center_y = startY + (endY - startY) // 2
-
-                # Adjust coordinates if region was specified
-                if region:
-                    center_x += region[0]
-                    center_y += region[1]
-
-                # print(
-                #     f"[PHONE] Found {template_path} at ({center_x}, {center_y}) with confidence {best_confidence:.3f} (scale: {best_scale})"
-                # )
-
-                # Save debug images for manual verification
-                if config.get("saveDebugImages", False):
-                    match_location = (startX, startY, endX - startX, endY - startY)
-                    save_debug_image(
-                        screenshot_cv,
-                        template,
-                        match_location,
-                        best_confidence,
-                        template_path,
-                    )
-
-                return pyautogui.Point(center_x, center_y)
-
-            # If no match found and we still have time, wait a bit before retrying
-            if time.time() - start_time < max_search_time:
-                time.sleep(0.05)  # Small delay between retries
-
-        # If we reach here, no match was found within the time limit
-        # print(f"[PHONE] {template_path} not found within {min_search_time}s (best confidence: {best_confidence:.3f})")
-        return None
 
+def _find_on_phone(
+    template_path,
+    confidence,
+    min_search_time,
+    region,
+    frame,
+    fallback,
+    scale=BEST_SCALES,
+):
+    """Best Match of a template on phone captures, matched at the given scale"""
+    return _poll_phone(
+        lambda source: _find(source.roi(region), template_path, confidence, scale),
+        min_search_time,
+        frame,
+        fallback,
+    )
+
+
+def locate_center_on_phone(
+    template_path,
+    confidence=0.8,
+    min_search_time=1,
+    region=None,
+    frame=None,
+    scale=BEST_SCALES,
+):
+    """Locate template image on phone screenshot
+
+    Returns the best Match above confidence, which unpacks as its center
+    point. When a Frame is given it is searched once instead of taking new
+    screenshots.
+    """
+    try:
+        return _find_on_phone(
+            template_path,
+            confidence,
+            min_search_time,
+            region,
+            frame,
+            lambda: locate_center_on_desktop(
+                template_path, confidence, min_search_time, region
+            ),
+            scale,
+        )
     except Exception as e:
         print(f"[PHONE] Image recognition error: {e}")
+        return None
+
+
+def _find_on_desktop(
+    template_path, confidence, min_search_time, region, frame, scale=1.0
+):
+    """Best Match of a template on desktop captures until min_search_time runs out
+
+    Captures come from the shared mss session and are matched by the same
+    vision engine as phone captures, at full size unless the manifest gives
+    a scale. A given frame, or the screenshot of an active frame_snapshot()
+    block, is searched once. Parts of a region outside the snapshot (the
+    game window) are grabbed on their own, a given frame is only cropped.
+    """
+    from utils.screenshot import (
+        FULL_SCREEN,
+        crop_frame,
+        get_game_rect,
+        grab_frame,
+        snapshot_frame,
+    )
+
+    start_time = clock.now()
+    while True:
+        source = frame if frame is not None else snapshot_frame()
+        if frame is not None:
+            screen = frame.roi(region)
+        elif source is not None:
+            screen = crop_frame(source, region)
+        else:
+            screen = grab_frame(region or get_game_rect() or FULL_SCREEN)
+
+        match = _find(screen, template_path, confidence, scale)
+        if match is not None:
+            return match
+
+        if source is not None or clock.now() - start_time >= min_search_time:
+            return None
+        clock.sleep(0.05)  # Small delay between retries
+
 
 def locate_center_on_desktop(
-    template_path, confidence=0.8, min_search_time=0.2, region=None
+    template_path,
+    confidence=0.8,
+    min_search_time=0.2,
+    region=None,
+    frame=None,
+    scale=1.0,
 ):
-    """Locate template image on desktop screenshot using pyautogui"""
+    """Locate template image on desktop screenshot
+
+    Returns the best Match above confidence, which unpacks as its center point.
+    """
     try:
-        if region:
-            return pyautogui.locateCenterOnScreen(
-                template_path,
-                confidence=confidence,
-                minSearchTime=min_search_time,
-                region=region,
-            )
-        else:
-            return pyautogui.locateCenterOnScreen(
-                template_path, confidence=confidence, minSearchTime=min_search_time
-            )
+        return _find_on_desktop(
+            template_path, confidence, min_search_time, region, frame, scale
+        )
     except Exception as e:
         print(f"[DESKTOP] Image recognition error: {e}")
         return None
 
 
-def locate_on_screen(template_path, confidence=0.8, min_search_time=0.2, region=None):
+def locate_on_screen(
+    template_path,
+    confidence=None,
+    min_search_time=0.2,
+    region=None,
+    frame=None,
+    site=None,
+    scale=None,
+):
     """
     Locate template image on screen (returns full location), works with both desktop and phone screenshots
+
+    See locate_center_on_screen for logical template names, `site` and `scale`.
     """
+    if site is not None and frame is None:
+        # One timed search per call site, across every variant of a template
+        return timed_search(
+            site,
+            min_search_time,
+            lambda timeout: locate_on_screen(
+                template_path, confidence, timeout, region, scale=scale
+            ),
+        )
+    spec = template_spec(template_path)
+    if spec is not None:
+        return _search_spec(
+            spec,
+            confidence,
+            region,
+            lambda path, confidence, region: locate_on_screen(
+                path,
+                confidence,
+                min_search_time,
+                region,
+                frame,
+                scale=scale or spec.scale,
+            ),
+        )
+    if confidence is None:
+        confidence = 0.8
+
     if USE_PHONE:
-        return locate_on_phone(template_path, confidence, min_search_time, region)
+        return locate_on_phone(
+            template_path,
+            confidence,
+            min_search_time,
+            region,
+            frame,
+            scale or BEST_SCALES,
+        )
     else:
-        return locate_on_desktop(template_path, confidence, min_search_time, region)
-
-
-def locate_on_phone(template_path, confidence=0.8, min_search_time=0.2, region=None):
-    """Locate template image on phone screenshot using improved OpenCV + imutils"""
-    try:
-        from utils.adb_utils import get_adb_controller
-        import imutils
+        return locate_on_desktop(
+            template_path,
+            confidence,
+            min_search_time,
+            region,
+            frame,
+            scale or 1.0,
+        )
 
-        controller = get_adb_controller()
 
-        if not controller or not controller.is_connected():
-            print("[WARNING] ADB not connected, falling back to desktop")
-            return locate_on_desktop(template_path, confidence, min_search_time, region)
-
-        start_time = time.time()
-        max_search_time = min_search_time
-
-        while time.time() - start_time < max_search_time:
-            # Take phone screenshot
-            screenshot = controller.take_screenshot()
-            if screenshot is None:
-                print(
-                    "[WARNING] Could not take phone screenshot, falling back to desktop"
-                )
-                return locate_on_desktop(
-                    template_path, confidence, min_search_time, region
-                )
-
-            # Convert to OpenCV format
-            screenshot_cv = cv2.cvtColor(screenshot, cv2.COLOR_RGB2BGR)
-
-            # Load template
-            template = cv2.imread(template_path, cv2.IMREAD_COLOR)
-            if template is None:
-                print(f"[ERROR] Could not load template: {template_path}")
-                return None
-
-            # Crop screenshot to region if specified
-            if region:
-                x, y, w, h = region
-                screenshot_cv = screenshot_cv[y : y + h, x : x + w]
-
-            # Use imutils for better template matching with multiple scales
-            (tH, tW) = template.shape[:2]
-
-            # Try multiple scales for better detection
-            scales = [BEST_SCALES]
-            best_match = None
-            best_confidence = 0
-            best_scale = 1.0
-
-            for scale in scales:
-                # Resize the image according to the scale
-                resized = imutils.resize(
-                    screenshot_cv, width=int(screenshot_cv.shape[1] * scale)
-                )
-                r = screenshot_cv.shape[1] / float(resized.shape[1])
-
-                # If the resized image is smaller than the template, break
-                if resized.shape[0] < tH or resized.shape[1] < tW:
-                    break
-
-                # Apply template matching
-                result = cv2.matchTemplate(resized, template, cv2.TM_CCOEFF_NORMED)
-                (_, maxVal, _, maxLoc) = cv2.minMaxLoc(result)
-
-                # If we have found a new maximum correlation value, then update
-                if maxVal > best_confidence:
-                    best_confidence = maxVal
-                    best_scale = scale
-                    best_match = maxLoc
-                    best_r = r
-
-            # If we found a match above our confidence threshold
-            if best_confidence >= confidence:
-                # Calculate the location
-                (startX, startY) = (
-                    int(best_match[0] * best_r),
-                    int(best_match[1] * best_r),
-                )
-                (endX, endY) = (
-                    int((best_match[0] + tW) * best_r),
-                    int((best_match[1] + tH) * best_r),
-                )
-
-                left = startX
-                top = startY
-                width = endX - startX
-                height = endY - startY
-
-                # Adjust coordinates if region was specified
-                if region:
-                    left += region[0]
-                    top += region[1]
-
-                # print(
-                #     f"[PHONE] Found {template_path} at ({left}, {top}, {width}, {height}) with confidence {best_confidence:.3f} (scale: {best_scale})"
-                # )
-
-                # Create a mock object similar to pyautogui's locate result
-                class MockLocation:
-                    def __init__(self, left, top, width, height):
-                        self.left = left
-                        self.top = top
-                        self.width = width
-                        self.height = height
-                        self.x = left + width // 2
-                        self.y = top + height // 2
-
-                return MockLocation(left, top, width, height)
-
-            # If no match found and we still have time, wait a bit before retrying
-            if time.time() - start_time < max_search_time:
-                time.sleep(0.05)  # Small delay between retries
-
-        # If we reach here, no match was found within the time limit
-        # print(f"[PHONE] {template_path} not found within {min_search_time}s (best confidence: {best_confidence:.3f})")
-        return None
+def locate_on_phone(
+    template_path,
+    confidence=0.8,
+    min_search_time=0.2,
+    region=None,
+    frame=None,
+    scale=BEST_SCALES,
+):
+    """Locate template image on phone screenshot (returns full location)
 
+    Returns the best Match above confidence, with its left, top, width and
+    height. When a Frame is given it is searched once instead of taking new
+    screenshots.
+    """
+    try:
+        return _find_on_phone(
+            template_path,
+            confidence,
+            min_search_time,
+            region,
+            frame,
+            lambda: locate_on_desktop(template_path, confidence, min_search_time, region),
+            scale,
+        )
     except Exception as e:
         print(f"[PHONE] Image recognition error: {e}, falling back to desktop")
         return locate_on_desktop(template_path, confidence, min_search_time, region)
 
 
-def locate_on_desktop(template_path, confidence=0.8, min_search_time=0.2, region=None):
-    """Locate template image on desktop screenshot using pyautogui"""
+def locate_on_desktop(
+    template_path,
+    confidence=0.8,
+    min_search_time=0.2,
+    region=None,
+    frame=None,
+    scale=1.0,
+):
+    """Locate template image on desktop screenshot (returns full location)
+
+    Returns the best Match above confidence, with its left, top, width and
+    height.
+    """
     try:
-        if region:
-            return pyautogui.locateOnScreen(
-                template_path,
-                confidence=confidence,
-                minSearchTime=min_search_time,
-                region=region,
-            )
-        else:
-            return pyautogui.locateOnScreen(
-                template_path, confidence=confidence, minSearchTime=min_search_time
-            )
+        return _find_on_desktop(
+            template_path, confidence, min_search_time, region, frame, scale
+        )
     except Exception as e:
         print(f"[DESKTOP] Image recognition error: {e}")
         return None
 
 
+def locate_many(templates, frame=None, confidence=None, region=None, min_search_time=0):
+    """Best match of each of several templates, all searched in the same frame
+
+    Each entry of `templates` is an image file or a logical name from
+    assets/manifest.json; a name's fallback variants are matched as well and
+    the best of them wins. The shrunk screen every template is matched
+    against is computed once per frame and shared.
+
+    Without a frame, screenshots are taken until every template is found or
+    min_search_time runs out, and later screenshots only search for the
+    templates still missing.
+
+    Returns:
+        Dict of each entry of `templates` to the Match of its best match
+        above its confidence, or None
+    """
+    from utils.screenshot import crop_frame, grab_frame
+
+    searches = {}
+    for name in templates:
+        spec = template_spec(name)
+        if spec is None:
+            searches[name] = (
+                (name,),
+                confidence if confidence is not None else 0.8,
+                region,
+                BEST_SCALES if USE_PHONE else 1.0,
+            )
+        else:
+            searches[name] = (
+                spec.paths,
+                confidence if confidence is not None else spec.confidence,
+                region if region is not None else spec.region,
+                spec.scale,
+            )
+
+    found = dict.fromkeys(searches)
+    start_time = clock.now()
+    while True:
+        # The whole game screen, or the active frame_snapshot() screenshot
+        source = frame if frame is not None else grab_frame(None)
+        for name, (paths, threshold, search_region, scale) in searches.items():
+            if found[name] is not None:
+                continue
+            if frame is not None:
+                screen = frame.roi(search_region)
+            else:
+                # Desktop regions reaching outside the game window are grabbed
+                # on their own rather than clipped
+                screen = crop_frame(source, search_region)
+            for path in paths:
+                match = vision.find(screen, path, threshold, scale)
+                if match is not None and (
+                    found[name] is None or match.confidence > found[name].confidence
+                ):
+                    found[name] = match
+
+        done = all(point is not None for point in found.values())
+        if done or frame is not None or clock.now() - start_time >= min_search_time:
+            return found
+        clock.sleep(0.05)  # Small delay between retries
+
+
 def locate_all_centers_on_phone(
-    template_path, confidence=0.8, min_search_time=1, region=None, max_matches=10
+    template_path,
+    confidence=0.8,
+    min_search_time=1,
+    region=None,
+    max_matches=10,
+    frame=None,
 ):
-    """Locate all template images on phone screenshot that meet confidence threshold"""
-    try:
-        from utils.adb_utils import get_adb_controller
-        import imutils
+    """Locate all template images on phone screenshot that meet confidence threshold
 
-        controller = get_adb_controller()
+    Returns Matches, highest confidence first, one per peak of the score map
+    that survives non-maximum suppression. The score map is shared with
+    best-match searches of the same template on the same screen. When a
+    Frame is given it is searched once instead of taking new screenshots.
+    """
 
-        if not controller or not controller.is_connected():
-            print("[WARNING] ADB not connected, falling back to desktop")
-            return []
-
-        start_time = time.time()
-        max_search_time = min_search_time
-
-        while time.time() - start_time < max_search_time:
-            # Take phone screenshot
-            screenshot = controller.take_screenshot()
-
-            # Convert RGB to BGR for cv2.imwrite
-            if screenshot is None:
-                print(
-                    "[WARNING] Could not take phone screenshot, falling back to desktop"
-                )
-                return []
-
-            # Convert to OpenCV format
-            screenshot_cv = cv2.cvtColor(screenshot, cv2.COLOR_RGB2BGR)
-
-            # Load template
-            template = cv2.imread(template_path, cv2.IMREAD_COLOR)
-            if template is None:
-                print(f"[ERROR] Could not load template: {template_path}")
-                return []
-
-            # Crop screenshot to region if specified
-            if region:
-                x, y, w, h = region
-                screenshot_cv = screenshot_cv[y : y + h, x : x + w]
-
-            # Use imutils for better template matching with multiple scales
-            (tH, tW) = template.shape[:2]
-
-            # Try multiple scales for better detection
-            scales = [BEST_SCALES]
-            all_matches = []  # Store all matches above confidence threshold
-
-            for scale in scales:
-                # Resize the image according to the scale
-                resized = imutils.resize(
-                    screenshot_cv, width=int(screenshot_cv.shape[1] * scale)
-                )
-                r = screenshot_cv.shape[1] / float(resized.shape[1])
-
-                # If the resized image is smaller than the template, break
-                if resized.shape[0] < tH or resized.shape[1] < tW:
-                    break
-
-                # Apply template matching
-                result = cv2.matchTemplate(resized, template, cv2.TM_CCOEFF_NORMED)
-                
-                # Find all locations where the correlation exceeds the threshold
-                locations = np.where(result >= confidence)
-                
-                for pt in zip(*locations[::-1]):  # Switch columns and rows
-                    match_confidence = result[pt[1], pt[0]]
-                    
-                    # Calculate the center point for this match
-                    (startX, startY) = (
-                        int(pt[0] * r),
-                        int(pt[1] * r),
-                    )
-                    (endX, endY) = (
-                        int((pt[0] + tW) * r),
-                        int((pt[1] + tH) * r),
-                    )
-
-                    center_x = startX + (endX - startX) // 2
-                    center_y = startY + (endY - startY) // 2
-
-                    # Adjust coordinates if region was specified
-                    if region:
-                        center_x += region[0]
-                        center_y += region[1]
-
-                    all_matches.append({
-                        'confidence': match_confidence,
-                        'scale': scale,
-                        'center': (center_x, center_y),
-                        'location': (startX, startY, endX - startX, endY - startY),
-                        'r': r
-                    })
-
-            # If we found any matches above our confidence threshold
-            if all_matches:
-                # Apply non-maximum suppression to remove overlapping detections
-                filtered_matches = non_maximum_suppression(all_matches, overlap_threshold=0.3)
-                
-                # Limit to max_matches
-                filtered_matches = filtered_matches[:max_matches]
-                
-                print(f"[PHONE] Found {len(all_matches)} matches for {template_path}, kept {len(filtered_matches)} after NMS:")
-                for i, match in enumerate(filtered_matches):
-                    print(f"  {i+1}. Confidence: {match['confidence']:.3f}, Scale: {match['scale']}, Position: {match['center']}")
-
-                # Return list of Point objects
-                return [pyautogui.Point(match['center'][0], match['center'][1]) for match in filtered_matches]
-
-            # If no match found and we still have time, wait a bit before retrying
-            if time.time() - start_time < max_search_time:
-                time.sleep(0.05)  # Small delay between retries
-
-        # If we reach here, no match was found within the time limit
-        # print(f"[PHONE] {template_path} not found within {min_search_time}s")
+    def query(source):
+        matches = vision.find_all(source.roi(region), template_path, confidence)
+        if matches:
+            kept = matches[:max_matches]
+            print(f"[PHONE] Found {len(matches)} matches for {template_path}, kept {len(kept)}:")
+            for i, match in enumerate(kept):
+                print(f"  {i+1}. Confidence: {match.confidence:.3f}, Position: ({match.x}, {match.y})")
+            return kept
         return []
 
+    try:
+        return _poll_phone(query, min_search_time, frame, lambda: [])
     except Exception as e:
-        print(f"[PHONE] Image recognition error: {e}, falling back to desktop")
+        print(f"[PHONE] Image recognition error: {e}")
         return []
 
 
 def non_maximum_suppression(matches, overlap_threshold=0.3):
     """
     Apply non-maximum suppression to remove overlapping detections.
-    
+
     Args:
         matches: List of match dictionaries with 'center', 'confidence', 'location' keys
         overlap_threshold: IoU threshold for considering detections as overlapping
-    
+
     Returns:
-        List of matches with overlapping detections removed
+        List of matches with overlapping detections removed, highest confidence first
     """
     if not matches:
         return []
-    
-    # Sort by confidence (highest first)
-    matches = sorted(matches, key=lambda x: x['confidence'], reverse=True)
-    
-    # Calculate IoU between bounding boxes
-    def calculate_iou(box1, box2):
-        """Calculate Intersection over Union between two bounding boxes"""
-        x1, y1, w1, h1 = box1
-        x2, y2, w2, h2 = box2
-        
-        # Calculate intersection
-        x_left = max(x1, x2)
-        y_top = max(y1, y2)
-        x_right = min(x1 + w1, x2 + w2)
-        y_bottom = min(y1 + h1, y2 + h2)
-        
-        if x_right < x_left or y_bottom < y_top:
-            return 0.0
-        
-        intersection = (x_right - x_left) * (y_bottom - y_top)
-        
-        # Calculate union
-        area1 = w1 * h1
-        area2 = w2 * h2
-        union = area1 + area2 - intersection
-        
-        return intersection / union if union > 0 else 0.0
-    
-    # Apply non-maximum suppression
-    kept_matches = []
-    
-    for match in matches:
-        should_keep = True
-        
-        for kept_match in kept_matches:
-            iou = calculate_iou(match['location'], kept_match['location'])
-            if iou > overlap_threshold:
-                should_keep = False
-                break
-        
-        if should_keep:
-            kept_matches.append(match)
-    
-    return kept_matches
+
+    keep = nms_indices(
+        [match['location'] for match in matches],
+        [match['confidence'] for match in matches],
+        overlap_threshold,
+    )
+    return [matches[i] for i in keep]
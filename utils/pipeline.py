@@ -0,0 +1,436 @@
+import itertools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+from utils.frame import Frame
+
+LAYOUTS = ("RGB", "BGR", "RGBA", "BGRA")
+
+# Per-slot header: generation, height, width, channels, layout, origin x, origin y
+_HEADER_FIELDS = 7
+
+# Largest frame a slot holds (a 1920x1080 desktop capture with alpha)
+DEFAULT_SLOT_BYTES = 1920 * 1080 * 4
+
+
+class StaleFrameError(Exception):
+    """Raised when a requested frame was overwritten in the ring"""
+
+
+class SharedFrameRing:
+    """Ring of captured frames in shared memory
+
+    One process publishes frames, any number of processes read them by
+    generation number. Pixels never go through a pipe: readers map the same
+    memory block. A slot is reused every `slots` generations, so readers check
+    the slot header after copying what they need (see read()).
+
+    Args:
+        name: Name of an existing ring to attach to, None to create one
+        slots: Number of frames kept
+        slot_bytes: Capacity of one slot
+    """
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        slots: int = 6,
+        slot_bytes: int = DEFAULT_SLOT_BYTES,
+    ):
+        self.owner = name is None
+        if self.owner:
+            size = 3 * 8 + slots * (_HEADER_FIELDS * 8 + slot_bytes)
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            # Attaching processes are children of the owner and share its
+            # resource tracker, which unlinks the block only once
+            self._shm = shared_memory.SharedMemory(name=name)
+
+        # Slot count, slot size and latest generation, then the slot headers
+        meta = np.ndarray((3,), np.int64, self._shm.buf)
+        if self.owner:
+            meta[:] = (slots, slot_bytes, 0)
+        self.slots, self.slot_bytes = int(meta[0]), int(meta[1])
+        self._meta = meta
+
+        header_offset = meta.nbytes
+        self._headers = np.ndarray(
+            (self.slots, _HEADER_FIELDS), np.int64, self._shm.buf, header_offset
+        )
+        self._pixels = np.ndarray(
+            (self.slots, self.slot_bytes),
+            np.uint8,
+            self._shm.buf,
+            header_offset + self._headers.nbytes,
+        )
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def latest_generation(self) -> int:
+        """Generation of the newest published frame (0 before the first)"""
+        return int(self._meta[2])
+
+    def publish(self, frame: Frame) -> int:
+        """Copy a frame into the next slot and return its generation"""
+        pixels = frame.pixels
+        if pixels.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame of {pixels.nbytes} bytes exceeds ring slot")
+
+        generation = self.latest_generation + 1
+        slot = generation % self.slots
+        header = self._headers[slot]
+
+        # Mark the slot as being written before touching the pixels
+        header[0] = -1
+        height, width = pixels.shape[:2]
+        channels = pixels.shape[2] if pixels.ndim == 3 else 1
+        target = self._pixels[slot, : pixels.nbytes].reshape(pixels.shape)
+        np.copyto(target, pixels)
+        header[1:] = (
+            height,
+            width,
+            channels,
+            LAYOUTS.index(frame.layout),
+            frame.origin[0],
+            frame.origin[1],
+        )
+        header[0] = generation
+        self._meta[2] = generation
+        return generation
+
+    def read(self, generation: int, region=None) -> Frame:
+        """Return a private copy of a frame, or of one region of it
+
+        Raises:
+            StaleFrameError: The slot no longer holds that generation
+        """
+        slot = generation % self.slots
+        header = self._headers[slot]
+        if int(header[0]) != generation:
+            raise StaleFrameError(f"Frame {generation} is no longer in the ring")
+
+        height, width, channels, layout, left, top = (int(v) for v in header[1:])
+        shape = (height, width, channels) if channels > 1 else (height, width)
+        pixels = self._pixels[slot, : height * width * channels].reshape(shape)
+        view = Frame(pixels, LAYOUTS[layout], (left, top), generation).roi(region)
+        frame = Frame(np.array(view.pixels), view.layout, view.origin, generation)
+
+        # A writer that reused the slot meanwhile would have changed the header
+        if int(header[0]) != generation:
+            raise StaleFrameError(f"Frame {generation} was overwritten while read")
+        return frame
+
+    def close(self):
+        self._meta = self._headers = self._pixels = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+def _capture_main(ring_name: str, stop, published, interval: float):
+    """Capture process: publish screenshots into the ring until stopped
+
+    Every published frame is announced on the `published` condition.
+    """
+    from utils.screenshot import grab_full_screen
+
+    ring = SharedFrameRing(ring_name)
+    try:
+        while not stop.is_set():
+            started = time.time()
+            try:
+                ring.publish(grab_full_screen())
+                with published:
+                    published.notify_all()
+            except Exception as e:
+                print(f"[PIPELINE] Capture error: {e}")
+                time.sleep(0.5)
+
+            remaining = interval - (time.time() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+    finally:
+        ring.close()
+
+
+def _vision_request(frame: Frame, kind: str, args: tuple):
+    from utils import image_recognition
+    from core.recognizer import match_template
+
+    if kind == "locate_center":
+        template_path, region, confidence = args
+        # A given frame is searched exactly once, whatever min_search_time is
+        return image_recognition.locate_center_on_screen(
+            template_path, confidence, 1, region, frame=frame
+        )
+    if kind == "locate":
+        template_path, region, confidence = args
+        location = image_recognition.locate_on_screen(
+            template_path, confidence, 1, region, frame=frame
+        )
+        if location is None:
+            return None
+        return (location.left, location.top, location.width, location.height)
+    if kind == "match_template":
+        template_path, region, threshold = args
+        return match_template(template_path, region, threshold, frame=frame)
+    raise ValueError(f"Unknown vision request: {kind}")
+
+
+def _ocr_request(frame: Frame, kind: str, args: tuple):
+    import core.state
+    from utils.screenshot import frame_snapshot
+
+    if kind == "state":
+        # Run a core.state reader (check_mood, check_turn, ...) on the frame
+        (reader,) = args
+        with frame_snapshot(frame):
+            return getattr(core.state, reader)()
+    raise ValueError(f"Unknown OCR request: {kind}")
+
+
+def _worker_main(stage: str, ring_name: str, requests, results):
+    """Vision or OCR process: answer requests against frames of the ring"""
+    handler = _vision_request if stage == "vision" else _ocr_request
+    ring = SharedFrameRing(ring_name)
+    try:
+        while True:
+            request = requests.get()
+            if request is None:
+                break
+
+            request_id, generation, kind, args = request
+            try:
+                # Workers only copy the pixels they need out of the ring
+                frame = ring.read(generation)
+                results.put((request_id, True, handler(frame, kind, args)))
+            except Exception as e:
+                results.put((request_id, False, f"{type(e).__name__}: {e}"))
+    finally:
+        ring.close()
+
+
+class VisionPipeline:
+    """Capture, template matching and OCR in three separate processes
+
+    The capture process publishes frames into a SharedFrameRing, whose slots
+    hold the whole desktop (or a larger first capture), so a resized game
+    window or a fallback to a full-screen grab still fits. Requests
+    name a frame by generation, so the decision loop hands work to the vision
+    and OCR processes without sending pixels, and OCR of lobby fields runs
+    while templates are probed:
+
+        pipeline = VisionPipeline()
+        pipeline.start()
+        generation = pipeline.wait_for_frame()
+        year = pipeline.read_state("check_current_year", generation)
+        popup = pipeline.locate_center("next_btn", generation=generation)
+        print(year.result(), popup.result())
+
+    Every request returns a concurrent.futures.Future.
+
+    Args:
+        slots: Frames kept in the ring
+        interval: Minimum seconds between two captures
+    """
+
+    def __init__(self, slots: int = 6, interval: float = 0.05):
+        self.slots = slots
+        self.interval = interval
+        self._ring = None
+        self._stop = None
+        self._published = None
+        self._processes = []
+        self._queues = {}
+        self._results = None
+        self._futures = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._collector = None
+
+    def start(self):
+        """Start the capture, vision and OCR processes"""
+        if self._ring is not None:
+            return
+
+        from utils.screenshot import get_desktop_rect, grab_full_screen
+
+        # Slots fit a BGRA grab of the whole desktop, which captures fall back
+        # to when the game window is lost; phone screens can be larger still
+        first = grab_full_screen()
+        _, _, width, height = get_desktop_rect()
+        slot_bytes = max(first.pixels.nbytes, width * height * 4)
+
+        context = multiprocessing.get_context("spawn")
+        self._ring = SharedFrameRing(slots=self.slots, slot_bytes=slot_bytes)
+        self._ring.publish(first)
+        self._stop = context.Event()
+        self._published = context.Condition()
+        self._results = context.Queue()
+        self._queues = {"vision": context.Queue(), "ocr": context.Queue()}
+
+        self._processes = [
+            context.Process(
+                target=_capture_main,
+                args=(self._ring.name, self._stop, self._published, self.interval),
+                daemon=True,
+            )
+        ]
+        for stage, requests in self._queues.items():
+            self._processes.append(
+                context.Process(
+                    target=_worker_main,
+                    args=(stage, self._ring.name, requests, self._results),
+                    daemon=True,
+                )
+            )
+        for process in self._processes:
+            process.start()
+
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    def stop(self):
+        """Stop every process and release the ring"""
+        if self._ring is None:
+            return
+
+        self._stop.set()
+        for requests in self._queues.values():
+            requests.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._results.put(None)
+        self._collector.join(timeout=2)
+
+        with self._lock:
+            futures, self._futures = self._futures, {}
+        for future in futures.values():
+            future.cancel()
+
+        self._ring.close()
+        self._ring = None
+        self._processes = []
+
+    def is_running(self) -> bool:
+        return self._ring is not None
+
+    @property
+    def latest_generation(self) -> int:
+        return self._ring.latest_generation
+
+    def wait_for_fresh_frame(self, timeout: float = 5.0) -> int:
+        """Wait for a frame whose capture started after this call
+
+        The frame being captured right now may predate a tap that was just
+        sent, so the one after it is used.
+
+        Raises:
+            TimeoutError: No such frame was published within the timeout
+        """
+        after = self.latest_generation + 1
+        generation = self.wait_for_frame(after, timeout)
+        if generation <= after:
+            raise TimeoutError(f"No frame captured within {timeout} seconds")
+        return generation
+
+    def wait_for_frame(self, after: int = 0, timeout: float = 5.0) -> int:
+        """Wait for a frame newer than `after` and return its generation
+
+        Returns the latest generation if the timeout expires first.
+        """
+        with self._published:
+            self._published.wait_for(
+                lambda: self.latest_generation > after, timeout
+            )
+        return self.latest_generation
+
+    def _collect(self):
+        while True:
+            result = self._results.get()
+            if result is None:
+                return
+            request_id, ok, value = result
+            with self._lock:
+                future = self._futures.pop(request_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(RuntimeError(value))
+
+    def _submit(self, stage: str, kind: str, args: tuple, generation) -> Future:
+        if generation is None:
+            generation = self.wait_for_frame()
+
+        future = Future()
+        request_id = next(self._ids)
+        with self._lock:
+            self._futures[request_id] = future
+        self._queues[stage].put((request_id, generation, kind, args))
+        return future
+
+    def locate_center(
+        self,
+        template_path: str,
+        region=None,
+        confidence: Optional[float] = None,
+        generation: Optional[int] = None,
+    ) -> Future:
+        """Center point of a template, like locate_center_on_screen"""
+        return self._submit(
+            "vision", "locate_center", (template_path, region, confidence), generation
+        )
+
+    def locate(
+        self,
+        template_path: str,
+        region=None,
+        confidence: Optional[float] = None,
+        generation: Optional[int] = None,
+    ) -> Future:
+        """(left, top, width, height) of a template, like locate_on_screen"""
+        return self._submit(
+            "vision", "locate", (template_path, region, confidence), generation
+        )
+
+    def match_template(
+        self,
+        template_path: str,
+        region=None,
+        threshold: Optional[float] = None,
+        generation: Optional[int] = None,
+    ) -> Future:
+        """Boxes of every match, like core.recognizer.match_template"""
+        return self._submit(
+            "vision", "match_template", (template_path, region, threshold), generation
+        )
+
+    def read_state(self, reader: str, generation: Optional[int] = None) -> Future:
+        """Result of a core.state reader (e.g. "check_mood") on a frame"""
+        return self._submit("ocr", "state", (reader,), generation)
+
+
+# Global pipeline instance
+_pipeline = None
+
+
+def get_pipeline() -> VisionPipeline:
+    """Get or create the pipeline, started on first use"""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = VisionPipeline()
+        _pipeline.start()
+    return _pipeline
@@ -11,7 +11,7 @@ from utils.adb_utils import adb_click
 from utils.image_recognition import locate_center_on_screen
 
 def ura():
-  race_btn = locate_center_on_screen("assets/ura/ura_race_btn.png", confidence=0.8 if not USE_PHONE else 0.7, min_search_time=0.2)
+  race_btn = locate_center_on_screen("ura_race_btn", min_search_time=0.2, site="ura.race_btn")
   if race_btn:
     if USE_PHONE:
       adb_click(race_btn.x, race_btn.y)
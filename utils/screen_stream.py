@@ -0,0 +1,309 @@
+import queue
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Iterator, List, Optional
+
+import numpy as np
+
+from utils.buffer_pool import allocation_stats
+
+# screenrecord stops by itself after this many seconds (Android maximum)
+SCREENRECORD_TIME_LIMIT = 180
+READ_CHUNK_SIZE = 64 * 1024
+# screenrecord writes each frame at once; when nothing follows within this many
+# seconds the screen is static and the buffered frame is decoded without the next
+STREAM_IDLE_TIME = 0.03
+
+
+# Annex-B start code in front of every NAL unit
+START_CODE = b"\x00\x00\x01"
+# NAL unit types carrying picture data (non-IDR and IDR slices)
+_VCL_TYPES = (1, 5)
+# NAL unit types that open a new access unit once it has picture data:
+# SEI, SPS, PPS, access unit delimiter, and 14-18 (H.264 7.4.1.2.3)
+_AU_START_TYPES = (6, 7, 8, 9, 14, 15, 16, 17, 18)
+
+
+class H264Decoder:
+    """Incremental decoder for an Annex-B H.264 byte stream
+
+    Bytes can be fed in arbitrary chunks; complete frames come out as RGB
+    arrays. The stream is split into access units here rather than by the
+    libavcodec parser, which holds every access unit back until the next
+    one arrives. Needs PyAV (`pip install av`).
+    """
+
+    def __init__(self):
+        import av
+
+        self._av = av
+        self._codec = av.CodecContext.create("h264", "r")
+        # Frame threading holds back one frame per thread, slices do not
+        self._codec.thread_type = "SLICE"
+        self._pending = bytearray()  # Stream bytes from the current NAL unit on
+        self._checked = False  # Whether the current NAL unit's header was seen
+        self._access_unit = bytearray()  # NAL units of the picture being collected
+        self._has_picture = False
+
+    def decode(self, data: bytes, complete: bool = False) -> List[np.ndarray]:
+        """Feed a chunk of the stream and return the frames it completed
+
+        An access unit is decoded as soon as the header of the next one
+        arrives. With `complete`, the chunk is known to end on an access unit
+        boundary (the producer wrote nothing after it), and the last access
+        unit is decoded right away instead.
+        """
+        self._pending += data
+        frames = []
+
+        start = self._pending.find(START_CODE)
+        if start < 0:
+            # No NAL unit starts here, keep the two bytes a start code may span
+            del self._pending[:-2]
+            return frames
+
+        while True:
+            header = start + len(START_CODE)
+            if not self._checked and len(self._pending) >= header + 2:
+                frames.extend(self._start_nal(self._pending[header : header + 2]))
+            # A NAL unit is complete once the next start code is seen
+            end = self._pending.find(START_CODE, header)
+            if end < 0:
+                break
+            if not self._checked:
+                frames.extend(self._start_nal(self._pending[header:end]))
+            self._access_unit += self._pending[start:end]
+            self._checked = False
+            start = end
+        del self._pending[:start]
+
+        if complete and len(self._pending) > len(START_CODE):
+            if not self._checked:
+                frames.extend(self._start_nal(self._pending[len(START_CODE) :]))
+            self._access_unit += self._pending
+            self._pending.clear()
+            self._checked = False
+            frames.extend(self._decode_access_unit())
+        return frames
+
+    def _start_nal(self, header: bytes) -> List[np.ndarray]:
+        """Look at a NAL unit's first bytes, decoding the previous access unit
+        if this one opens a new one"""
+        frames = []
+        nal_type = header[0] & 0x1F if header else 0
+        is_picture = nal_type in _VCL_TYPES
+        # first_mb_in_slice is 0 (a single 1 bit) on a picture's first slice
+        opens_picture = is_picture and len(header) > 1 and header[1] & 0x80
+        if self._has_picture and (nal_type in _AU_START_TYPES or opens_picture):
+            frames = self._decode_access_unit()
+        self._has_picture = self._has_picture or is_picture
+        self._checked = True
+        return frames
+
+    def _decode_access_unit(self) -> List[np.ndarray]:
+        if not self._has_picture:
+            return []
+        packet = self._av.Packet(bytes(self._access_unit))
+        self._access_unit.clear()
+        self._has_picture = False
+        return [frame.to_ndarray(format="rgb24") for frame in self._codec.decode(packet)]
+
+    def flush(self) -> List[np.ndarray]:
+        """Return the frames still buffered at the end of the stream"""
+        frames = self.decode(b"", complete=True)
+        for frame in self._codec.decode(None):
+            frames.append(frame.to_ndarray(format="rgb24"))
+        return frames
+
+
+def decode_h264_file(path: str, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[np.ndarray]:
+    """Decode a recorded .h264 file in chunks, as if it came from a device"""
+    decoder = H264Decoder()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            yield from decoder.decode(chunk)
+    yield from decoder.flush()
+
+
+class ScreenRecordStream:
+    """Keeps the newest frame of a continuous `screenrecord` H.264 stream
+
+    screenrecord only emits frames when the screen changes, so decoding costs
+    nothing while the game sits on a static screen or a long animation ends.
+    The recording is restarted whenever the device stops it (time limit,
+    rotation, errors).
+
+    Args:
+        open_source: Callable returning a binary stream with a read() method.
+            ADB controllers use `adb exec-out screenrecord ...`; tests can
+            pass `lambda: open("recording.h264", "rb")`.
+        restart: Restart the source when it ends. Disable for file replay.
+    """
+
+    def __init__(self, open_source: Callable, restart: bool = True):
+        self.open_source = open_source
+        self.restart = restart
+        self.frame_count = 0
+        self._frame = None
+        self._condition = threading.Condition()
+        self._source = None
+        self._thread = None
+        self._running = False
+
+    @classmethod
+    def for_device(
+        cls,
+        device_id: str,
+        client=None,
+        size: str = "720x1280",
+        bit_rate: str = "8M",
+    ) -> "ScreenRecordStream":
+        """Build a stream that records the given device through ADB"""
+        command = (
+            f"screenrecord --output-format=h264 --size {size} --bit-rate {bit_rate} "
+            f"--time-limit {SCREENRECORD_TIME_LIMIT} -"
+        )
+
+        def open_source():
+            if client is not None:
+                sock = client.open_stream(device_id, f"exec:{command}")
+                sock.settimeout(None)
+                return sock.makefile("rb")
+            return subprocess.Popen(
+                ["adb", "-s", device_id, "exec-out", command],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            ).stdout
+
+        return cls(open_source)
+
+    def start(self):
+        """Start decoding in a background thread"""
+        if self._running:
+            return
+        # The screen may have changed while the stream was stopped
+        with self._condition:
+            self._frame = None
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop decoding and close the source"""
+        self._running = False
+        source = self._source
+        if source is not None:
+            try:
+                source.close()
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def is_running(self) -> bool:
+        return self._running
+
+    def _publish(self, frame: np.ndarray):
+        # PyAV decodes every frame into a new array
+        allocation_stats.record_allocation(frame.nbytes)
+        with self._condition:
+            self._frame = frame
+            self.frame_count += 1
+            self._condition.notify_all()
+
+    def _read_source(self, chunks: queue.Queue):
+        """Move chunks from the source into the queue, None marking the end"""
+        try:
+            for chunk in iter(lambda: self._source.read1(READ_CHUNK_SIZE), b""):
+                chunks.put(chunk)
+        except Exception as e:
+            chunks.put(e)
+        finally:
+            chunks.put(None)
+
+    def _run(self):
+        while self._running:
+            try:
+                decoder = H264Decoder()
+                self._source = self.open_source()
+                # Reads happen on their own thread so a pause of the producer can
+                # be noticed portably (no select() on Windows pipes)
+                chunks = queue.Queue()
+                threading.Thread(
+                    target=self._read_source, args=(chunks,), daemon=True
+                ).start()
+                while self._running:
+                    try:
+                        chunk = chunks.get(timeout=STREAM_IDLE_TIME)
+                    except queue.Empty:
+                        chunk = b""
+                    if chunk is None:
+                        break
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    for frame in decoder.decode(chunk, complete=not chunk):
+                        self._publish(frame)
+                for frame in decoder.flush():
+                    self._publish(frame)
+            except Exception as e:
+                if self._running:
+                    print(f"[STREAM] Screen stream error: {e}")
+                    time.sleep(1)
+            finally:
+                if self._source is not None:
+                    try:
+                        self._source.close()
+                    except OSError:
+                        pass
+                    self._source = None
+
+            if not self.restart:
+                break
+
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+
+    def latest(self) -> Optional[np.ndarray]:
+        """Return the newest decoded RGB frame, None before the first one
+
+        screenrecord sends nothing while the screen is static, so the newest
+        frame stays current however old it is, as long as the stream runs.
+        Once the stream stopped None is returned.
+        """
+        with self._condition:
+            if not self._running:
+                return None
+            return self._frame
+
+    def wait_for_frame(self, timeout: float = 2.0) -> Optional[np.ndarray]:
+        """Wait until at least one frame has been decoded"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._frame is not None or not self._running, timeout
+            )
+            return self._frame
+
+
+if __name__ == "__main__":
+    # Replay a recorded stream: python -m utils.screen_stream recording.h264
+    if len(sys.argv) != 2:
+        print("Usage: python -m utils.screen_stream <recording.h264>")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    count = 0
+    last = None
+    for last in decode_h264_file(sys.argv[1]):
+        count += 1
+    elapsed = time.perf_counter() - start
+
+    if last is None:
+        print("[STREAM] No frames decoded")
+        sys.exit(1)
+
+    print(f"[STREAM] Decoded {count} frames of {last.shape[1]}x{last.shape[0]}")
+    print(f"[STREAM] {elapsed * 1000 / count:.2f} ms per frame")
@@ -1,13 +1,20 @@
 import os
+import sys
 import json
-import time
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Optional, Tuple
 
 from PIL import Image, ImageEnhance
+import cv2
 import mss
 import numpy as np
 
 from utils.adb_utils import get_adb_controller
+from utils import clock
+from utils.buffer_pool import allocation_stats
+from utils.frame import Frame
 
 # Load config
 try:
@@ -18,6 +25,10 @@ except FileNotFoundError:
 
 USE_PHONE = config.get("usePhone", False)
 
+# Mean grayscale difference (0-255) below which two captures count as equal.
+# Keeps idle sparkles and blinking cursors from looking like a transition.
+STABLE_THRESHOLD = 2.0
+
 
 def save_debug_image(image: Image.Image, prefix: str = "debug") -> str:
     """
@@ -47,126 +58,357 @@ def save_debug_image(image: Image.Image, prefix: str = "debug") -> str:
     return filepath
 
 
-def enhanced_screenshot(region=(0, 0, 1920, 1080), save_debug=False) -> Image.Image:
+FULL_SCREEN = (0, 0, 1920, 1080)
+
+# Title of the game window on PC, desktop snapshots only cover its client area
+GAME_WINDOW_TITLE = "Umamusume"
+
+# Screenshot shared by every capture inside a frame_snapshot() block
+_snapshot = threading.local()
+
+# mss session of each thread, opened once and reused for every desktop grab
+_desktop = threading.local()
+
+
+class _Snapshot:
+    """One full-screen capture, taken lazily on the first crop"""
+
+    def __init__(self, frame: Optional[Frame] = None):
+        self._frame = frame
+
+    @property
+    def frame(self) -> Frame:
+        if self._frame is None:
+            self._frame = grab_full_screen()
+        return self._frame
+
+    def crop(self, region) -> Frame:
+        return crop_frame(self.frame, region)
+
+
+def crop_frame(frame: Frame, region) -> Frame:
+    """View of a (x, y, w, h) screen region of a capture
+
+    On PC a region reaching outside the capture (the game window) is grabbed
+    from the desktop on its own instead of being clipped. Phone regions are
+    clipped to the phone screen, nothing outside it can be captured.
+    """
+    if region and not USE_PHONE and not _contains(frame, region):
+        return _grab_desktop(_monitor(region))
+    return frame.roi(region)
+
+
+def _contains(frame: Frame, region) -> bool:
+    x, y, w, h = region
+    left, top = frame.origin
+    return (
+        x >= left
+        and y >= top
+        and x + w <= left + frame.width
+        and y + h <= top + frame.height
+    )
+
+
+def snapshot_frame() -> Optional[Frame]:
+    """Full Frame of the active frame_snapshot() block, or None outside one"""
+    active = getattr(_snapshot, "active", None)
+    return active.frame if active is not None else None
+
+
+@contextmanager
+def frame_snapshot(frame: Optional[Frame] = None):
+    """Serve every capture made inside the block from one screenshot
+
+    Reading the lobby takes several OCR regions from the same screen, which
+    would otherwise cost one full device capture each:
+
+        with frame_snapshot():
+            mood = check_mood()
+            turn = check_turn()
+
+    A full-screen Frame captured elsewhere can be given instead. Nested
+    blocks share the outer snapshot.
+    """
+    if getattr(_snapshot, "active", None) is not None:
+        yield _snapshot.active
+        return
+
+    _snapshot.active = _Snapshot(frame)
+    try:
+        yield _snapshot.active
+    finally:
+        _snapshot.active = None
+
+
+def _take_phone_frame() -> Optional[Frame]:
+    """Take a full phone Frame, or None to fall back to the desktop"""
+    try:
+        controller = get_adb_controller()
+        if controller and controller.is_connected():
+            frame = controller.take_frame()
+            if frame is not None:
+                return frame
+            print("[WARNING] Could not take ADB screenshot, falling back to desktop")
+        else:
+            print("[WARNING] ADB not connected, falling back to desktop screenshot")
+    except Exception as e:
+        print(f"[WARNING] ADB screenshot failed: {e}, falling back to desktop")
+    return None
+
+
+def _desktop_session():
+    """Return this thread's mss session, opening it on first use
+
+    mss handles must stay on the thread that opened them, so each thread
+    keeps its own for the lifetime of the process.
+    """
+    sct = getattr(_desktop, "sct", None)
+    if sct is None:
+        sct = _desktop.sct = mss.mss()
+    return sct
+
+
+def _monitor(region) -> dict:
+    return {
+        "left": region[0],
+        "top": region[1],
+        "width": region[2],
+        "height": region[3],
+    }
+
+
+def get_game_rect() -> Optional[Tuple[int, int, int, int]]:
+    """Screen (x, y, w, h) of the game window's client area
+
+    Returns None if the window is not found, is minimised, or the platform
+    has no Win32 API.
+    """
+    if sys.platform != "win32":
+        return None
+
+    import ctypes
+    from ctypes import wintypes
+
+    user32 = ctypes.windll.user32
+    hwnd = user32.FindWindowW(None, GAME_WINDOW_TITLE)
+    if not hwnd or user32.IsIconic(hwnd):
+        return None
+
+    rect = wintypes.RECT()
+    origin = wintypes.POINT(0, 0)
+    if not user32.GetClientRect(hwnd, ctypes.byref(rect)):
+        return None
+    if not user32.ClientToScreen(hwnd, ctypes.byref(origin)):
+        return None
+    if rect.right <= 0 or rect.bottom <= 0:
+        return None
+    return origin.x, origin.y, rect.right, rect.bottom
+
+
+def get_desktop_rect() -> Tuple[int, int, int, int]:
+    """Screen (x, y, w, h) of the whole desktop, the largest area grabbed"""
+    monitor = _desktop_session().monitors[0]
+    return monitor["left"], monitor["top"], monitor["width"], monitor["height"]
+
+
+def _grab_desktop(monitor: dict) -> Frame:
+    # View over the mss buffer, no extra copy
+    img_np = np.asarray(_desktop_session().grab(monitor))
+    allocation_stats.record_allocation(img_np.nbytes)
+    return Frame(img_np, "BGRA", (monitor["left"], monitor["top"]))
+
+
+def grab_full_screen() -> Frame:
+    """Capture the whole screen, or only the game window on PC
+
+    Always takes a new capture, even inside a frame_snapshot() block.
+    """
+    if USE_PHONE:
+        frame = _take_phone_frame()
+        if frame is not None:
+            return frame
+    else:
+        game_rect = get_game_rect()
+        if game_rect is not None:
+            return _grab_desktop(_monitor(game_rect))
+
+    return _grab_desktop(_desktop_session().monitors[0])
+
+
+def grab_frame(region=FULL_SCREEN) -> Frame:
+    """Capture a (x, y, w, h) region as a Frame
+
+    Inside a frame_snapshot() block the region is cropped from the shared
+    screenshot instead of capturing again.
+    """
+    # Phone frames are smaller than the default desktop region, keep them whole
+    if USE_PHONE and region == FULL_SCREEN:
+        region = None
+
+    active = getattr(_snapshot, "active", None)
+    if active is not None:
+        return active.crop(region)
+
+    return _capture(region)
+
+
+def _capture(region) -> Frame:
+    """Take a new capture of a region, None meaning the whole screen"""
     # Check if usePhone is enabled
     if USE_PHONE:
         # Use ADB screenshot for phone mode
-        try:
-            controller = get_adb_controller()
-            if controller and controller.is_connected():
-                # Take full screenshot from phone
-                screenshot = controller.take_screenshot()
-
-                if screenshot is not None:
-                    # Convert numpy array to PIL Image
-                    pil_img = Image.fromarray(screenshot)
-
-                    # # Save screenshot to file for debugging
-                    # pil_img.save("screenshot-screenshot.png")
-
-                    # Crop to the specified region if not full screen
-                    if region != (0, 0, 1920, 1080):
-                        pil_img = pil_img.crop(
-                            (
-                                region[0],
-                                region[1],
-                                region[0] + region[2],
-                                region[1] + region[3],
-                            )
-                        )
-
-                    # Apply enhancements for OCR
-                    pil_img = pil_img.resize(
-                        (pil_img.width * 2, pil_img.height * 2), Image.BICUBIC
-                    )
-                    pil_img = pil_img.convert("L")
-                    pil_img = ImageEnhance.Contrast(pil_img).enhance(1.5)
-
-                    # Save debug image if requested
-                    if save_debug:
-                        save_debug_image(pil_img, "enhanced_screenshot")
-                        time.sleep(1)
-
-                    return pil_img
-                else:
-                    print(
-                        "[WARNING] Could not take ADB screenshot, falling back to desktop"
-                    )
-            else:
-                print("[WARNING] ADB not connected, falling back to desktop screenshot")
-        except Exception as e:
-            print(f"[WARNING] ADB screenshot failed: {e}, falling back to desktop")
+        frame = _take_phone_frame()
+        if frame is not None:
+            return frame.roi(region)
+        region = region or FULL_SCREEN
 
     # Fallback to desktop screenshot
-    with mss.mss() as sct:
-        monitor = {
-            "left": region[0],
-            "top": region[1],
-            "width": region[2],
-            "height": region[3],
-        }
-        img = sct.grab(monitor)
-        img_np = np.array(img)
-        img_rgb = img_np[:, :, :3][:, :, ::-1]
-        pil_img = Image.fromarray(img_rgb)
+    return _grab_desktop(_monitor(region or get_game_rect() or FULL_SCREEN))
+
+
+def grab_region(region=FULL_SCREEN) -> np.ndarray:
+    """Capture a (x, y, w, h) region as an RGB array"""
+    return grab_frame(region).rgb
 
+
+def enhance_for_ocr(image) -> Image.Image:
+    """Upscale, grayscale and boost contrast of a capture for OCR"""
+    pil_img = image.to_pil() if isinstance(image, Frame) else image
     pil_img = pil_img.resize((pil_img.width * 2, pil_img.height * 2), Image.BICUBIC)
     pil_img = pil_img.convert("L")
-    pil_img = ImageEnhance.Contrast(pil_img).enhance(1.5)
+    return ImageEnhance.Contrast(pil_img).enhance(1.5)
+
+
+def enhanced_screenshot(
+    region=FULL_SCREEN, save_debug=False, frame: Optional[Frame] = None
+) -> Image.Image:
+    """Capture a region prepared for OCR, from the given Frame if any"""
+    source = frame.roi(region) if frame is not None else grab_frame(region)
+    pil_img = enhance_for_ocr(source)
 
     # Save debug image if requested
     if save_debug:
         save_debug_image(pil_img, "enhanced_screenshot")
+        if USE_PHONE:
+            clock.sleep(1)
 
     return pil_img
 
 
-def capture_region(region=(0, 0, 1920, 1080), save_debug=False) -> Image.Image:
-    # Check if usePhone is enabled
-    if USE_PHONE:
-        # Use ADB screenshot for phone mode
-        try:
-            controller = get_adb_controller()
-            if controller and controller.is_connected():
-                # Take full screenshot from phone
-                screenshot = controller.take_screenshot()
-                if screenshot is not None:
-                    # Convert numpy array to PIL Image
-                    pil_img = Image.fromarray(screenshot)
-
-                    # Crop to the specified region if not full screen
-                    if region != (0, 0, 1920, 1080):
-                        pil_img = pil_img.crop(
-                            (
-                                region[0],
-                                region[1],
-                                region[0] + region[2],
-                                region[1] + region[3],
-                            )
-                        )
-
-                    if save_debug:
-                        save_debug_image(pil_img, "capture_region")
-
-                    return pil_img
-                else:
-                    print(
-                        "[WARNING] Could not take ADB screenshot, falling back to desktop"
-                    )
-            else:
-                print("[WARNING] ADB not connected, falling back to desktop screenshot")
-        except Exception as e:
-            print(f"[WARNING] ADB screenshot failed: {e}, falling back to desktop")
+def capture_region(
+    region=FULL_SCREEN, save_debug=False, frame: Optional[Frame] = None
+) -> Image.Image:
+    """Capture a region as an RGB PIL image, from the given Frame if any"""
+    source = frame.roi(region) if frame is not None else grab_frame(region)
+    pil_img = source.to_pil()
 
-    # Fallback to desktop screenshot
-    with mss.mss() as sct:
-        monitor = {
-            "left": region[0],
-            "top": region[1],
-            "width": region[2],
-            "height": region[3],
-        }
-        img = sct.grab(monitor)
-        img_np = np.array(img)
-        img_rgb = img_np[:, :, :3][:, :, ::-1]
-        return Image.fromarray(img_rgb)
+    if save_debug:
+        save_debug_image(pil_img, "capture_region")
+
+    return pil_img
+
+
+def capture_regions(regions: dict, enhanced=False) -> dict:
+    """Capture several named regions from a single screenshot
+
+    Args:
+        regions: Mapping of name to (x, y, w, h)
+        enhanced: Apply the OCR enhancement of enhanced_screenshot
+
+    Returns:
+        Mapping of name to PIL image
+    """
+    with frame_snapshot():
+        images = {}
+        for name, region in regions.items():
+            frame = grab_frame(region)
+            images[name] = enhance_for_ocr(frame) if enhanced else frame.to_pil()
+        return images
+
+
+def frame_difference(a: Frame, b: Frame) -> float:
+    """Mean absolute grayscale difference of two captures of one region"""
+    if a.shape != b.shape:
+        return 255.0
+    return float(cv2.absdiff(a.gray, b.gray).mean())
+
+
+def wait_until_stable(
+    region=None,
+    timeout: float = 5.0,
+    stable_time: float = 0.3,
+    threshold: float = STABLE_THRESHOLD,
+    interval: float = 0.05,
+) -> Optional[Frame]:
+    """Wait until a region stops changing
+
+    Captures are compared every `interval` seconds; the region is stable
+    once no difference above `threshold` was seen for `stable_time` seconds.
+    Always takes new captures, even inside a frame_snapshot() block.
+
+    Returns:
+        The settled capture, or None if the timeout expired first
+    """
+    deadline = clock.now() + timeout
+    previous = _capture(region)
+    stable_since = clock.now()
+    while clock.now() < deadline:
+        clock.sleep(interval)
+        current = _capture(region)
+        if frame_difference(previous, current) > threshold:
+            stable_since = clock.now()
+        elif clock.now() - stable_since >= stable_time:
+            return current
+        previous = current
+    return None
+
+
+def wait_until_changed(
+    region=None,
+    since_frame: Optional[Frame] = None,
+    timeout: float = 5.0,
+    threshold: float = STABLE_THRESHOLD,
+    interval: float = 0.05,
+) -> Optional[Frame]:
+    """Wait until a region differs from an earlier capture
+
+    Args:
+        region: (x, y, w, h) to watch, None for the whole screen
+        since_frame: Capture to compare against, either of the region or of
+            a larger area containing it. It is cropped to the area the new
+            captures cover (e.g. the game window when region is None), so a
+            full-screen since_frame is compared on the same pixels. Defaults
+            to a capture taken now.
+
+    Returns:
+        The first changed capture, or None if the timeout expired first
+    """
+    deadline = clock.now() + timeout
+    reference = _capture(region) if since_frame is None else None
+
+    while clock.now() < deadline:
+        current = _capture(region)
+        if reference is None:
+            left, top = current.origin
+            reference = since_frame.roi((left, top, current.width, current.height))
+        if frame_difference(reference, current) > threshold:
+            return current
+        clock.sleep(interval)
+    return None
+
+
+def wait_for_transition(
+    since_frame: Frame, region=None, timeout: float = 5.0
+) -> Optional[Frame]:
+    """Wait for a region to change from since_frame, then to settle
+
+    Meant for the moment after a tap: returns as soon as the new screen is
+    still, and never waits longer than `timeout` in total.
+
+    Returns:
+        The settled capture, or None if the timeout expired first
+    """
+    deadline = clock.now() + timeout
+    if wait_until_changed(region, since_frame, timeout) is None:
+        return None
+    return wait_until_stable(region, max(deadline - clock.now(), 0))
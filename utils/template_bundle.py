@@ -0,0 +1,145 @@
+import json
+import os
+import sys
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from utils.templates import (
+    ASSETS_DIR,
+    BUNDLE_FILE,
+    MANIFEST_FILE,
+    Template,
+    TemplateRegistry,
+    _read_manifest,
+)
+
+# File layout: magic, index length (u64), JSON index, padding, pixel data
+_MAGIC = b"UMATPL01"
+_ALIGN = 64
+
+
+def build_bundle(
+    root: str = ASSETS_DIR,
+    manifest_path: str = MANIFEST_FILE,
+    bundle_path: str = BUNDLE_FILE,
+) -> dict:
+    """Compile every template under root and the manifest into one file
+
+    The BGR and grayscale pixels of each template are stored as raw arrays
+    after a JSON index, so load_bundle() maps them without decoding any PNG.
+
+    Returns:
+        The index written to the bundle
+    """
+    # Decode from the PNGs, never from an older bundle
+    registry = TemplateRegistry(root, manifest_path, bundle_path="")
+    manifest, manifest_mtime = _read_manifest(manifest_path)
+
+    missing = []
+    for name in manifest:
+        spec = registry.spec(name)
+        if spec is not None:
+            missing.extend(path for path in spec.paths if path not in registry)
+    if missing:
+        raise FileNotFoundError(f"Manifest references missing templates: {missing}")
+
+    chunks = []
+    offset = 0
+
+    def add(array: np.ndarray) -> int:
+        nonlocal offset
+        start = offset
+        data = np.ascontiguousarray(array).tobytes()
+        padding = -len(data) % _ALIGN
+        chunks.append(data + b"\0" * padding)
+        offset += len(data) + padding
+        return start
+
+    entries = {}
+    for path, template in registry.templates().items():
+        entries[path] = {
+            "shape": list(template.bgr.shape),
+            "mtime": template.mtime,
+            "crc": template.crc,
+            "mean": template.mean,
+            "std": template.std,
+            "bgr": add(template.bgr),
+            "gray": add(template.gray),
+        }
+
+    index = {
+        "version": 1,
+        "manifest": manifest,
+        "manifest_mtime": manifest_mtime,
+        "templates": entries,
+    }
+    header = json.dumps(index).encode("utf-8")
+    prefix = len(_MAGIC) + 8 + len(header)
+    padding = -prefix % _ALIGN
+
+    with open(bundle_path, "wb") as file:
+        file.write(_MAGIC)
+        file.write(np.uint64(len(header)).tobytes())
+        file.write(header)
+        file.write(b"\0" * padding)
+        for chunk in chunks:
+            file.write(chunk)
+    return index
+
+
+def load_bundle(
+    bundle_path: str = BUNDLE_FILE,
+) -> Optional[Tuple[Dict[str, Template], dict, Optional[float]]]:
+    """Map a compiled bundle
+
+    Returns:
+        (templates by path, manifest, manifest mtime at build time), or None
+        if the file is missing or not a bundle. The template pixels are
+        read-only views of the mapped file.
+    """
+    try:
+        with open(bundle_path, "rb") as file:
+            if file.read(len(_MAGIC)) != _MAGIC:
+                print(f"[WARNING] {bundle_path} is not a template bundle")
+                return None
+            length = int(np.frombuffer(file.read(8), np.uint64)[0])
+            index = json.loads(file.read(length).decode("utf-8"))
+    except (OSError, ValueError) as e:
+        print(f"[WARNING] Could not read {bundle_path}: {e}")
+        return None
+
+    prefix = len(_MAGIC) + 8 + length
+    data = np.memmap(bundle_path, np.uint8, "r", offset=prefix + (-prefix % _ALIGN))
+
+    def view(offset: int, shape) -> np.ndarray:
+        return data[offset : offset + int(np.prod(shape))].reshape(shape)
+
+    templates = {}
+    for path, entry in index["templates"].items():
+        shape = tuple(entry["shape"])
+        template = Template(
+            path,
+            view(entry["bgr"], shape),
+            entry["mtime"],
+            entry["crc"],
+            gray=view(entry["gray"], shape[:2]),
+            mean=entry["mean"],
+            std=entry["std"],
+        )
+        templates[path] = template
+    return templates, index["manifest"], index["manifest_mtime"]
+
+
+if __name__ == "__main__":
+    # Compile assets/ and the manifest: python -m utils.template_bundle
+    try:
+        index = build_bundle()
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    size = os.path.getsize(BUNDLE_FILE)
+    print(
+        f"[INFO] Wrote {BUNDLE_FILE}: {len(index['templates'])} templates, "
+        f"{len(index['manifest'])} manifest entries, {size / 1024:.0f} KiB"
+    )
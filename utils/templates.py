@@ -0,0 +1,416 @@
+import json
+import os
+import threading
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Load config
+try:
+    with open("config.json", "r", encoding="utf-8") as file:
+        config = json.load(file)
+except FileNotFoundError:
+    config = {}
+
+USE_PHONE = config.get("usePhone", False)
+
+ASSETS_DIR = "assets"
+MANIFEST_FILE = "assets/manifest.json"
+BUNDLE_FILE = "assets/templates.bundle"
+
+# Screen scale the phone matchers search at (see utils.image_recognition)
+BEST_SCALES = 0.8
+
+
+class Template:
+    """A template image decoded once, with the grayscale copy and statistics
+    the matchers need
+
+    Args:
+        path: Image file, also the name matchers look the template up by
+        bgr: Decoded BGR pixels
+        mtime: Modification time of the file when it was decoded
+        crc: CRC32 of the file contents
+        gray: Grayscale pixels, computed from bgr if not given
+        mean: Mean of the grayscale pixels, computed if not given
+        std: Standard deviation of the grayscale pixels, computed if not given
+    """
+
+    __slots__ = ("path", "bgr", "gray", "mtime", "crc", "mean", "std")
+
+    def __init__(
+        self,
+        path: str,
+        bgr: np.ndarray,
+        mtime: float,
+        crc: int = 0,
+        gray: Optional[np.ndarray] = None,
+        mean: Optional[float] = None,
+        std: Optional[float] = None,
+    ):
+        self.path = path
+        self.bgr = bgr
+        if gray is None:
+            gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        self.gray = gray
+        self.mtime = mtime
+        self.crc = crc
+        if mean is None or std is None:
+            # TM_CCOEFF_NORMED is undefined on a flat template (std 0)
+            mean, std = (float(v[0, 0]) for v in cv2.meanStdDev(self.gray))
+        self.mean = mean
+        self.std = std
+
+    @property
+    def width(self) -> int:
+        return self.bgr.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.bgr.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.bgr.nbytes + self.gray.nbytes
+
+
+class TemplateSpec:
+    """Manifest entry of a logical template name, resolved for one profile
+
+    Args:
+        name: Logical name, e.g. "next_btn"
+        paths: Image file first, then the fallback variants tried in order
+        confidence: Match threshold
+        region: Expected search region as (x, y, width, height) in screen
+            pixels, None for the whole screen
+        scale: Screen scale the template is matched at
+    """
+
+    __slots__ = ("name", "paths", "confidence", "region", "scale")
+
+    def __init__(
+        self,
+        name: str,
+        paths: Tuple[str, ...],
+        confidence: float,
+        region: Optional[Tuple[int, int, int, int]],
+        scale: float,
+    ):
+        self.name = name
+        self.paths = paths
+        self.confidence = confidence
+        self.region = region
+        self.scale = scale
+
+    @property
+    def path(self) -> str:
+        return self.paths[0]
+
+    def __repr__(self) -> str:
+        return (
+            f"TemplateSpec({self.name!r}, paths={self.paths}, "
+            f"confidence={self.confidence}, region={self.region}, scale={self.scale})"
+        )
+
+
+def _for_profile(value, profile: str):
+    """Manifest values are either shared or a {"desktop": .., "phone": ..} dict"""
+    if isinstance(value, dict):
+        return value.get(profile)
+    return value
+
+
+def _read_file(path: str) -> Optional[Tuple[bytes, float]]:
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+        return data, os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def _read_template(path: str) -> Optional[Template]:
+    read = _read_file(path)
+    if read is None:
+        return None
+    data, mtime = read
+    bgr = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if bgr is None:
+        return None
+    return Template(path, bgr, mtime, zlib.crc32(data))
+
+
+def _read_manifest(path: str) -> Tuple[dict, Optional[float]]:
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file), os.path.getmtime(path)
+    except FileNotFoundError:
+        return {}, None
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[WARNING] Could not read {path}: {e}")
+        return {}, None
+
+
+class TemplateRegistry:
+    """Every template image under a directory, decoded once
+
+    Matchers take templates from here instead of decoding the PNG on each
+    poll. Templates are keyed by the path the code already uses
+    ("assets/buttons/next_btn.png"). reload_changed() picks up edited, added
+    and removed files, and tells the on_reload() listeners which changed so
+    results cached for them can be dropped.
+
+    The manifest gives templates logical names with their confidence,
+    region, scale and fallback variants per device profile (see spec()).
+    Regions are (x, y, width, height) lists, or names of such tuples in
+    utils.constants, on desktop as well as on phone.
+    When a bundle compiled by utils.template_bundle exists, templates are
+    mapped from it instead of decoded; files edited after the bundle was
+    built are decoded again on load.
+
+    Args:
+        root: Directory searched for .png files
+        manifest_path: JSON manifest of logical template names
+        bundle_path: Compiled bundle, ignored if missing
+        profile: "desktop" or "phone"
+    """
+
+    def __init__(
+        self,
+        root: str = ASSETS_DIR,
+        manifest_path: str = MANIFEST_FILE,
+        bundle_path: str = BUNDLE_FILE,
+        profile: str = "phone" if USE_PHONE else "desktop",
+    ):
+        self.root = root
+        self.manifest_path = manifest_path
+        self.bundle_path = bundle_path
+        self.profile = profile
+        self.manifest: dict = {}
+        self._manifest_mtime = None
+        self._specs: Dict[str, TemplateSpec] = {}
+        self._templates: Dict[str, Template] = {}
+        self._listeners: List[Callable[[List[str]], None]] = []
+        self._lock = threading.Lock()
+        self.load_all()
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normpath(path).replace(os.sep, "/")
+
+    def _scan(self) -> List[str]:
+        paths = []
+        for folder, _, files in os.walk(self.root):
+            for name in files:
+                if name.lower().endswith(".png"):
+                    paths.append(self._key(os.path.join(folder, name)))
+        return sorted(paths)
+
+    def load_all(self):
+        """Load every template under root, and the manifest
+
+        Templates come from the bundle when one exists, otherwise each file
+        is decoded.
+        """
+        from utils.template_bundle import load_bundle
+
+        bundle = None
+        if self.bundle_path and os.path.exists(self.bundle_path):
+            bundle = load_bundle(self.bundle_path)
+        if bundle is not None:
+            templates, manifest, manifest_mtime = bundle
+            with self._lock:
+                self._templates = templates
+                self._set_manifest(manifest, manifest_mtime)
+            # Decode whatever changed since the bundle was built
+            self.reload_changed()
+            return
+
+        templates = {}
+        for path in self._scan():
+            template = _read_template(path)
+            if template is None:
+                print(f"[WARNING] Could not load template: {path}")
+                continue
+            templates[path] = template
+        manifest, manifest_mtime = _read_manifest(self.manifest_path)
+        with self._lock:
+            self._templates = templates
+            self._set_manifest(manifest, manifest_mtime)
+
+    def _set_manifest(self, manifest: dict, mtime: Optional[float]):
+        self.manifest = manifest
+        self._manifest_mtime = mtime
+        self._specs = {}
+
+    def get(self, path: str) -> Optional[Template]:
+        """Template of an image file, None if it cannot be read
+
+        Files outside root are decoded on first use and kept as well.
+        """
+        key = self._key(path)
+        with self._lock:
+            template = self._templates.get(key)
+        if template is None:
+            template = _read_template(key)
+            if template is not None:
+                with self._lock:
+                    self._templates[key] = template
+        return template
+
+    def bgr(self, path: str) -> Optional[np.ndarray]:
+        """BGR pixels of a template, None if it cannot be read"""
+        template = self.get(path)
+        return template.bgr if template is not None else None
+
+    def spec(self, name: str) -> Optional[TemplateSpec]:
+        """Manifest entry of a logical name for this profile, None if unknown
+
+        Region names such as "SUPPORT_CARD_ICON_REGION" are looked up in
+        utils.constants, with the profile's suffix (_DESKTOP or _PHONE).
+        """
+        with self._lock:
+            spec = self._specs.get(name)
+            entry = self.manifest.get(name) if spec is None else None
+        if spec is not None or entry is None:
+            return spec
+
+        path = _for_profile(entry["path"], self.profile)
+        if path is None:
+            return None
+        variants = _for_profile(entry.get("variants", []), self.profile) or []
+        region = _for_profile(entry.get("region"), self.profile)
+        if isinstance(region, str):
+            from utils import constants
+
+            region = getattr(constants, f"{region}_{self.profile.upper()}")
+        default_scale = BEST_SCALES if self.profile == "phone" else 1.0
+        spec = TemplateSpec(
+            name,
+            tuple([path] + list(variants)),
+            _for_profile(entry.get("confidence", 0.8), self.profile),
+            tuple(region) if region else None,
+            _for_profile(entry.get("scale", default_scale), self.profile),
+        )
+        with self._lock:
+            self._specs[name] = spec
+        return spec
+
+    def on_reload(self, listener: Callable[[List[str]], None]):
+        """Call listener with the changed paths whenever templates are reloaded"""
+        self._listeners.append(listener)
+
+    def _unchanged(self, template: Template, mtime: Optional[float]) -> bool:
+        if mtime is None:
+            return False
+        if template.mtime == mtime:
+            return True
+        # A fresh checkout touches every file, compare the contents as well
+        read = _read_file(template.path)
+        if read is None or zlib.crc32(read[0]) != template.crc:
+            return False
+        template.mtime = mtime
+        return True
+
+    def reload_changed(self) -> List[str]:
+        """Reload templates and manifest changed on disk, return their paths"""
+        with self._lock:
+            known = dict(self._templates)
+            manifest_mtime = self._manifest_mtime
+
+        changed = []
+        for path in sorted(set(known) | set(self._scan())):
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                mtime = None
+            template = known.get(path)
+            if template is not None and self._unchanged(template, mtime):
+                continue
+
+            changed.append(path)
+            template = _read_template(path) if mtime is not None else None
+            with self._lock:
+                if template is None:
+                    self._templates.pop(path, None)
+                else:
+                    self._templates[path] = template
+
+        try:
+            current_mtime = os.path.getmtime(self.manifest_path)
+        except OSError:
+            current_mtime = None
+        if current_mtime != manifest_mtime:
+            manifest, current_mtime = _read_manifest(self.manifest_path)
+            with self._lock:
+                if manifest != self.manifest:
+                    changed.append(self._key(self.manifest_path))
+                self._set_manifest(manifest, current_mtime)
+
+        if changed:
+            print(f"[INFO] Reloaded {len(changed)} changed templates")
+            for listener in self._listeners:
+                listener(changed)
+        return changed
+
+    def templates(self) -> Dict[str, Template]:
+        """Every loaded template by path"""
+        with self._lock:
+            return dict(self._templates)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Size, mean and contrast of every loaded template"""
+        return {
+            template.path: {
+                "width": template.width,
+                "height": template.height,
+                "mean": template.mean,
+                "std": template.std,
+                "bytes": template.nbytes,
+            }
+            for template in self.templates().values()
+        }
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def __contains__(self, path: str) -> bool:
+        return self._key(path) in self._templates
+
+
+# Global registry instance
+_registry = None
+
+
+def get_template_registry() -> TemplateRegistry:
+    """Get or create the registry, loading every asset on first use"""
+    global _registry
+    if _registry is None:
+        _registry = TemplateRegistry()
+    return _registry
+
+
+def load_template(path: str) -> Optional[np.ndarray]:
+    """BGR pixels of a template from the registry, like cv2.imread(path)"""
+    return get_template_registry().bgr(path)
+
+
+def template_spec(name: str) -> Optional[TemplateSpec]:
+    """Manifest entry of a logical template name, None for plain file paths"""
+    return get_template_registry().spec(name)
+
+
+if __name__ == "__main__":
+    # List the loaded templates: python -m utils.templates
+    registry = get_template_registry()
+    stats = registry.stats()
+    for path, info in stats.items():
+        flat = "  (flat)" if info["std"] < 1 else ""
+        print(
+            f"{path:<50} {info['width']:>4}x{info['height']:<4} "
+            f"mean {info['mean']:6.1f} std {info['std']:5.1f}{flat}"
+        )
+    total = sum(info["bytes"] for info in stats.values())
+    print(f"{len(stats)} templates, {total / 1024:.0f} KiB")
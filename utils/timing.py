@@ -0,0 +1,257 @@
+import atexit
+import json
+import os
+import sys
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from utils import clock
+
+# Load config
+try:
+    with open("config.json", "r", encoding="utf-8") as file:
+        config = json.load(file)
+except FileNotFoundError:
+    config = {}
+
+USE_PHONE = config.get("usePhone", False)
+
+# Derive search timeouts from recorded timings instead of the caller's values
+ADAPTIVE_TIMEOUTS = config.get("adaptiveTimeouts", False)
+
+TIMINGS_FILE = "transition_timings.json"
+
+# Histogram resolution and the samples needed before timings are trusted
+BUCKET_SECONDS = 0.05
+MIN_SAMPLES = 20
+
+# Derived timeout is p99 times this margin, at least the caller's timeout and
+# at most MAX_TIMEOUT_FACTOR times it
+TIMEOUT_MARGIN = 1.25
+MIN_TIMEOUT = 0.1
+MAX_TIMEOUT_FACTOR = 2.0
+
+
+class SiteTimings:
+    """Time-to-appear histogram of one tagged search call site
+
+    Found searches add their elapsed time to a histogram of BUCKET_SECONDS
+    buckets. Searches that ran into their timeout only count as misses, with
+    the time they spent waiting.
+    """
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.hit_time = 0.0
+        self.miss_time = 0.0
+
+    def record(self, elapsed: float, found: bool):
+        if found:
+            bucket = int(elapsed / BUCKET_SECONDS)
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+            self.hits += 1
+            self.hit_time += elapsed
+        else:
+            self.misses += 1
+            self.miss_time += elapsed
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper edge of the bucket holding quantile q of found times"""
+        if not self.hits:
+            return None
+        target = q * self.hits
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= target:
+                return (bucket + 1) * BUCKET_SECONDS
+        return (max(self.buckets) + 1) * BUCKET_SECONDS
+
+    def to_dict(self) -> dict:
+        return {
+            "buckets": {str(bucket): count for bucket, count in self.buckets.items()},
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_time": round(self.hit_time, 3),
+            "miss_time": round(self.miss_time, 3),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SiteTimings":
+        timings = cls()
+        timings.buckets = {
+            int(bucket): count for bucket, count in data.get("buckets", {}).items()
+        }
+        timings.hits = data.get("hits", 0)
+        timings.misses = data.get("misses", 0)
+        timings.hit_time = data.get("hit_time", 0.0)
+        timings.miss_time = data.get("miss_time", 0.0)
+        return timings
+
+
+class TransitionTimings:
+    """Per-device store of SiteTimings, persisted as JSON
+
+    The file maps device names to call sites, so one file serves a desktop
+    install and several emulators without mixing their timings.
+
+    Args:
+        path: JSON file to load from and save to
+        device: Device the timings belong to
+    """
+
+    def __init__(self, path: str = TIMINGS_FILE, device: str = "desktop"):
+        self.path = path
+        self.device = device
+        self.sites: Dict[str, SiteTimings] = {}
+        self._other_devices = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+
+        with self._lock:
+            self.sites = {
+                site: SiteTimings.from_dict(timings)
+                for site, timings in data.pop(self.device, {}).items()
+            }
+            self._other_devices = data
+            self._dirty = False
+
+    def save(self):
+        """Write the file, unless nothing was recorded since the last save"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            data = dict(self._other_devices)
+            data[self.device] = {
+                site: timings.to_dict() for site, timings in self.sites.items()
+            }
+        try:
+            with open(self.path, "w", encoding="utf-8") as file:
+                json.dump(data, file, indent=2)
+        except OSError as e:
+            print(f"[TIMING] Could not save {self.path}: {e}")
+            with self._lock:
+                self._dirty = True
+
+    def record(self, site: str, elapsed: float, found: bool):
+        with self._lock:
+            self.sites.setdefault(site, SiteTimings()).record(elapsed, found)
+            self._dirty = True
+
+    def search_params(self, site: str, default_timeout: float) -> Tuple[float, float]:
+        """Return (initial delay, timeout) for a search at a call site
+
+        Until MIN_SAMPLES hits are recorded the caller's timeout is used as
+        is. After that searching starts shortly before the earliest observed
+        appearance, and the timeout is extended to cover the observed p99
+        with a margin (at most MAX_TIMEOUT_FACTOR times the caller's value,
+        so a slow host gets longer waits). The timeout is never shortened:
+        searches that ran out of time are not in the histogram, so the times
+        it shows can be lower than the real ones.
+        """
+        with self._lock:
+            timings = self.sites.get(site)
+            if timings is None or timings.hits < MIN_SAMPLES:
+                return 0.0, default_timeout
+            p01 = timings.quantile(0.01)
+            p99 = timings.quantile(0.99)
+
+        timeout = max(
+            default_timeout,
+            min(
+                max(p99 * TIMEOUT_MARGIN, MIN_TIMEOUT),
+                max(default_timeout * MAX_TIMEOUT_FACTOR, MIN_TIMEOUT),
+            ),
+        )
+        # Nothing appears before the fastest bucket seen, start just before it
+        delay = min(max(p01 - BUCKET_SECONDS, 0.0), timeout / 2)
+        return delay, timeout
+
+    def waste_report(self, limit: int = 10) -> str:
+        """Call sites ranked by the wall-clock time spent on searches that failed"""
+        with self._lock:
+            rows = sorted(
+                self.sites.items(), key=lambda item: item[1].miss_time, reverse=True
+            )[:limit]
+
+        lines = [f"[TIMING] Wasted search time on {self.device}:"]
+        for site, timings in rows:
+            p99 = timings.quantile(0.99)
+            p99_text = f"{p99:.2f}s" if p99 is not None else "-"
+            lines.append(
+                f"  {site:<32} {timings.miss_time:8.1f}s wasted "
+                f"in {timings.misses} misses, {timings.hits} hits, p99 {p99_text}"
+            )
+        return "\n".join(lines)
+
+
+# Global timings instance
+_timings = None
+
+
+def _device_name() -> str:
+    if not USE_PHONE:
+        return "desktop"
+    from utils.adb_utils import get_adb_controller
+
+    controller = get_adb_controller()
+    return controller.device_id if controller and controller.device_id else "phone"
+
+
+def get_transition_timings() -> TransitionTimings:
+    """Get or create the timings of the current device, saved at exit"""
+    global _timings
+    if _timings is None:
+        _timings = TransitionTimings(device=_device_name())
+        atexit.register(_timings.save)
+    return _timings
+
+
+def timed_search(
+    site: str, default_timeout: float, search: Callable[[float], object]
+):
+    """Run a search with timings learned for its call site, and record it
+
+    Args:
+        site: Call site name, e.g. "race.view_results"
+        default_timeout: The caller's search time, used until enough
+            samples exist or when adaptiveTimeouts is off
+        search: Callable taking the search time and returning the result,
+            None when nothing was found
+    """
+    timings = get_transition_timings()
+    if ADAPTIVE_TIMEOUTS:
+        delay, timeout = timings.search_params(site, default_timeout)
+    else:
+        delay, timeout = 0.0, default_timeout
+
+    start = clock.now()
+    if delay:
+        clock.sleep(delay)
+    result = search(timeout - delay)
+    timings.record(site, clock.now() - start, result is not None)
+    return result
+
+
+if __name__ == "__main__":
+    # Show the waste report of a timings file: python -m utils.timing [device]
+    path = TIMINGS_FILE
+    if not os.path.exists(path):
+        print(f"[TIMING] No {path} yet")
+        sys.exit(1)
+
+    with open(path, "r", encoding="utf-8") as file:
+        devices = list(json.load(file))
+    for device in sys.argv[1:] or devices:
+        print(TransitionTimings(path, device).waste_report())
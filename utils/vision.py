@@ -0,0 +1,505 @@
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from utils.boxes import find_peaks, nms_indices
+from utils.templates import BEST_SCALES, get_template_registry, load_template
+
+# Load config
+try:
+    with open("config.json", "r", encoding="utf-8") as file:
+        config = json.load(file)
+except FileNotFoundError:
+    config = {}
+
+PYRAMID_MATCHING = config.get("pyramidMatching", False)
+
+# Coarse pyramid levels tried, relative to the matching scale. The first one
+# that keeps the template at least PYRAMID_MIN_SIZE pixels is used.
+PYRAMID_LEVELS = (0.25, 0.5)
+PYRAMID_MIN_SIZE = 12
+# Coarse peaks refined at full resolution
+PYRAMID_CANDIDATES = 3
+
+
+class Match(Sequence):
+    """One template match: its box in screen pixels and its confidence
+
+    Indexes and unpacks as its center point (x, y) like pyautogui.Point, so
+    it can be handed to pyautogui.moveTo and click directly, and has the
+    left, top, width and height of a located box.
+    """
+
+    __slots__ = ("left", "top", "width", "height", "confidence")
+
+    def __init__(self, left, top, width, height, confidence):
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.confidence = confidence
+
+    @property
+    def x(self) -> int:
+        return self.left + self.width // 2
+
+    @property
+    def y(self) -> int:
+        return self.top + self.height // 2
+
+    @property
+    def box(self):
+        """(left, top, width, height) in screen pixels"""
+        return (self.left, self.top, self.width, self.height)
+
+    def __len__(self):
+        return 2
+
+    def __getitem__(self, index):
+        return (self.x, self.y)[index]
+
+    def __reduce__(self):
+        # Results are sent between the vision pipeline's processes
+        return (Match, self.box + (self.confidence,))
+
+    def __repr__(self):
+        return (
+            f"Match(x={self.x}, y={self.y}, box={self.box}, "
+            f"confidence={self.confidence:.3f})"
+        )
+
+
+class MatchCache:
+    """Remembers score maps per (template, region, scale, frame digest)
+
+    The phone locate loops poll the screen every 50 ms, and during dialogs and
+    waits the screen does not change between polls. A repeated frame is
+    recognised by its digest, so neither its colour conversion nor the
+    template match run again.
+
+    Args:
+        max_entries: Entries kept, least recently used ones are dropped first
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached result for key, or None"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit and miss counters since start"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def summary(self):
+        """One log line with the hit and miss counters"""
+        stats = self.stats()
+        return (
+            f"[MATCH] Cache hits: {stats['hits']}, misses: {stats['misses']} "
+            f"({stats['hit_rate']:.0%} of matches skipped)"
+        )
+
+
+class LocationCache:
+    """Remembers where each template was last found on screen
+
+    Buttons and icons appear at almost the same place every time, so a
+    template is first matched in a window around its last hit, padded by
+    `padding` screen pixels on every side, and the whole search region is
+    only matched when the window misses. Before the first hit, the search
+    region itself (the manifest ROI or the caller's region) is matched.
+
+    Args:
+        padding: Screen pixels added around the last hit
+    """
+
+    def __init__(self, padding=40):
+        self.padding = padding
+        self._boxes = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def window(self, key, screen):
+        """(x, y, w, h) screen region around the last hit inside screen, or None"""
+        with self._lock:
+            box = self._boxes.get(key)
+        if box is None:
+            return None
+        left, top, width, height = box
+        x0 = max(left - self.padding, screen.origin[0])
+        y0 = max(top - self.padding, screen.origin[1])
+        x1 = min(left + width + self.padding, screen.origin[0] + screen.width)
+        y1 = min(top + height + self.padding, screen.origin[1] + screen.height)
+        if x1 - x0 < width or y1 - y0 < height:
+            return None
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def record(self, key, box, hit):
+        """Remember the box a template was found at, and whether the window found it"""
+        with self._lock:
+            self._boxes[key] = box
+            counts = self._counts.setdefault(key[0], [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def miss(self, key):
+        """Count a window search that had to fall back to the whole region"""
+        with self._lock:
+            self._counts.setdefault(key[0], [0, 0])[1] += 1
+
+    def forget(self, paths):
+        """Drop the locations of templates whose files changed"""
+        paths = set(paths)
+        with self._lock:
+            for key in [key for key in self._boxes if key[0] in paths]:
+                del self._boxes[key]
+
+    def stats(self):
+        """Window hits and full searches per template path"""
+        with self._lock:
+            return {
+                path: {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                }
+                for path, (hits, misses) in self._counts.items()
+            }
+
+    def summary(self):
+        """One log line with the overall window hit rate"""
+        stats = self.stats()
+        hits = sum(entry["hits"] for entry in stats.values())
+        total = hits + sum(entry["misses"] for entry in stats.values())
+        return (
+            f"[MATCH] Found at last location: {hits} of {total} searches "
+            f"({hits / total if total else 0.0:.0%}), {len(stats)} templates"
+        )
+
+
+def _match_pyramid(screen, template, scale):
+    """Coarse-to-fine best match of a BGR template in a screen Frame shrunk by scale
+
+    The template is first matched in grayscale against a much smaller copy
+    of the screen. Only the windows around the best few coarse peaks are
+    then matched in colour at full resolution, so the confidence is the
+    same TM_CCOEFF_NORMED score a full search gives at that location.
+
+    Returns:
+        (confidence, box) where box is the (left, top, width, height) of the
+        match in screen pixels, or None if the template is too small for any
+        pyramid level
+    """
+    (tH, tW) = template.shape[:2]
+    level = next(
+        (level for level in PYRAMID_LEVELS if min(tW, tH) * level >= PYRAMID_MIN_SIZE),
+        None,
+    )
+    if level is None:
+        return None
+
+    resized = screen.scaled(scale)
+    coarse = screen.scaled_gray(scale * level)
+    small = cv2.cvtColor(
+        cv2.resize(
+            template,
+            (int(round(tW * level)), int(round(tH * level))),
+            interpolation=cv2.INTER_AREA,
+        ),
+        cv2.COLOR_BGR2GRAY,
+    )
+    if coarse.shape[0] < small.shape[0] or coarse.shape[1] < small.shape[1]:
+        return None
+
+    result = cv2.matchTemplate(coarse, small, cv2.TM_CCOEFF_NORMED)
+    ratio_x = resized.shape[1] / float(coarse.shape[1])
+    ratio_y = resized.shape[0] / float(coarse.shape[0])
+    # Rounding at the coarse level is off by up to one coarse pixel
+    pad_x = int(np.ceil(ratio_x)) + 1
+    pad_y = int(np.ceil(ratio_y)) + 1
+
+    best = (-1.0, None)
+    for _ in range(PYRAMID_CANDIDATES):
+        (_, coarse_val, _, (cx, cy)) = cv2.minMaxLoc(result)
+        if not np.isfinite(coarse_val) or coarse_val <= -1:
+            break
+        # Blank out this peak so the next candidate is a different location
+        sh, sw = small.shape[:2]
+        result[
+            max(cy - sh // 2, 0) : cy + sh // 2 + 1,
+            max(cx - sw // 2, 0) : cx + sw // 2 + 1,
+        ] = -1
+
+        x = int(round(cx * ratio_x))
+        y = int(round(cy * ratio_y))
+        x0, y0 = max(x - pad_x, 0), max(y - pad_y, 0)
+        x1 = min(x + tW + pad_x, resized.shape[1])
+        y1 = min(y + tH + pad_y, resized.shape[0])
+        if x1 - x0 < tW or y1 - y0 < tH:
+            continue
+
+        refined = cv2.matchTemplate(
+            resized[y0:y1, x0:x1], template, cv2.TM_CCOEFF_NORMED
+        )
+        (_, maxVal, _, maxLoc) = cv2.minMaxLoc(refined)
+        if maxVal > best[0]:
+            best = (maxVal, (x0 + maxLoc[0], y0 + maxLoc[1]))
+
+    if best[1] is None:
+        return None
+    return best[0], _screen_box(screen, scale, best[1], (tW, tH))
+
+
+def _match_window(screen, template, scale, window):
+    """Best match of a template inside a (x, y, w, h) window of screen
+
+    The window is sliced from the shrunk screen a full search uses, so it
+    scores exactly what the full search scores at the same place.
+
+    Returns:
+        (confidence, box) like _match_pyramid
+    """
+    (tH, tW) = template.shape[:2]
+    resized = screen.scaled(scale)
+    x, y, w, h = window
+    x0, y0 = screen.screen_to_scaled(scale, x, y)
+    x1, y1 = screen.screen_to_scaled(scale, x + w, y + h)
+    x0, y0 = max(int(x0), 0), max(int(y0), 0)
+    patch = resized[y0 : int(np.ceil(y1)), x0 : int(np.ceil(x1))]
+    if patch.shape[0] < tH or patch.shape[1] < tW:
+        return 0, None
+
+    result = cv2.matchTemplate(patch, template, cv2.TM_CCOEFF_NORMED)
+    (_, maxVal, _, maxLoc) = cv2.minMaxLoc(result)
+    return maxVal, _screen_box(
+        screen, scale, (x0 + maxLoc[0], y0 + maxLoc[1]), (tW, tH)
+    )
+
+
+def _screen_box(screen, scale, location, size):
+    """(left, top, width, height) in screen pixels of a box in scaled pixels"""
+    left, top = screen.scaled_to_screen(scale, location[0], location[1])
+    right, bottom = screen.scaled_to_screen(
+        scale, location[0] + size[0], location[1] + size[1]
+    )
+    left, top = int(left), int(top)
+    return (left, top, int(right) - left, int(bottom) - top)
+
+
+class ScoreMap:
+    """Scores of one template over one screen, computed on demand
+
+    The full TM_CCOEFF_NORMED map is only computed when a query needs it.
+    A best-match query answered from the template's last location or from
+    the pyramid matcher leaves it uncomputed, and a later all-matches query
+    on the same screen computes it once.
+
+    The screen is passed to each query rather than kept, so cached maps do
+    not hold on to pooled capture buffers. Any Frame with the same digest,
+    origin and size gives the same answers.
+
+    Args:
+        template: BGR template pixels
+        scale: Factor the screen is shrunk by before matching
+    """
+
+    __slots__ = ("template", "scale", "_scores", "_mapping", "_best")
+
+    def __init__(self, template, scale=BEST_SCALES):
+        self.template = template
+        self.scale = scale
+        self._scores = None
+        self._mapping = None
+        self._best = None
+
+    @property
+    def computed(self) -> bool:
+        """True once the full map or the best match is known"""
+        return self._scores is not None or self._best is not None
+
+    def scores(self, screen) -> Optional[np.ndarray]:
+        """Full score map, None if the template does not fit the screen"""
+        if self._scores is None:
+            (tH, tW) = self.template.shape[:2]
+            resized = screen.scaled(self.scale)
+            if resized.shape[0] < tH or resized.shape[1] < tW:
+                return None
+            self._scores = cv2.matchTemplate(
+                resized, self.template, cv2.TM_CCOEFF_NORMED
+            )
+            # Screen position of scaled pixel (0, 0) and the size of one
+            left, top = screen.scaled_to_screen(self.scale, 0, 0)
+            right, bottom = screen.scaled_to_screen(self.scale, 1, 1)
+            self._mapping = (left, top, right - left, bottom - top)
+        return self._scores
+
+    def _box(self, location):
+        """(left, top, width, height) in screen pixels of a score map location"""
+        left, top, ratio_x, ratio_y = self._mapping
+        (tH, tW) = self.template.shape[:2]
+        x0 = int(left + location[0] * ratio_x)
+        y0 = int(top + location[1] * ratio_y)
+        x1 = int(left + (location[0] + tW) * ratio_x)
+        y1 = int(top + (location[1] + tH) * ratio_y)
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def set_best(self, confidence, box):
+        """Record a best match found without the full map"""
+        self._best = Match(*box, float(confidence)) if box is not None else None
+
+    def best(self, screen) -> Optional[Match]:
+        """Highest scoring location, whatever its confidence"""
+        if self._best is None:
+            scores = self.scores(screen)
+            if scores is None:
+                return None
+            (_, maxVal, _, maxLoc) = cv2.minMaxLoc(scores)
+            self.set_best(maxVal, self._box(maxLoc))
+        return self._best
+
+    def all(self, screen, confidence, overlap_threshold=0.3) -> List[Match]:
+        """One match per score peak at or above confidence, after NMS
+
+        Returns:
+            Matches, highest confidence first
+        """
+        scores = self.scores(screen)
+        if scores is None:
+            return []
+        (tH, tW) = self.template.shape[:2]
+        xs, ys, values = find_peaks(scores, confidence, (tW, tH))
+        matches = [
+            Match(*self._box((x, y)), value)
+            for x, y, value in zip(xs.tolist(), ys.tolist(), values.tolist())
+        ]
+        keep = nms_indices([match.box for match in matches], values, overlap_threshold)
+        return [matches[i] for i in keep]
+
+
+class VisionEngine:
+    """Template matcher shared by every locate function and match_template
+
+    One ScoreMap is kept per (template, screen region, scale, frame digest),
+    so asking where a template is and how many times it appears on the same
+    capture costs one match. Identical captures share a digest, so polls of
+    an unchanged screen reuse it as well.
+
+    Args:
+        max_entries: Score maps kept, least recently used ones are dropped
+            first. A full-screen map is about 2 MB.
+    """
+
+    def __init__(self, max_entries=32):
+        self.cache = MatchCache(max_entries)
+        self.locations = LocationCache()
+
+    def score_map(self, screen, path, scale=BEST_SCALES) -> Optional[ScoreMap]:
+        """Score map of a template file over a screen Frame, None if not loaded"""
+        key = (path, screen.origin, screen.shape, scale, screen.digest)
+        score_map = self.cache.get(key)
+        if score_map is None:
+            template = load_template(path)
+            if template is None:
+                print(f"[ERROR] Could not load template: {path}")
+                return None
+            score_map = ScoreMap(template, scale)
+            self.cache.put(key, score_map)
+        return score_map
+
+    def find(self, screen, path, confidence, scale=BEST_SCALES) -> Optional[Match]:
+        """Best match of a template in screen, None below confidence
+
+        The template is first searched around its last hit, then with the
+        pyramid matcher if enabled, and only then over the full map.
+        """
+        score_map = self.score_map(screen, path, scale)
+        if score_map is None:
+            return None
+        if score_map.computed:
+            match = score_map.best(screen)
+            return match if match is not None and match.confidence >= confidence else None
+
+        key = (path, screen.origin, screen.shape, scale)
+        window = self.locations.window(key, screen)
+        if window is not None:
+            found, box = _match_window(screen, score_map.template, scale, window)
+            if found >= confidence:
+                self.locations.record(key, box, hit=True)
+                score_map.set_best(found, box)
+                return score_map.best(screen)
+
+        if PYRAMID_MATCHING:
+            pyramid = _match_pyramid(screen, score_map.template, scale)
+            if pyramid is not None:
+                score_map.set_best(*pyramid)
+
+        # The full search is counted once, whether or not it finds the template
+        match = score_map.best(screen)
+        if match is None or match.confidence < confidence:
+            if window is not None:
+                self.locations.miss(key)
+            return None
+        self.locations.record(key, match.box, hit=False)
+        return match
+
+    def find_all(
+        self, screen, path, confidence, scale=BEST_SCALES, overlap_threshold=0.3
+    ) -> List[Match]:
+        """Every match of a template in screen at or above confidence"""
+        score_map = self.score_map(screen, path, scale)
+        if score_map is None:
+            return []
+        return score_map.all(screen, confidence, overlap_threshold)
+
+
+vision = VisionEngine()
+
+# Shared with the log lines and tools that report on them
+match_cache = vision.cache
+location_cache = vision.locations
+
+
+def _on_templates_reloaded(changed):
+    # Score maps of a template are stale once its file is reloaded
+    match_cache.clear()
+    location_cache.forget(changed)
+
+
+get_template_registry().on_reload(_on_templates_reloaded)
+
+
+def get_vision_engine() -> VisionEngine:
+    return vision